@@ -0,0 +1,78 @@
+"""Internal dashboard over the calculated scenario rollups.
+
+Usage:
+    streamlit run analytics_dashboard.py --server.port 8502
+
+Reads only the rollup in ROI_SCENARIO_LOG_DIR (see scenario_log.py), never
+the segments, so every view is a few sketch lookups however many scenarios
+have been logged. Refresh it with `python scenario_log.py rollup`, e.g.
+from cron; the page picks up a new rollup on its next rerun. Not linked
+from the calculator; serve it on an internal port only.
+"""
+import os
+
+import pandas as pd
+import streamlit as st
+
+import profiles
+import scenario_log
+
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+METRIC_LABELS = {
+    "roi_percentage": "ROI (%)",
+    "payback_months": "Payback (months)",
+    "net_savings": "Net Savings ($)",
+    "total_dollars": "Total Annual Savings ($)",
+    "hourly_rate": "IT Staff Rate ($/hr)",
+}
+
+st.set_page_config(page_title="ROI Calculator Analytics", page_icon="📊", layout="wide")
+
+
+# Loaded once per rollup file version and shared by every session
+@st.cache_resource(max_entries=1)
+def load_rollup(path, mtime_ns):
+    return scenario_log.load_rollup(os.path.dirname(path))
+
+
+log_dir = os.environ.get("ROI_SCENARIO_LOG_DIR", scenario_log.DEFAULT_DIR)
+rollup_path = os.path.join(log_dir, scenario_log.ROLLUP_FILE)
+try:
+    rollup = load_rollup(rollup_path, os.stat(rollup_path).st_mtime_ns)
+except FileNotFoundError:
+    st.info(f"No rollup in {log_dir} yet. Run `python scenario_log.py rollup` after the first scenarios are logged.")
+    st.stop()
+
+st.title("📊 Calculated Scenarios")
+st.caption(f"{rollup.count():,} scenarios from {len(rollup.segments):,} log segments")
+
+profile_labels = {name: profile.label for name, profile in profiles.registry.profiles().items()}
+filter_col1, filter_col2 = st.columns(2)
+with filter_col1:
+    band = st.selectbox("Devices", [scenario_log.ALL] + rollup.bands(),
+                        format_func=lambda value: "All" if value == scenario_log.ALL else value)
+with filter_col2:
+    profile = st.selectbox("Industry Profile", [scenario_log.ALL] + rollup.profiles(),
+                           format_func=lambda value: "All" if value == scenario_log.ALL else profile_labels.get(value, value))
+
+count = rollup.count(band, profile)
+st.metric("Scenarios", f"{count:,}")
+if not count:
+    st.warning("No scenarios for this selection.")
+    st.stop()
+
+st.dataframe(pd.DataFrame(
+    {f"P{q * 100:g}": [rollup.quantile(metric, q, band, profile) for metric in METRIC_LABELS] for q in QUANTILES},
+    index=list(METRIC_LABELS.values()),
+).style.format("{:,.1f}"), use_container_width=True)
+st.caption(f"Quantiles are estimates within {scenario_log.RELATIVE_ACCURACY:.0%} of the exact value.")
+
+chart_col1, chart_col2 = st.columns(2)
+with chart_col1:
+    st.subheader("Scenarios by Device Band")
+    st.bar_chart(pd.Series({value: rollup.count(value, profile) for value in rollup.bands()}, name="Scenarios"))
+with chart_col2:
+    st.subheader("Scenarios by Industry Profile")
+    st.bar_chart(pd.Series({profile_labels.get(value, value): rollup.count(band, value) for value in rollup.profiles()},
+                           name="Scenarios"))
@@ -0,0 +1,167 @@
+"""Load test for api_server.py.
+
+Usage:
+    python api_loadtest.py --spawn                      # start a local server and test it
+    python api_loadtest.py --url http://127.0.0.1:8000 --connections 8 --batch-size 10000
+
+Opens ``--connections`` keep-alive connections that each send
+``--requests`` columnar batch requests of ``--batch-size`` random
+scenarios, reads the streamed responses completely and reports scenarios/sec
+and request latency. The run fails (exit code 1) when throughput per server
+core is below api_server.THROUGHPUT_TARGET.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+import api_server
+
+
+def make_payload(batch_size, seed=0):
+    """Pre-encoded columnar batch request body of random scenarios."""
+    rng = np.random.default_rng(seed)
+    columns = {
+        "num_devices": rng.integers(100, 50_000, batch_size).tolist(),
+        "hourly_rate": rng.uniform(20, 150, batch_size).round(2).tolist(),
+        "licence_requests": rng.integers(0, 5_000, batch_size).tolist(),
+        "licence_hours": rng.uniform(0.1, 2, batch_size).round(2).tolist(),
+        "licence_spend": rng.integers(0, 10_000_000, batch_size).tolist(),
+        "reports_per_year": rng.integers(0, 52, batch_size).tolist(),
+        "checks_per_year": rng.integers(0, 52, batch_size).tolist(),
+        "sub_cost": rng.integers(10_000, 500_000, batch_size).tolist(),
+    }
+    return json.dumps({"columns": columns}).encode()
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding") == "chunked":
+        parts = []
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            if size == 0:
+                await reader.readline()
+                break
+            parts.append(await reader.readexactly(size))
+            await reader.readline()
+        return status, b"".join(parts)
+    return status, await reader.readexactly(int(headers.get("content-length", 0)))
+
+
+async def _worker(host, port, path, payload, requests, latencies, check):
+    reader, writer = await asyncio.open_connection(host, port, limit=api_server.MAX_BODY_BYTES)
+    request_head = (
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\nConnection: keep-alive\r\n\r\n"
+    ).encode()
+    try:
+        for i in range(requests):
+            start = time.perf_counter()
+            writer.write(request_head + payload)
+            await writer.drain()
+            status, body = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                raise RuntimeError(f"HTTP {status}: {body[:200]!r}")
+            if check and i == 0:
+                json.loads(body)
+    finally:
+        writer.close()
+
+
+async def run(host, port, connections, requests, batch_size):
+    payload = make_payload(batch_size)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _worker(host, port, "/v1/roi/batch", payload, requests, latencies, check=(i == 0))
+        for i in range(connections)
+    ])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    total_requests = connections * requests
+    return {
+        "connections": connections,
+        "requests": total_requests,
+        "batch_size": batch_size,
+        "elapsed_s": elapsed,
+        "requests_per_s": total_requests / elapsed,
+        "scenarios_per_s": total_requests * batch_size / elapsed,
+        "latency_p50_ms": latencies[len(latencies) // 2] * 1000,
+        "latency_p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+async def _wait_for_server(host, port, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server did not start on {host}:{port}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the Open-AudIT ROI API batch endpoint.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn", action="store_true", help="start api_server.py for the duration of the test")
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=20, help="requests per connection")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--server-cores", type=int, default=1,
+                        help="cores serving the URL (for the per-core target check)")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args(argv)
+
+    url = urlparse(args.url)
+    host, port = url.hostname, url.port or 80
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([sys.executable, "api_server.py", "--host", host, "--port", str(port)],
+                                  stdout=subprocess.DEVNULL)
+    try:
+        if server is not None:
+            asyncio.run(_wait_for_server(host, port))
+        result = asyncio.run(run(host, port, args.connections, args.requests, args.batch_size))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    per_core = result["scenarios_per_s"] / args.server_cores
+    result["scenarios_per_s_per_core"] = per_core
+    result["target_per_core"] = api_server.THROUGHPUT_TARGET
+    result["passed"] = per_core >= api_server.THROUGHPUT_TARGET
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['requests']:,} requests x {args.batch_size:,} scenarios over {args.connections} connections")
+        print(f"  throughput   {result['scenarios_per_s']:,.0f} scenarios/s ({per_core:,.0f} per core, "
+              f"target {api_server.THROUGHPUT_TARGET:,})")
+        print(f"  requests     {result['requests_per_s']:,.1f} req/s")
+        print(f"  latency      p50 {result['latency_p50_ms']:,.1f} ms, p99 {result['latency_p99_ms']:,.1f} ms")
+        print("  PASS" if result["passed"] else "  FAIL")
+    sys.exit(0 if result["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
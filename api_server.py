@@ -0,0 +1,361 @@
+"""Headless JSON API for the ROI calculations.
+
+Usage:
+    python api_server.py --host 127.0.0.1 --port 8000
+
+Endpoints:
+
+    GET  /health
+    POST /v1/roi           one scenario
+    POST /v1/roi/batch     many scenarios
+
+A single scenario is a JSON object of sidebar inputs (num_devices,
+hourly_rate, licence_requests, licence_hours, licence_spend,
+reports_per_year, checks_per_year, sub_cost, num_employees), with an
+optional "include" object of line-item flags (warranty, licence_spend,
+asset, change, vuln, report). Missing inputs take the sidebar defaults. The
+response has every line item and total.
+
+A batch is either {"scenarios": [{...}, ...]} or the faster columnar form
+{"columns": {"num_devices": [...], ...}}, plus an optional shared "include".
+Inputs must be finite, non-negative numbers; anything else is a 400 before
+any of the response is sent. The response is streamed as
+{"count": n, "columns": [...], "rows": [[...], ...]}, rows in request order,
+with chunked transfer encoding for HTTP/1.1 clients and as a body ended by
+closing the connection for HTTP/1.0 clients. If scoring fails after the
+response has started, the connection is aborted so the client sees a
+broken transfer rather than a truncated 200.
+
+The server is a single-process asyncio HTTP/1.1 server with keep-alive.
+Batches are parsed and scored with roi_engine in a worker thread, in
+vectorized slices of STREAM_CHUNK_ROWS, and each slice is written out
+before the next is computed, so the event loop keeps serving other
+connections while a batch is scored. The throughput
+target is THROUGHPUT_TARGET scenarios/sec per core for columnar batches;
+verify it with api_loadtest.py.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+
+import numpy as np
+
+import result_cache
+import roi_engine
+
+THROUGHPUT_TARGET = 50_000  # scenarios/sec per core
+
+STREAM_CHUNK_ROWS = 5_000
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+MAX_BATCH_SCENARIOS = 1_000_000
+
+SCENARIO_FIELDS = ("num_employees",) + roi_engine.INPUT_FIELDS
+
+INCLUDE_KEYS = tuple(key for key, _, _, _ in roi_engine.LINE_ITEMS)
+
+logger = logging.getLogger(__name__)
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _dumps(payload):
+    # Plain JSON only: NaN and Infinity are not valid JSON for most clients
+    return json.dumps(payload, allow_nan=False)
+
+
+def _parse_include(payload):
+    include = payload.get("include")
+    if include is None:
+        return None
+    if not isinstance(include, dict):
+        raise RequestError(400, '"include" must be an object')
+    unknown = set(include) - set(INCLUDE_KEYS)
+    if unknown:
+        raise RequestError(400, f"Unknown line items: {', '.join(sorted(unknown))}")
+    return {key: bool(value) for key, value in include.items()}
+
+
+def _check_fields(names):
+    unknown = set(names) - set(SCENARIO_FIELDS)
+    if unknown:
+        raise RequestError(400, f"Unknown inputs: {', '.join(sorted(unknown))}")
+
+
+def score_single(payload):
+    """Score one scenario object and return a dict of results."""
+    if not isinstance(payload, dict):
+        raise RequestError(400, "Expected a JSON object")
+    include = _parse_include(payload)
+    values = {key: value for key, value in payload.items() if key != "include"}
+    _check_fields(values)
+
+    inputs = dict(roi_engine.DEFAULT_INPUTS)
+    try:
+        inputs.update({key: float(value) for key, value in values.items()})
+    except (TypeError, ValueError):
+        raise RequestError(400, "Inputs must be numbers")
+    if not all(math.isfinite(value) and value >= 0 for value in inputs.values()):
+        raise RequestError(400, "Inputs must be finite, non-negative numbers")
+
+    key = result_cache.make_key("api", inputs, include)
+    return result_cache.shared_cache.get_or_compute(
+        key, lambda: roi_engine.calculate_scenario(inputs, include=include))
+
+
+def batch_columns(payload):
+    """Turn a batch payload into (columns dict of float arrays, row count, include)."""
+    if not isinstance(payload, dict):
+        raise RequestError(400, "Expected a JSON object")
+    include = _parse_include(payload)
+
+    if "columns" in payload:
+        raw = payload["columns"]
+        if not isinstance(raw, dict):
+            raise RequestError(400, '"columns" must be an object of arrays')
+        _check_fields(raw)
+        lengths = {len(values) for values in raw.values() if isinstance(values, list)}
+        if len(lengths) != 1 or len(raw) != sum(isinstance(v, list) for v in raw.values()):
+            raise RequestError(400, "All columns must be arrays of the same length")
+        n = lengths.pop()
+        columns = {}
+        try:
+            for name, values in raw.items():
+                columns[name] = np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise RequestError(400, "Inputs must be numbers")
+    elif "scenarios" in payload:
+        scenarios = payload["scenarios"]
+        if not isinstance(scenarios, list) or not all(isinstance(s, dict) for s in scenarios):
+            raise RequestError(400, '"scenarios" must be an array of objects')
+        n = len(scenarios)
+        names = set()
+        for scenario in scenarios:
+            names.update(scenario)
+        _check_fields(names)
+        columns = {}
+        try:
+            for name in names:
+                default = roi_engine.DEFAULT_INPUTS[name]
+                columns[name] = np.fromiter((s.get(name, default) for s in scenarios), dtype=np.float64, count=n)
+        except (TypeError, ValueError):
+            raise RequestError(400, "Inputs must be numbers")
+    else:
+        raise RequestError(400, 'Expected "scenarios" or "columns"')
+
+    if n > MAX_BATCH_SCENARIOS:
+        raise RequestError(413, f"At most {MAX_BATCH_SCENARIOS:,} scenarios per request")
+    for values in columns.values():
+        if not (np.isfinite(values).all() and (values >= 0).all()):
+            raise RequestError(400, "Inputs must be finite, non-negative numbers")
+    for name in roi_engine.INPUT_FIELDS:
+        if name not in columns:
+            columns[name] = np.full(n, float(roi_engine.DEFAULT_INPUTS[name]))
+    return columns, n, include
+
+
+def iter_batch_body(columns, n, include=None, chunk_rows=STREAM_CHUNK_ROWS):
+    """Yield the batch response body in pieces, one slice of rows at a time."""
+    header = {"count": n, "columns": list(roi_engine.RESULT_COLUMNS)}
+    yield _dumps(header)[:-1].encode() + b', "rows": ['
+    for start in range(0, n, chunk_rows):
+        stop = min(start + chunk_rows, n)
+        sliced = {name: values[start:stop] for name, values in columns.items()}
+        results = roi_engine.calculate(sliced, include=include)
+        rows = np.column_stack([results[name] for name in roi_engine.RESULT_COLUMNS]).tolist()
+        # Drop the outer brackets so slices join into one array
+        body = _dumps(rows)[1:-1]
+        yield ((", " if start else "") + body).encode()
+    yield b"]}"
+
+
+class Request:
+    def __init__(self, method, path, version, headers, body):
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+async def read_request(reader):
+    """Read one request, or return None when the client closed the connection."""
+    try:
+        request_line = await reader.readline()
+    except (ConnectionError, asyncio.LimitOverrunError):
+        return None
+    if not request_line:
+        return None
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise RequestError(400, "Malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    body = b""
+    if method == "POST":
+        if "content-length" not in headers:
+            raise RequestError(411, "Content-Length required")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise RequestError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, "Request body too large")
+        body = await reader.readexactly(length)
+    return Request(method, target.split("?", 1)[0], version, headers, body)
+
+
+async def send_response(writer, status, payload, keep_alive=True):
+    body = _dumps(payload).encode()
+    writer.write(
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+
+
+async def send_streamed(writer, status, pieces, keep_alive=True, chunked=True):
+    """Stream ``pieces`` as the body and return whether the connection can be kept open.
+
+    Each piece is computed in a worker thread. Without ``chunked`` (HTTP/1.0
+    clients) the body is ended by closing the connection. Once the status
+    line is out an error cannot become a 500, so the connection is aborted
+    instead and the client sees the transfer break.
+    """
+    keep_alive = keep_alive and chunked
+    framing = "Transfer-Encoding: chunked\r\n" if chunked else ""
+    writer.write(
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"{framing}"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+    )
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            piece = await loop.run_in_executor(None, next, pieces, None)
+        except Exception:
+            logger.exception("Streaming a response failed; aborting the connection")
+            writer.transport.abort()
+            return False
+        if piece is None:
+            break
+        writer.write(b"%x\r\n%s\r\n" % (len(piece), piece) if chunked else piece)
+        # Waiting on the socket also keeps a slow client from buffering the whole body
+        await writer.drain()
+    if chunked:
+        writer.write(b"0\r\n\r\n")
+    await writer.drain()
+    return keep_alive
+
+
+def _parse_json(body):
+    try:
+        return json.loads(body)
+    except ValueError:
+        raise RequestError(400, "Body is not valid JSON")
+
+
+def _parse_batch(body):
+    return batch_columns(_parse_json(body))
+
+
+async def dispatch(request, writer):
+    keep_alive = request.keep_alive
+    if request.path == "/health":
+        if request.method != "GET":
+            raise RequestError(405, "Use GET")
+        await send_response(writer, 200, {"status": "ok", "cache": result_cache.shared_cache.stats()}, keep_alive)
+    elif request.path == "/v1/roi":
+        if request.method != "POST":
+            raise RequestError(405, "Use POST")
+        await send_response(writer, 200, score_single(_parse_json(request.body)), keep_alive)
+    elif request.path == "/v1/roi/batch":
+        if request.method != "POST":
+            raise RequestError(405, "Use POST")
+        # Parsing a large batch takes long enough to stall other connections
+        columns, n, include = await asyncio.get_running_loop().run_in_executor(None, _parse_batch, request.body)
+        keep_alive = await send_streamed(writer, 200, iter_batch_body(columns, n, include), keep_alive,
+                                         chunked=request.version != "HTTP/1.0")
+    else:
+        raise RequestError(404, f"No route for {request.path}")
+    return keep_alive
+
+
+async def handle_connection(reader, writer):
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                if not await dispatch(request, writer):
+                    break
+            except RequestError as e:
+                await send_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+                break
+            except asyncio.IncompleteReadError:
+                break
+            except Exception as e:
+                await send_response(writer, 500, {"error": f"{type(e).__name__}: {e}"}, keep_alive=False)
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8000):
+    server = await asyncio.start_server(handle_connection, host, port, limit=MAX_BODY_BYTES)
+    print(f"Open-AudIT ROI API listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Open-AudIT ROI calculations as a JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
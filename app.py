@@ -1,11 +1,16 @@
 import streamlit as st
-import pandas as pd
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import assets
+import lead_store
+import lean_sessions
+import metrics
+import profiles
+import result_cache
+import results_table
+import roi_engine
+import scenario_log
+import share_links
 
 # Page config
 st.set_page_config(
@@ -14,569 +19,927 @@ st.set_page_config(
     layout="wide"
 )
 
-# Constants (from your VBA module)
-SAVING_PCT_LICENSE = 0.6
-LICENCE_SPEND_REDUCTION_PCT = 0.05
-MIN_PER_DEVICE_DISCOVERY = 10
-HOURS_PER_ASSET_REPORT = 0.5
-SAVING_PCT_ASSET = 0.8
-CRITICAL_DEVICE_PCT = 0.3
-MIN_PER_CHECK_MANUAL = 5
-MIN_PER_CHECK_AUTOMATED = 1
-MIN_PER_DEVICE_VULN_PER_YEAR = 10
+# Per-process timing of each section of the rerun (see metrics.py). The
+# exporter only starts when ROI_METRICS_PORT is set.
+metrics.serve()
+cache_counters = ("hits", "misses", "evictions", "expirations")
+queue_counters = ("written", "dropped", "failed")
+metrics.register_collector("result_cache", result_cache.shared_cache.stats, counters=cache_counters)
+metrics.register_collector("lead_store", lead_store.stats, counters=queue_counters)
+metrics.register_collector("share_store", share_links.result_store.stats, counters=cache_counters)
+metrics.register_collector("profiles", profiles.registry.stats, counters=("reloads", "reload_errors"))
+metrics.register_collector("scenario_log", scenario_log.stats, counters=queue_counters)
+run_ctx = get_script_run_ctx()
+rerun_timer = metrics.span("rerun", session=run_ctx.session_id if run_ctx else None).start()
+# Closed in finally so st.rerun(), st.stop() and interrupted reruns are timed too
+try:
+    # Custom CSS with navy blue theme
+    with metrics.span("css"):
+        st.markdown(assets.PAGE_CSS, unsafe_allow_html=True)
 
-# Custom CSS with navy blue theme
-st.markdown("""
-    <style>
-    .main-header {
-        font-size: 4rem;
-        color: #1f4788;
-        font-weight: bold;
-        margin-bottom: 1rem;
-        line-height: 1.2;
-    }
-    .sub-header {
-        font-size: 1.5rem;
-        color: #666;
-        margin-bottom: 2rem;
-    }
-    .savings-total {
-        background-color: #4a6fa5;
-        padding: 20px;
-        border-radius: 10px;
-        border: 2px solid #2c4a7c;
-        color: white;
-    }
-    .savings-total h3 {
-        color: white;
-    }
-    .savings-total p {
-        color: white;
-    }
-    /* Increase sidebar font sizes */
-    [data-testid="stSidebar"] label {
-        font-size: 18px !important;
-        font-weight: 700 !important;
-    }
-    [data-testid="stSidebar"] input {
-        font-size: 16px !important;
-    }
-    [data-testid="stSidebar"] .stNumberInput label {
-        font-size: 18px !important;
-        font-weight: 700 !important;
-    }
-    [data-testid="stSidebar"] div[data-baseweb="input"] label {
-        font-weight: 700 !important;
-        font-size: 18px !important;
-    }
-    /* Reduce sidebar spacing */
-    [data-testid="stSidebar"] .stNumberInput {
-        margin-bottom: 0rem !important;
-        margin-top: 0rem !important;
-    }
-    [data-testid="stSidebar"] [data-testid="stMarkdownContainer"] {
-        margin-bottom: 0.05rem !important;
-        margin-top: 0.05rem !important;
-    }
-    [data-testid="stSidebar"] hr {
-        margin-top: 0.2rem !important;
-        margin-bottom: 0.2rem !important;
-    }
-    [data-testid="stSidebar"] h2 {
-        margin-top: 0.2rem !important;
-        margin-bottom: 0.2rem !important;
-        font-size: 1.1rem !important;
-    }
-    /* Reduce caption spacing */
-    [data-testid="stSidebar"] .stCaption {
-        margin-top: 0 !important;
-        margin-bottom: 0 !important;
-    }
-    /* Tighter button spacing */
-    [data-testid="stSidebar"] .stButton {
-        margin-top: 0.3rem !important;
-    }
-    /* Reduce overall sidebar padding */
-    [data-testid="stSidebar"] > div:first-child {
-        padding-top: 0.5rem !important;
-    }
-    /* Make all input boxes same width */
-    [data-testid="stSidebar"] input[type="number"] {
-        width: 100% !important;
-    }
-    [data-testid="stSidebar"] div[data-baseweb="input"] {
-        width: 100% !important;
-    }
-    /* Green clear button */
-    .stButton button[kind="secondary"] {
-        background-color: #28a745 !important;
-        color: white !important;
-    }
-    .stButton button[kind="secondary"]:hover {
-        background-color: #218838 !important;
-    }
-    /* Hero section spacing */
-    .hero-section {
-        padding: 2rem 0;
-        margin-bottom: 2rem;
-    }
-    </style>
-""", unsafe_allow_html=True)
+    # Header with logo - HERO SECTION
+    header_timer = metrics.span("header").start()
+    st.markdown('<div class="hero-section">', unsafe_allow_html=True)
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        logo = assets.logo_bytes()
+        if logo:
+            st.image(logo, width=300)
+        else:
+            st.markdown('<h1 style="font-size: 3rem; color: #1f4788;">FirstWave</h1>', unsafe_allow_html=True)
 
-# Header with logo - HERO SECTION
-st.markdown('<div class="hero-section">', unsafe_allow_html=True)
-col1, col2 = st.columns([1, 3])
-with col1:
-    try:
-        st.image("firstwave_logo.png", width=300)
-    except:
-        st.markdown('<h1 style="font-size: 3rem; color: #1f4788;">FirstWave</h1>', unsafe_allow_html=True)
+    with col2:
+        st.markdown('<p class="main-header">Open-AudIT ROI Calculator</p>', unsafe_allow_html=True)
+        st.markdown('<p class="sub-header">Calculate your return on investment with Open-AudIT automation</p>', unsafe_allow_html=True)
 
-with col2:
-    st.markdown('<p class="main-header">Open-AudIT ROI Calculator</p>', unsafe_allow_html=True)
-    st.markdown('<p class="sub-header">Calculate your return on investment with Open-AudIT automation</p>', unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+    header_timer.stop()
 
-st.markdown('</div>', unsafe_allow_html=True)
+    # A shared link (?r=...) pre-fills the sidebar and checkboxes and opens the results
+    shared = share_links.decode(st.query_params.get(share_links.QUERY_PARAM))
+    shared_inputs, shared_include, shared_profile, shared_overrides = (
+        shared if shared else (roi_engine.DEFAULT_INPUTS, {}, profiles.DEFAULT_PROFILE, {}))
+    # The link's imported figures are taken once, when the session opens it, like
+    # the sidebar values; later tokens in the address bar are this session's own
+    if "link_overrides" not in st.session_state:
+        st.session_state.link_overrides = shared_overrides
 
-# Sidebar for inputs
-with st.sidebar:
-    st.header("📊 Your IT Environment")
-    
-    st.markdown("**Number of Employees**")
-    col_input, col_display = st.columns([2, 1])
-    with col_input:
-        num_employees = st.number_input(
-            "Number of Employees", 
-            min_value=0, 
-            value=1000, 
-            step=100,
-            format="%d",
-            label_visibility="collapsed"
-        )
-    with col_display:
-        st.markdown(f"<p style='margin-top:8px; font-size:14px; color:#666;'>{num_employees:,}</p>", unsafe_allow_html=True)
-    
-    st.markdown("**Number of IT Devices**")
-    col_input, col_display = st.columns([2, 1])
-    with col_input:
-        num_devices = st.number_input(
-            "Number of IT Devices", 
-            min_value=0, 
-            value=10000, 
-            step=1000,
-            format="%d",
+    # Sidebar for inputs
+    with metrics.span("sidebar"), st.sidebar:
+        st.header("📊 Your IT Environment")
+        
+        # Assumption profiles are compiled at startup and reloaded when the file changes
+        profile_options = profiles.registry.profiles()
+        st.markdown("**Industry Profile**")
+        profile_name = st.selectbox(
+            "Industry Profile",
+            list(profile_options),
+            index=list(profile_options).index(shared_profile) if shared_profile in profile_options else 0,
+            format_func=lambda name: profile_options[name].label,
             label_visibility="collapsed"
         )
-    with col_display:
-        st.markdown(f"<p style='margin-top:8px; font-size:14px; color:#666;'>{num_devices:,}</p>", unsafe_allow_html=True)
-    
-    st.markdown("**Average Hourly Rate of IT Staff ($/hr)**")
-    col_input, col_display = st.columns([2, 1])
-    with col_input:
-        hourly_rate = st.number_input(
-            "Average Hourly Rate of IT Staff", 
+        profile = profiles.registry.get(profile_name)
+        # Assumptions the sharer's device or licence import replaced, for that profile only
+        if st.session_state.link_overrides and profile_name == shared_profile:
+            link_assumptions = profile.assumptions._replace(**st.session_state.link_overrides)
+            profile = profile._replace(assumptions=link_assumptions,
+                                       version=result_cache.assumptions_version(link_assumptions))
+            st.caption("Includes device and licence figures imported by whoever shared this link.")
+        
+        st.markdown("**Number of Employees**")
+        col_input, col_display = st.columns([2, 1])
+        with col_input:
+            num_employees = st.number_input(
+                "Number of Employees", 
+                min_value=0, 
+                value=shared_inputs["num_employees"], 
+                step=100,
+                format="%d",
+                label_visibility="collapsed"
+            )
+        with col_display:
+            st.markdown(f"<p style='margin-top:8px; font-size:14px; color:#666;'>{num_employees:,}</p>", unsafe_allow_html=True)
+        
+        # An Open-AudIT device export replaces the device count and the assumed
+        # share of critical devices with the real figures
+        with st.expander("📥 Import Open-AudIT Devices"):
+            device_export = st.file_uploader("Device export (CSV or JSON)", type=["csv", "json", "jsonl"],
+                                             key=lean_sessions.upload_key("device_export"))
+            device_summary = None
+            if device_export is not None:
+                import device_import
+                
+                # Parsed once per upload; reruns reuse the counts
+                if st.session_state.get("device_export_id") != device_export.file_id:
+                    try:
+                        with metrics.span("device_import"):
+                            st.session_state.device_summary = device_import.summarise(device_export, device_export.name)
+                    except ValueError as exc:
+                        st.session_state.device_summary = None
+                        st.error(str(exc))
+                    st.session_state.device_export_id = device_export.file_id
+                device_summary = st.session_state.device_summary
+                if device_summary is not None:
+                    lean_sessions.release_uploads("device_export")
+            elif lean_sessions.ENABLED:
+                # The file is gone; the counts stay until removed
+                device_summary = st.session_state.get("device_summary")
+                if device_summary is not None and st.button("Remove Device Import", key="device_import_remove"):
+                    device_summary = st.session_state.device_summary = None
+            if device_summary is not None:
+                import device_import
+                
+                critical_share = device_summary.critical_devices / device_summary.devices if device_summary.devices else 0.0
+                st.caption(f"{device_summary.devices:,} devices, {device_summary.critical_devices:,} critical "
+                           f"({critical_share:.0%}); {device_summary.skipped:,} retired or deleted skipped.")
+                st.dataframe(
+                    {"Type": list(device_summary.by_type), "Devices": list(device_summary.by_type.values())},
+                    hide_index=True, use_container_width=True
+                )
+                import_inputs, import_assumptions = device_import.apply(device_summary, shared_inputs, profile.assumptions)
+                profile = profile._replace(assumptions=import_assumptions,
+                                           version=result_cache.assumptions_version(import_assumptions))
+        
+        st.markdown("**Number of IT Devices**")
+        col_input, col_display = st.columns([2, 1])
+        with col_input:
+            num_devices = st.number_input(
+                "Number of IT Devices", 
+                min_value=0, 
+                value=import_inputs["num_devices"] if device_summary is not None else shared_inputs["num_devices"], 
+                step=1000,
+                format="%d",
+                label_visibility="collapsed"
+            )
+        with col_display:
+            st.markdown(f"<p style='margin-top:8px; font-size:14px; color:#666;'>{num_devices:,}</p>", unsafe_allow_html=True)
+        
+        st.markdown("**Average Hourly Rate of IT Staff ($/hr)**")
+        col_input, col_display = st.columns([2, 1])
+        with col_input:
+            hourly_rate = st.number_input(
+                "Average Hourly Rate of IT Staff", 
+                min_value=0.0, 
+                value=shared_inputs["hourly_rate"], 
+                step=5.0,
+                format="%.2f",
+                label_visibility="collapsed"
+            )
+        with col_display:
+            st.markdown(f"<p style='margin-top:8px; font-size:14px; color:#666;'>${hourly_rate:,.2f}</p>", unsafe_allow_html=True)
+        
+        st.divider()
+        st.header("🔧 Current Processes")
+        
+        st.markdown("**Warranty/Licence Requests per Year**")
+        col_input, col_display = st.columns([2, 1])
+        with col_input:
+            licence_requests = st.number_input(
+                "Warranty Licence Requests per Year", 
+                min_value=0, 
+                value=shared_inputs["licence_requests"], 
+                step=50,
+                format="%d",
+                label_visibility="collapsed"
+            )
+        with col_display:
+            st.markdown(f"<p style='margin-top:8px; font-size:14px; color:#666;'>{licence_requests:,}</p>", unsafe_allow_html=True)
+        
+        st.markdown("**Avg Processing Time per Licence Request (hrs)**")
+        licence_hours = st.number_input(
+            "Avg Processing Time per Licence Request", 
             min_value=0.0, 
-            value=50.0, 
-            step=5.0,
+            value=shared_inputs["licence_hours"], 
+            step=0.1,
             format="%.2f",
             label_visibility="collapsed"
         )
-    with col_display:
-        st.markdown(f"<p style='margin-top:8px; font-size:14px; color:#666;'>${hourly_rate:,.2f}</p>", unsafe_allow_html=True)
-    
-    st.divider()
-    st.header("🔧 Current Processes")
-    
-    st.markdown("**Warranty/Licence Requests per Year**")
-    col_input, col_display = st.columns([2, 1])
-    with col_input:
-        licence_requests = st.number_input(
-            "Warranty Licence Requests per Year", 
-            min_value=0, 
-            value=1000, 
-            step=50,
-            format="%d",
-            label_visibility="collapsed"
-        )
-    with col_display:
-        st.markdown(f"<p style='margin-top:8px; font-size:14px; color:#666;'>{licence_requests:,}</p>", unsafe_allow_html=True)
-    
-    st.markdown("**Avg Processing Time per Licence Request (hrs)**")
-    licence_hours = st.number_input(
-        "Avg Processing Time per Licence Request", 
-        min_value=0.0, 
-        value=0.5, 
-        step=0.1,
-        format="%.2f",
-        label_visibility="collapsed"
-    )
-    
-    st.markdown("**Total Current Licence Spend ($/yr)**")
-    col_input, col_display = st.columns([2, 1])
-    with col_input:
-        licence_spend = st.number_input(
-            "Total Current Licence Spend", 
+        
+        # A software inventory joined with the entitlement list replaces the flat
+        # licence spend reduction with the measured shelfware
+        with st.expander("📥 Import Software Licences"):
+            software_export = st.file_uploader("Open-AudIT software export (CSV)", type=["csv"],
+                                               key=lean_sessions.upload_key("software_export"))
+            entitlement_list = st.file_uploader("Entitlements: product, licences, unit_price (CSV)", type=["csv"],
+                                                key=lean_sessions.upload_key("entitlement_list"))
+            licence_result = None
+            if software_export is not None and entitlement_list is not None:
+                import licence_audit
+                
+                # Joined once per pair of uploads; in-process so the server never forks
+                upload_ids = (software_export.file_id, entitlement_list.file_id)
+                if st.session_state.get("licence_audit_ids") != upload_ids:
+                    try:
+                        with metrics.span("licence_audit"):
+                            licence_result = licence_audit.audit(software_export, entitlement_list, workers=1)
+                        if lean_sessions.ENABLED:
+                            licence_result = licence_result._replace(
+                                products=licence_result.products.head(lean_sessions.LICENCE_PRODUCTS_KEPT))
+                        st.session_state.licence_audit = licence_result
+                    except ValueError as exc:
+                        st.session_state.licence_audit = None
+                        st.error(str(exc))
+                    st.session_state.licence_audit_ids = upload_ids
+                licence_result = st.session_state.licence_audit
+                if licence_result is not None:
+                    lean_sessions.release_uploads("software_export", "entitlement_list")
+            elif lean_sessions.ENABLED:
+                licence_result = st.session_state.get("licence_audit")
+                if licence_result is not None and st.button("Remove Licence Import", key="licence_import_remove"):
+                    licence_result = st.session_state.licence_audit = None
+            if licence_result is not None:
+                import licence_audit
+                
+                st.caption(f"{licence_result.matched_installs:,} of {licence_result.installs:,} installs are entitled products. "
+                           f"Shelfware: ${licence_result.shelfware_savings:,.0f} of ${licence_result.licence_spend:,.0f}; "
+                           f"over-deployment exposure: ${licence_result.over_deployment_cost:,.0f}.")
+                st.dataframe(
+                    licence_result.products[["product", "entitled", "deployed", "shelfware_savings", "over_deployment_cost"]]
+                    .head(20).style.format({"shelfware_savings": "${:,.0f}", "over_deployment_cost": "${:,.0f}"}),
+                    hide_index=True, use_container_width=True
+                )
+                licence_inputs, licence_assumptions = licence_audit.apply(licence_result, shared_inputs, profile.assumptions)
+                profile = profile._replace(assumptions=licence_assumptions,
+                                           version=result_cache.assumptions_version(licence_assumptions))
+        
+        st.markdown("**Total Current Licence Spend ($/yr)**")
+        col_input, col_display = st.columns([2, 1])
+        with col_input:
+            licence_spend = st.number_input(
+                "Total Current Licence Spend", 
+                min_value=0, 
+                value=licence_inputs["licence_spend"] if licence_result is not None else shared_inputs["licence_spend"], 
+                step=100000,
+                format="%d",
+                label_visibility="collapsed"
+            )
+        with col_display:
+            st.markdown(f"<p style='margin-top:8px; font-size:14px; color:#666;'>${licence_spend:,}</p>", unsafe_allow_html=True)
+        
+        st.markdown("**Asset & Inventory Reports per Year**")
+        reports_per_year = st.number_input(
+            "Asset Inventory Reports per Year", 
             min_value=0, 
-            value=5000000, 
-            step=100000,
+            value=shared_inputs["reports_per_year"], 
+            step=1,
             format="%d",
             label_visibility="collapsed"
         )
-    with col_display:
-        st.markdown(f"<p style='margin-top:8px; font-size:14px; color:#666;'>${licence_spend:,}</p>", unsafe_allow_html=True)
-    
-    st.markdown("**Asset & Inventory Reports per Year**")
-    reports_per_year = st.number_input(
-        "Asset Inventory Reports per Year", 
-        min_value=0, 
-        value=12, 
-        step=1,
-        format="%d",
-        label_visibility="collapsed"
-    )
-    
-    st.markdown("**Change Detection & Config Mgmt Checks per Year**")
-    checks_per_year = st.number_input(
-        "Change Detection Config Mgmt Checks per Year", 
-        min_value=0, 
-        value=12, 
-        step=1,
-        format="%d",
-        label_visibility="collapsed"
-    )
-    
-    st.divider()
-    st.header("💵 Investment")
-    
-    st.markdown("**Open-AudIT Annual Subscription Cost ($)**")
-    col_input, col_display = st.columns([2, 1])
-    with col_input:
-        sub_cost = st.number_input(
-            "Open-AudIT Annual Subscription Cost", 
+        
+        st.markdown("**Change Detection & Config Mgmt Checks per Year**")
+        checks_per_year = st.number_input(
+            "Change Detection Config Mgmt Checks per Year", 
             min_value=0, 
-            value=100000, 
-            step=10000,
+            value=shared_inputs["checks_per_year"], 
+            step=1,
             format="%d",
             label_visibility="collapsed"
         )
-    with col_display:
-        st.markdown(f"<p style='margin-top:8px; font-size:14px; color:#666;'>${sub_cost:,}</p>", unsafe_allow_html=True)
+        
+        st.divider()
+        st.header("💵 Investment")
+        
+        st.markdown("**Open-AudIT Annual Subscription Cost ($)**")
+        col_input, col_display = st.columns([2, 1])
+        with col_input:
+            sub_cost = st.number_input(
+                "Open-AudIT Annual Subscription Cost", 
+                min_value=0, 
+                value=shared_inputs["sub_cost"], 
+                step=10000,
+                format="%d",
+                label_visibility="collapsed"
+            )
+        with col_display:
+            st.markdown(f"<p style='margin-top:8px; font-size:14px; color:#666;'>${sub_cost:,}</p>", unsafe_allow_html=True)
 
-# Initialize session state
-if 'show_calculations' not in st.session_state:
-    st.session_state.show_calculations = False
-if 'email_captured' not in st.session_state:
-    st.session_state.email_captured = False
-if 'user_email' not in st.session_state:
-    st.session_state.user_email = ""
+    # Initialize session state
+    if 'show_calculations' not in st.session_state:
+        st.session_state.show_calculations = shared is not None
+    if 'email_captured' not in st.session_state:
+        st.session_state.email_captured = False
+    if 'user_email' not in st.session_state:
+        st.session_state.user_email = ""
 
-# Calculate button
-if st.sidebar.button("Calculate ROI", type="primary", use_container_width=True):
-    st.session_state.show_calculations = True
+    # Calculate button
+    if st.sidebar.button("Calculate ROI", type="primary", use_container_width=True):
+        st.session_state.show_calculations = True
 
-# Calculations
-if st.session_state.show_calculations:
-    
-    # Lead Capture Gate - Show BEFORE calculations
-    if not st.session_state.email_captured:
-        st.markdown("---")
-        st.markdown("## 🔒 Get Your Personalized ROI Report")
-        st.write("Enter your email to see your results and receive a detailed analysis.")
-        
-        with st.form("email_form"):
-            email_input = st.text_input("Work Email Address", placeholder="you@company.com")
-            submit_email = st.form_submit_button("Show My Results", type="primary", use_container_width=True)
+    # Totals, results table and share text for one set of inputs and checkbox
+    # selections. Pure function of its arguments, so the result can be cached and
+    # shared between sessions.
+    def summarise_results(line_items, inputs, include, share_url, profile_label):
+        totals = roi_engine.calculate_totals(line_items, inputs["sub_cost"], include)
+        total_hours = float(totals["total_hours"])
+        total_dollars = float(totals["total_dollars"])
+        roi_percentage = float(totals["roi_percentage"])
+        payback_months = float(totals["payback_months"])
+        
+        # Raw per-item values for the exports; formatted only when displayed
+        with metrics.span("results_table"):
+            table = results_table.ResultsTable.from_line_items(line_items, include)
+        
+        # Generate shareable summary
+        share_timer = metrics.span("share_text").start()
+        share_text = share_links.share_text(inputs, totals, profile_label, share_url)
+        share_timer.stop()
+        
+        return {
+            "total_hours": total_hours,
+            "total_dollars": total_dollars,
+            "roi_percentage": roi_percentage,
+            "payback_months": payback_months,
+            "table": table,
+            "share_text": share_text,
+        }
+
+
+    # reportlab is only imported when someone actually downloads a PDF
+    def render_pdf(table, summary, email, inputs):
+        import pdf_report
+        return pdf_report.build_pdf(table, summary, email=email, inputs=inputs)
+
+
+    # Sidebar inputs offered by goal seek and the explorer, with their labels
+    INPUT_LABELS = {
+        "sub_cost": "Open-AudIT Annual Subscription Cost ($)",
+        "num_devices": "Number of IT Devices",
+        "hourly_rate": "Average Hourly Rate of IT Staff ($/hr)",
+        "licence_requests": "Warranty/Licence Requests per Year",
+        "licence_hours": "Avg Processing Time per Licence Request (hrs)",
+        "licence_spend": "Total Current Licence Spend ($/yr)",
+        "reports_per_year": "Asset & Inventory Reports per Year",
+        "checks_per_year": "Change Detection & Config Mgmt Checks per Year",
+    }
+    # Scenarios on the comparison page, counting the sidebar's
+    MAX_COMPARED_SCENARIOS = 10
+    # Goal seek targets: (label, default value)
+    GOAL_SEEK_TARGETS = {
+        "roi_percentage": ("ROI (%)", 300.0),
+        "payback_months": ("Payback Period (months)", 6.0),
+        "net_savings": ("Net Savings ($)", 250000.0),
+    }
+
+
+    # Results that depend on the Include checkboxes. This runs as a fragment, so
+    # toggling a line item reruns only this part of the page and recomputes the
+    # totals from the line items passed in by the last full run.
+    @st.fragment
+    def results_breakdown(line_items, inputs, shared_include, profile):
+        # A checkbox toggle reruns only this fragment, so it counts toward the
+        # session's cost here rather than through the "rerun" span
+        ctx = get_script_run_ctx()
+        fragment_session = ctx.session_id if ctx and ctx.fragment_ids_this_run else None
+        fragment_timer = metrics.span("results_breakdown", session=fragment_session).start()
+        try:
+            sub_cost = inputs["sub_cost"]
+            num_employees = inputs["num_employees"]
+            num_devices = inputs["num_devices"]
+            hourly_rate = inputs["hourly_rate"]
+        
+            warranty_hours_calc = float(line_items["warranty_hours"])
+            warranty_dollars_calc = float(line_items["warranty_dollars"])
+            licence_spend_savings_calc = float(line_items["licence_spend_savings"])
+            asset_hours_calc = float(line_items["asset_hours"])
+            asset_dollars_calc = float(line_items["asset_dollars"])
+            change_hours_calc = float(line_items["change_hours"])
+            change_dollars_calc = float(line_items["change_dollars"])
+            vuln_hours_calc = float(line_items["vuln_hours"])
+            vuln_dollars_calc = float(line_items["vuln_dollars"])
+            report_hours_calc = float(line_items["report_hours"])
+            report_dollars_calc = float(line_items["report_dollars"])
+        
+            # Detailed breakdown with checkboxes IN THE TABLE. Their labels are
+            # hidden but not empty: Streamlit logs a warning with a stack trace for
+            # every empty label on every run.
+            table_timer = metrics.span("checkbox_table").start()
+            st.subheader("📋 Detailed Savings Breakdown")
+        
+            # Create table with checkboxes
+            table_col1, table_col2, table_col3, table_col4 = st.columns([1, 3, 2, 2])
+        
+            with table_col1:
+                st.write("**Include**")
+            with table_col2:
+                st.write("**Automation Item**")
+            with table_col3:
+                st.write("**Hours Saved**")
+            with table_col4:
+                st.write("**$ Saved**")
+        
+            # Row 1: Warranty
+            r1_col1, r1_col2, r1_col3, r1_col4 = st.columns([1, 3, 2, 2])
+            with r1_col1:
+                chk_warranty = st.checkbox("Include Warranty Requests Response Automation",
+                                           value=shared_include.get("warranty", True), key="chk1", label_visibility="collapsed")
+            with r1_col2:
+                st.write("Warranty Requests Response Automation")
+            with r1_col3:
+                st.write(f"{warranty_hours_calc if chk_warranty else 0:,.1f}")
+            with r1_col4:
+                st.write(f"${warranty_dollars_calc if chk_warranty else 0:,.0f}")
+        
+            # Row 2: Licence Spend
+            r2_col1, r2_col2, r2_col3, r2_col4 = st.columns([1, 3, 2, 2])
+            with r2_col1:
+                chk_licence_spend = st.checkbox("Include Enterprise Software Licence Spend Optimisation",
+                                                value=shared_include.get("licence_spend", True), key="chk2", label_visibility="collapsed")
+            with r2_col2:
+                st.write("Enterprise Software Licence Spend Optimisation")
+            with r2_col3:
+                st.write("-")
+            with r2_col4:
+                st.write(f"${licence_spend_savings_calc if chk_licence_spend else 0:,.0f}")
+        
+            # Row 3: Asset
+            r3_col1, r3_col2, r3_col3, r3_col4 = st.columns([1, 3, 2, 2])
+            with r3_col1:
+                chk_asset = st.checkbox("Include Asset Discovery & Inventory",
+                                        value=shared_include.get("asset", True), key="chk3", label_visibility="collapsed")
+            with r3_col2:
+                st.write("Asset Discovery & Inventory")
+            with r3_col3:
+                st.write(f"{asset_hours_calc if chk_asset else 0:,.1f}")
+            with r3_col4:
+                st.write(f"${asset_dollars_calc if chk_asset else 0:,.0f}")
+        
+            # Row 4: Change
+            r4_col1, r4_col2, r4_col3, r4_col4 = st.columns([1, 3, 2, 2])
+            with r4_col1:
+                chk_change = st.checkbox("Include Change Detection & Config Management",
+                                         value=shared_include.get("change", True), key="chk4", label_visibility="collapsed")
+            with r4_col2:
+                st.write("Change Detection & Config Management")
+            with r4_col3:
+                st.write(f"{change_hours_calc if chk_change else 0:,.1f}")
+            with r4_col4:
+                st.write(f"${change_dollars_calc if chk_change else 0:,.0f}")
+        
+            # Row 5: Vuln
+            r5_col1, r5_col2, r5_col3, r5_col4 = st.columns([1, 3, 2, 2])
+            with r5_col1:
+                chk_vuln = st.checkbox("Include Vulnerability Identification",
+                                       value=shared_include.get("vuln", True), key="chk5", label_visibility="collapsed")
+            with r5_col2:
+                st.write("Vulnerability Identification")
+            with r5_col3:
+                st.write(f"{vuln_hours_calc if chk_vuln else 0:,.1f}")
+            with r5_col4:
+                st.write(f"${vuln_dollars_calc if chk_vuln else 0:,.0f}")
+        
+            # Row 6: Reports
+            r6_col1, r6_col2, r6_col3, r6_col4 = st.columns([1, 3, 2, 2])
+            with r6_col1:
+                chk_reports = st.checkbox("Include Report Generation & Distribution",
+                                          value=shared_include.get("report", True), key="chk6", label_visibility="collapsed")
+            with r6_col2:
+                st.write("Report Generation & Distribution")
+            with r6_col3:
+                st.write(f"{report_hours_calc if chk_reports else 0:,.1f}")
+            with r6_col4:
+                st.write(f"${report_dollars_calc if chk_reports else 0:,.0f}")
+            table_timer.stop()
+        
+            st.divider()
+        
+            # Totals, export table and share text for the selected line items
+            include = {
+                "warranty": chk_warranty,
+                "licence_spend": chk_licence_spend,
+                "asset": chk_asset,
+                "change": chk_change,
+                "vuln": chk_vuln,
+                "report": chk_reports,
+            }
+            # Results are kept in the share store under their link, so everyone who
+            # opens the link is served them without recomputing
+            # Imports replace assumptions as well as inputs, so the link carries those too
+            share_token = share_links.encode(inputs, include, profile.name, share_links.assumption_overrides(
+                profile.assumptions, profiles.registry.get(profile.name).assumptions))
+            share_url = share_links.link(share_token, st.context.url)
+            with metrics.span("results"):
+                results = share_links.result_store.get_or_compute(
+                    share_links.store_key(share_url, profile.assumptions),
+                    lambda: summarise_results(line_items, inputs, include, share_url, profile.label)
+                )
+            # Keep the address bar pointing at what is on screen
+            if st.query_params.get(share_links.QUERY_PARAM) != share_token:
+                st.query_params[share_links.QUERY_PARAM] = share_token
+            # One log row per scenario a visitor sees, not one per rerun
+            logged_scenario = (share_token, profile.version)
+            if st.session_state.get("logged_scenario") != logged_scenario:
+                st.session_state.logged_scenario = logged_scenario
+                scenario_log.record(inputs, {**line_items, **results}, profile.name, include)
+            total_hours = results["total_hours"]
+            total_dollars = results["total_dollars"]
+            roi_percentage = results["roi_percentage"]
+            payback_months = results["payback_months"]
+            table = results["table"]
+        
+            # Top-level metrics with TIME-TO-PAYBACK
+            metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
+            with metric_col1:
+                st.metric("Total Annual Savings", f"${total_dollars:,.0f}", delta="vs current state")
+            with metric_col2:
+                st.metric("Annual Investment", f"${sub_cost:,.0f}")
+            with metric_col3:
+                st.metric("ROI", f"{roi_percentage:.0f}%", delta=f"${total_dollars - sub_cost:,.0f} net savings")
+            with metric_col4:
+                if payback_months > 0:
+                    st.metric("⚡ Payback Period", f"{payback_months:.1f} months", delta="Break-even time")
+                else:
+                    st.metric("⚡ Payback Period", "N/A")
+        
+            st.divider()
+        
+            # Summary box with navy blue background
+            st.markdown(f"""
+            <div class="savings-total">
+                <h3>Total Annual Savings: ${total_dollars:,.0f}</h3>
+                <p><strong>Total Hours Saved:</strong> {total_hours:,.0f} hours/year</p>
+                <p><strong>Annual Investment:</strong> ${sub_cost:,}</p>
+                <p><strong>Net Savings:</strong> ${total_dollars - sub_cost:,.0f}</p>
+                <p><strong>Return on Investment:</strong> {roi_percentage:.0f}%</p>
+                <p><strong>⚡ Payback Period:</strong> {payback_months:.1f} months</p>
+            </div>
+            """, unsafe_allow_html=True)
+        
+            # Downloads (each file is only built when its button is clicked)
+            st.write("")
+            download_col1, download_col2, download_col3 = st.columns(3)
+            with download_col1:
+                st.download_button(
+                    "📥 Download CSV",
+                    table.to_csv,
+                    file_name="open_audit_roi_results.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+            # Parquet needs pyarrow; without it the column stays empty
+            if results_table.PARQUET_AVAILABLE:
+                with download_col2:
+                    st.download_button(
+                        "🗃️ Download Parquet",
+                        table.to_parquet,
+                        file_name="open_audit_roi_results.parquet",
+                        mime="application/vnd.apache.parquet",
+                        use_container_width=True
+                    )
+            with download_col3:
+                pdf_summary = {
+                    'total_dollars': total_dollars,
+                    'total_hours': total_hours,
+                    'sub_cost': sub_cost,
+                    'net_savings': total_dollars - sub_cost,
+                    'roi_percentage': roi_percentage,
+                    'payback_months': payback_months,
+                }
+                pdf_inputs = {
+                    'num_employees': num_employees,
+                    'num_devices': num_devices,
+                    'hourly_rate': hourly_rate,
+                }
+                pdf_email = st.session_state.user_email
+                st.download_button(
+                    "📄 Download PDF Report",
+                    lambda: render_pdf(table, pdf_summary, pdf_email, pdf_inputs),
+                    file_name="open_audit_roi_report.pdf",
+                    mime="application/pdf",
+                    use_container_width=True
+                )
+        
+            # Sensitivity analysis over the calculation assumptions
+            with st.expander("📈 Sensitivity Analysis (P5 / P50 / P95)"):
+                st.write("Varies the calculation assumptions over their typical ranges to show how certain these results are.")
+                if st.button("Run Sensitivity Analysis", key="run_sensitivity"):
+                    import pandas as pd
+                    import sensitivity
+                
+                    sensitivity_results = sensitivity.run(inputs, include=include, assumptions=profile.assumptions)
+                    pct = sensitivity_results["percentiles"]
+                    st.dataframe(pd.DataFrame({
+                        'Measure': ['Total Annual Savings', 'Net Savings', 'ROI', 'Payback Period (months)'],
+                        'P5': [f"${pct['total_dollars'][5]:,.0f}", f"${pct['net_savings'][5]:,.0f}",
+                               f"{pct['roi_percentage'][5]:.0f}%", f"{pct['payback_months'][5]:.1f}"],
+                        'P50': [f"${pct['total_dollars'][50]:,.0f}", f"${pct['net_savings'][50]:,.0f}",
+                                f"{pct['roi_percentage'][50]:.0f}%", f"{pct['payback_months'][50]:.1f}"],
+                        'P95': [f"${pct['total_dollars'][95]:,.0f}", f"${pct['net_savings'][95]:,.0f}",
+                                f"{pct['roi_percentage'][95]:.0f}%", f"{pct['payback_months'][95]:.1f}"],
+                    }), hide_index=True, use_container_width=True)
+                    st.caption(f"Based on {sensitivity_results['draws']:,} draws.")
+        
+                    st.markdown("**What drives the ROI** (change in ROI percentage points, P5 → P95 of each assumption)")
+                    tornado_df = pd.DataFrame(sensitivity_results["tornado"]).set_index("assumption")
+                    st.bar_chart(tornado_df[["low", "high"]], horizontal=True, stack=False)
+        
+            # Which input value hits a target ROI, net savings or payback
+            with st.expander("🎯 Goal Seek"):
+                if lean_sessions.opened("Show goal seek", "goal_seek_on"):
+                    with metrics.span("goal_seek"):
+                        import goal_seek
+            
+                        seek_col1, seek_col2, seek_col3 = st.columns(3)
+                        with seek_col1:
+                            seek_field = st.selectbox("Solve For", list(INPUT_LABELS), format_func=INPUT_LABELS.get,
+                                                      key="seek_field")
+                        with seek_col2:
+                            seek_target = st.selectbox("Target", list(GOAL_SEEK_TARGETS),
+                                                       format_func=lambda target: GOAL_SEEK_TARGETS[target][0], key="seek_target")
+                        with seek_col3:
+                            seek_value = st.number_input("Target Value", value=GOAL_SEEK_TARGETS[seek_target][1],
+                                                         key=f"seek_value_{seek_target}")
             
-            if submit_email:
-                if email_input and "@" in email_input and "." in email_input:
-                    st.session_state.email_captured = True
-                    st.session_state.user_email = email_input
-                    st.success(f"✅ Results unlocked for {email_input}")
-                    st.rerun()
+                        solution = goal_seek.solve_scenario(seek_field, seek_target, seek_value, inputs, include,
+                                                            profile.assumptions)
+                        if solution != solution:
+                            st.warning("No non-negative value reaches that target with the other inputs as entered.")
+                        else:
+                            st.success(f"**{INPUT_LABELS[seek_field]}:** {solution:,.2f}")
+                            st.caption("All other inputs and the selected line items stay as they are.")
+        
+            # Where this customer sits relative to break-even over two inputs
+            with st.expander("🗺️ ROI Explorer"):
+                # Off by default: expander contents run on every rerun, even collapsed
+                if st.toggle("Show explorer", key="explorer_on"):
+                    with metrics.span("explorer"):
+                        import heatmap
+                    
+                        axis_fields = list(INPUT_LABELS)
+                        ex_col1, ex_col2, ex_col3 = st.columns(3)
+                        with ex_col1:
+                            x_field = st.selectbox("Horizontal Axis", axis_fields, index=axis_fields.index("num_devices"),
+                                                   format_func=INPUT_LABELS.get, key="explorer_x")
+                        with ex_col2:
+                            y_field = st.selectbox("Vertical Axis", axis_fields, index=axis_fields.index("hourly_rate"),
+                                                   format_func=INPUT_LABELS.get, key="explorer_y")
+                        with ex_col3:
+                            explorer_metric = st.radio("Show", list(heatmap.METRICS), horizontal=True, key="explorer_metric",
+                                                       format_func={"roi_percentage": "ROI", "payback_months": "Payback"}.get)
+                    
+                        # Ranges default to 0 .. 2x the current value; keys follow the field so they reset with it
+                        x_current, y_current = float(inputs[x_field]), float(inputs[y_field])
+                        x_range = st.slider(INPUT_LABELS[x_field], 0.0, max(x_current * 10, 10.0),
+                                            (0.0, max(x_current * 2, 1.0)), key=f"explorer_x_range_{x_field}")
+                        y_range = st.slider(INPUT_LABELS[y_field], 0.0, max(y_current * 10, 10.0),
+                                            (0.0, max(y_current * 2, 1.0)), key=f"explorer_y_range_{y_field}")
+                        resolution = st.select_slider("Resolution", [250, 500, 1000], value=500, key="explorer_resolution")
+                    
+                        if x_field == y_field:
+                            st.warning("Choose two different inputs.")
+                        else:
+                            view = heatmap.grid(x_field, x_range, y_field, y_range, inputs, include,
+                                                cells=(resolution, resolution), assumptions=profile.assumptions)
+                            image = heatmap.mark(heatmap.colorize(view[explorer_metric], explorer_metric),
+                                                 view, x_current, y_current)
+                            st.image(image, use_container_width=True)
+                            st.caption(
+                                f"Left to right: {INPUT_LABELS[x_field]} {view['x'][0]:,.2f} → {view['x'][-1]:,.2f}. "
+                                f"Bottom to top: {INPUT_LABELS[y_field]} {view['y'][0]:,.2f} → {view['y'][-1]:,.2f}. "
+                                "The white cross is this scenario; on the ROI view the black line is break-even."
+                            )
+        
+            # Multi-year TCO for procurement (3- and 5-year cases)
+            with st.expander("📆 Multi-Year Projection (NPV / IRR)"):
+                if lean_sessions.opened("Show projection", "tco_on"):
+                    with metrics.span("tco"):
+                        import pandas as pd
+                        import tco
+            
+                        proj_col1, proj_col2, proj_col3 = st.columns(3)
+                        with proj_col1:
+                            tco_years = st.radio("Projection Years", [3, 5], horizontal=True, key="tco_years")
+                            discount_rate = st.number_input("Discount Rate (%)", min_value=0.0, value=8.0, step=0.5, key="tco_discount")
+                        with proj_col2:
+                            sub_escalation = st.number_input("Subscription Escalation (%/yr)", value=0.0, step=1.0, key="tco_escalation")
+                            rate_inflation = st.number_input("Staff Rate Inflation (%/yr)", value=0.0, step=0.5, key="tco_inflation")
+                        with proj_col3:
+                            device_growth = st.number_input("Device Growth (%/yr)", value=0.0, step=1.0, key="tco_growth")
+                            first_year_share = st.number_input("First-Year Adoption (%)", min_value=0.0, max_value=100.0,
+                                                               value=100.0, step=10.0, key="tco_adoption")
+            
+                        projection = tco.DEFAULT_PROJECTION._replace(
+                            years=tco_years,
+                            discount_rate=discount_rate / 100,
+                            sub_escalation=sub_escalation / 100,
+                            rate_inflation=rate_inflation / 100,
+                            device_growth=device_growth / 100,
+                            ramp={key: (first_year_share / 100, 1.0) for key, _, _, _ in roi_engine.LINE_ITEMS},
+                        )
+                        projected = tco.project_scenario(inputs, projection, profile.assumptions, include=include)
+            
+                        tco_col1, tco_col2, tco_col3, tco_col4 = st.columns(4)
+                        with tco_col1:
+                            st.metric(f"{tco_years}-Year Net Savings", f"${projected['tco_net_savings']:,.0f}")
+                        with tco_col2:
+                            st.metric("NPV", f"${projected['npv']:,.0f}")
+                        with tco_col3:
+                            irr_value = projected["irr"]
+                            st.metric("IRR", "N/A" if irr_value != irr_value else f"{irr_value * 100:,.0f}%")
+                        with tco_col4:
+                            discounted_payback = projected["discounted_payback_months"]
+                            st.metric("Discounted Payback",
+                                      "N/A" if discounted_payback != discounted_payback else f"{discounted_payback:.1f} months")
+            
+                        st.dataframe(pd.DataFrame({
+                            'Year': list(range(1, tco_years + 1)),
+                            'Savings': [f"${value:,.0f}" for value in projected["savings_by_year"]],
+                            'Subscription': [f"${value:,.0f}" for value in projected["subscription_by_year"]],
+                            'Net': [f"${saved - paid:,.0f}" for saved, paid in
+                                    zip(projected["savings_by_year"], projected["subscription_by_year"])],
+                        }), hide_index=True, use_container_width=True)
+        
+            # Several scenarios side by side; an edit recomputes only the line items it feeds
+            with st.expander("⚖️ Compare Scenarios"):
+                # Off by default, like the explorer
+                if st.toggle("Show comparison", key="compare_on"):
+                    with metrics.span("compare"):
+                        import pandas as pd
+                        import scenario_graph
+                    
+                        # The other scenarios start as copies of the sidebar's; the first
+                        # row of the comparison always follows the sidebar. The session
+                        # keeps that one row of numbers, and the editor its edits on top
+                        if "compare_seed" not in st.session_state:
+                            st.session_state.compare_seed = tuple(inputs[field] for field in roi_engine.INPUT_FIELDS)
+                        seed = pd.DataFrame([("Proposed", *st.session_state.compare_seed)],
+                                            columns=["scenario", *roi_engine.INPUT_FIELDS])
+                        column_config = {field: st.column_config.NumberColumn(INPUT_LABELS[field], min_value=0.0)
+                                         for field in roi_engine.INPUT_FIELDS}
+                        column_config["scenario"] = st.column_config.TextColumn("Scenario")
+                        edited = st.data_editor(seed, num_rows="dynamic", hide_index=True,
+                                                column_config=column_config, key="compare_editor")
+                        if len(edited) >= MAX_COMPARED_SCENARIOS:
+                            st.warning(f"Only the first {MAX_COMPARED_SCENARIOS - 1} scenarios are compared.")
+                            edited = edited.head(MAX_COMPARED_SCENARIOS - 1)
+                        # New rows start empty; blank cells take the sidebar's value
+                        edited = edited.fillna({field: inputs[field] for field in roi_engine.INPUT_FIELDS})
+                        scenarios = [inputs] + edited[list(roi_engine.INPUT_FIELDS)].to_dict("records")
+                        names = ["Current"] + [
+                            str(name) if name == name and str(name).strip() else f"Scenario {row}"
+                            for row, name in enumerate(edited["scenario"], start=2)
+                        ]
+                    
+                        # Kept across reruns, so only the edited cells and what depends on them are recomputed
+                        graph = st.session_state.get("scenario_graph")
+                        if graph is None or len(graph) != len(scenarios):
+                            graph = st.session_state.scenario_graph = scenario_graph.ScenarioGraph(
+                                scenarios, profile.assumptions, include)
+                        else:
+                            for row, scenario in enumerate(scenarios):
+                                graph.update(row, scenario)
+                            graph.set_assumptions(profile.assumptions)
+                            graph.set_include(include)
+                        compared = graph.results()
+                    
+                        st.dataframe(pd.DataFrame({
+                            'Scenario': names,
+                            'Hours Saved': [f"{value:,.0f}" for value in compared["total_hours"]],
+                            'Total Savings': [f"${value:,.0f}" for value in compared["total_dollars"]],
+                            'Net Savings': [f"${value:,.0f}" for value in compared["net_savings"]],
+                            'ROI': [f"{value:,.0f}%" for value in compared["roi_percentage"]],
+                            'Payback': [f"{value:.1f} months" for value in compared["payback_months"]],
+                        }), hide_index=True, use_container_width=True)
+                        st.caption("All scenarios use the selected profile and line items.")
                 else:
-                    st.error("Please enter a valid email address")
-        
-        st.markdown("---")
-        st.info("💡 **Why we ask:** We'll send you a detailed PDF report and can connect you with an Open-AudIT specialist.")
-        st.stop()
-    
-    # NOW show results (only after email captured)
-    st.success(f"📊 Results for: {st.session_state.user_email}")
-    
-    # Calculate all values first
-    warranty_hours_calc = licence_requests * licence_hours * SAVING_PCT_LICENSE
-    warranty_dollars_calc = warranty_hours_calc * hourly_rate
-    
-    licence_spend_savings_calc = licence_spend * LICENCE_SPEND_REDUCTION_PCT
-    
-    asset_hours_calc = ((num_devices * MIN_PER_DEVICE_DISCOVERY / 60.0) + 
-                   (reports_per_year * HOURS_PER_ASSET_REPORT)) * SAVING_PCT_ASSET
-    asset_dollars_calc = asset_hours_calc * hourly_rate
-    
-    critical_devices = num_devices * CRITICAL_DEVICE_PCT
-    change_hours_calc = critical_devices * checks_per_year * ((MIN_PER_CHECK_MANUAL - MIN_PER_CHECK_AUTOMATED) / 60.0)
-    change_hours_calc = max(0, change_hours_calc)
-    change_dollars_calc = change_hours_calc * hourly_rate
-    
-    vuln_hours_calc = num_devices * MIN_PER_DEVICE_VULN_PER_YEAR / 60.0
-    vuln_dollars_calc = vuln_hours_calc * hourly_rate
-    
-    report_hours_calc = reports_per_year * 312
-    report_dollars_calc = report_hours_calc * hourly_rate
-    
-    # Display Results
-    st.header("💡 Your ROI Results")
-    
-    # Detailed breakdown with checkboxes IN THE TABLE
-    st.subheader("📋 Detailed Savings Breakdown")
-    
-    # Create table with checkboxes
-    table_col1, table_col2, table_col3, table_col4 = st.columns([1, 3, 2, 2])
-    
-    with table_col1:
-        st.write("**Include**")
-    with table_col2:
-        st.write("**Automation Item**")
-    with table_col3:
-        st.write("**Hours Saved**")
-    with table_col4:
-        st.write("**$ Saved**")
-    
-    # Row 1: Warranty
-    r1_col1, r1_col2, r1_col3, r1_col4 = st.columns([1, 3, 2, 2])
-    with r1_col1:
-        chk_warranty = st.checkbox("", value=True, key="chk1", label_visibility="collapsed")
-    with r1_col2:
-        st.write("Warranty Requests Response Automation")
-    with r1_col3:
-        st.write(f"{warranty_hours_calc if chk_warranty else 0:,.1f}")
-    with r1_col4:
-        st.write(f"${warranty_dollars_calc if chk_warranty else 0:,.0f}")
-    
-    # Row 2: Licence Spend
-    r2_col1, r2_col2, r2_col3, r2_col4 = st.columns([1, 3, 2, 2])
-    with r2_col1:
-        chk_licence_spend = st.checkbox("", value=True, key="chk2", label_visibility="collapsed")
-    with r2_col2:
-        st.write("Enterprise Software Licence Spend Optimisation")
-    with r2_col3:
-        st.write("-")
-    with r2_col4:
-        st.write(f"${licence_spend_savings_calc if chk_licence_spend else 0:,.0f}")
-    
-    # Row 3: Asset
-    r3_col1, r3_col2, r3_col3, r3_col4 = st.columns([1, 3, 2, 2])
-    with r3_col1:
-        chk_asset = st.checkbox("", value=True, key="chk3", label_visibility="collapsed")
-    with r3_col2:
-        st.write("Asset Discovery & Inventory")
-    with r3_col3:
-        st.write(f"{asset_hours_calc if chk_asset else 0:,.1f}")
-    with r3_col4:
-        st.write(f"${asset_dollars_calc if chk_asset else 0:,.0f}")
-    
-    # Row 4: Change
-    r4_col1, r4_col2, r4_col3, r4_col4 = st.columns([1, 3, 2, 2])
-    with r4_col1:
-        chk_change = st.checkbox("", value=True, key="chk4", label_visibility="collapsed")
-    with r4_col2:
-        st.write("Change Detection & Config Management")
-    with r4_col3:
-        st.write(f"{change_hours_calc if chk_change else 0:,.1f}")
-    with r4_col4:
-        st.write(f"${change_dollars_calc if chk_change else 0:,.0f}")
-    
-    # Row 5: Vuln
-    r5_col1, r5_col2, r5_col3, r5_col4 = st.columns([1, 3, 2, 2])
-    with r5_col1:
-        chk_vuln = st.checkbox("", value=True, key="chk5", label_visibility="collapsed")
-    with r5_col2:
-        st.write("Vulnerability Identification")
-    with r5_col3:
-        st.write(f"{vuln_hours_calc if chk_vuln else 0:,.1f}")
-    with r5_col4:
-        st.write(f"${vuln_dollars_calc if chk_vuln else 0:,.0f}")
-    
-    # Row 6: Reports
-    r6_col1, r6_col2, r6_col3, r6_col4 = st.columns([1, 3, 2, 2])
-    with r6_col1:
-        chk_reports = st.checkbox("", value=True, key="chk6", label_visibility="collapsed")
-    with r6_col2:
-        st.write("Report Generation & Distribution")
-    with r6_col3:
-        st.write(f"{report_hours_calc if chk_reports else 0:,.1f}")
-    with r6_col4:
-        st.write(f"${report_dollars_calc if chk_reports else 0:,.0f}")
-    
-    st.divider()
-    
-    # Calculate totals based on checked items
-    warranty_hours = warranty_hours_calc if chk_warranty else 0
-    warranty_dollars = warranty_dollars_calc if chk_warranty else 0
-    licence_spend_savings = licence_spend_savings_calc if chk_licence_spend else 0
-    asset_hours = asset_hours_calc if chk_asset else 0
-    asset_dollars = asset_dollars_calc if chk_asset else 0
-    change_hours = change_hours_calc if chk_change else 0
-    change_dollars = change_dollars_calc if chk_change else 0
-    vuln_hours = vuln_hours_calc if chk_vuln else 0
-    vuln_dollars = vuln_dollars_calc if chk_vuln else 0
-    report_hours = report_hours_calc if chk_reports else 0
-    report_dollars = report_dollars_calc if chk_reports else 0
-    
-    total_hours = warranty_hours + asset_hours + change_hours + vuln_hours + report_hours
-    total_dollars = warranty_dollars + licence_spend_savings + asset_dollars + change_dollars + vuln_dollars + report_dollars
-    roi_percentage = ((total_dollars - sub_cost) / sub_cost * 100) if sub_cost > 0 else 0
-    
-    # Calculate Time-to-Payback (in months)
-    monthly_savings = total_dollars / 12 if total_dollars > 0 else 0
-    payback_months = (sub_cost / monthly_savings) if monthly_savings > 0 else 0
-    
-    # Top-level metrics with TIME-TO-PAYBACK
-    metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
-    with metric_col1:
-        st.metric("Total Annual Savings", f"${total_dollars:,.0f}", delta="vs current state")
-    with metric_col2:
-        st.metric("Annual Investment", f"${sub_cost:,.0f}")
-    with metric_col3:
-        st.metric("ROI", f"{roi_percentage:.0f}%", delta=f"${total_dollars - sub_cost:,.0f} net savings")
-    with metric_col4:
-        if payback_months > 0:
-            st.metric("⚡ Payback Period", f"{payback_months:.1f} months", delta="Break-even time")
-        else:
-            st.metric("⚡ Payback Period", "N/A")
-    
-    st.divider()
-    
-    # Create DataFrame for CSV/PDF export
-    results_data = {
-        'Automation Item': [
-            'Warranty Requests Response Automation',
-            'Enterprise Software Licence Spend Optimisation',
-            'Asset Discovery & Inventory',
-            'Change Detection & Config Management',
-            'Vulnerability Identification',
-            'Report Generation & Distribution'
-        ],
-        'Hours Saved': [
-            f"{warranty_hours:,.1f}",
-            '-',
-            f"{asset_hours:,.1f}",
-            f"{change_hours:,.1f}",
-            f"{vuln_hours:,.1f}",
-            f"{report_hours:,.1f}"
-        ],
-        '$ Saved': [
-            f"${warranty_dollars:,.0f}",
-            f"${licence_spend_savings:,.0f}",
-            f"${asset_dollars:,.0f}",
-            f"${change_dollars:,.0f}",
-            f"${vuln_dollars:,.0f}",
-            f"${report_dollars:,.0f}"
-        ]
-    }
-    
-    df = pd.DataFrame(results_data)
-    
-    # Summary box with navy blue background
-    st.markdown(f"""
-    <div class="savings-total">
-        <h3>Total Annual Savings: ${total_dollars:,.0f}</h3>
-        <p><strong>Total Hours Saved:</strong> {total_hours:,.0f} hours/year</p>
-        <p><strong>Annual Investment:</strong> ${sub_cost:,}</p>
-        <p><strong>Net Savings:</strong> ${total_dollars - sub_cost:,.0f}</p>
-        <p><strong>Return on Investment:</strong> {roi_percentage:.0f}%</p>
-        <p><strong>⚡ Payback Period:</strong> {payback_months:.1f} months</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    st.divider()
-    
-    # Share Results Section
-    st.subheader("📤 Share These Results")
-    
-    # Generate shareable summary
-    share_text = f"""Open-AudIT ROI Analysis Results:
-    
-📊 Total Annual Savings: ${total_dollars:,.0f}
-💰 Annual Investment: ${sub_cost:,.0f}
-📈 ROI: {roi_percentage:.0f}%
-⚡ Payback Period: {payback_months:.1f} months
-💼 Net Savings: ${total_dollars - sub_cost:,.0f}
+                    lean_sessions.discard("scenario_graph", "compare_seed")
+        
+            st.divider()
+        
+            # Share Results Section
+            share_section_timer = metrics.span("share_section").start()
+            st.subheader("📤 Share These Results")
+        
+            col1, col2 = st.columns(2)
+            with col1:
+                if lean_sessions.ENABLED:
+                    # Not a widget, so the text is not kept in the session
+                    st.markdown("**Copy & Share with Your Team:**")
+                    st.code(results["share_text"], language=None, wrap_lines=True)
+                else:
+                    # No key, so the box follows the link when the selection changes
+                    st.text_area("Copy & Share with Your Team:", results["share_text"], height=250)
+            with col2:
+                st.markdown(f"""
+                ### 📧 Your Results
+                **Email:** {st.session_state.user_email}
+            
+                ### 📋 Next Steps:
+            
+                1. **Copy the results** from the box on the left
+                2. **Share with your CFO** and buying committee
+                3. **Book a demo** to see Open-AudIT in action
+            
+                ### 🤝 Ready to Learn More?
+            
+                See how Open-AudIT can deliver these savings for your organization.
+            
+                """)
+            
+                if st.button("📅 Book a 15-Minute Demo", type="primary", use_container_width=True):
+                    lead_store.record("demo_request", st.session_state.user_email, {
+                        **inputs,
+                        "total_dollars": total_dollars,
+                        "roi_percentage": roi_percentage,
+                        "payback_months": payback_months,
+                    })
+                    st.success("✅ Demo request received! We'll contact you at " + st.session_state.user_email)
+            share_section_timer.stop()
+        finally:
+            fragment_timer.stop()
 
-Based on:
-• {num_employees:,} Employees
-• {num_devices:,} IT Devices
-• ${hourly_rate:.2f}/hr IT Staff Rate
 
-Calculate your own ROI: [Your Streamlit URL]
-"""
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        st.text_area("Copy & Share with Your Team:", share_text, height=250, key="share_box")
-    with col2:
-        st.markdown(f"""
-        ### 📧 Your Results
-        **Email:** {st.session_state.user_email}
+    # Calculations
+    if st.session_state.show_calculations:
         
-        ### 📋 Next Steps:
+        # Sidebar values, used for the lead record and the calculations
+        inputs = {
+            "num_employees": num_employees,
+            "num_devices": num_devices,
+            "hourly_rate": hourly_rate,
+            "licence_requests": licence_requests,
+            "licence_hours": licence_hours,
+            "licence_spend": licence_spend,
+            "reports_per_year": reports_per_year,
+            "checks_per_year": checks_per_year,
+            "sub_cost": sub_cost,
+        }
         
-        1. **Copy the results** from the box on the left
-        2. **Share with your CFO** and buying committee
-        3. **Book a demo** to see Open-AudIT in action
+        # Lead Capture Gate - Show BEFORE calculations
+        if not st.session_state.email_captured:
+            gate_timer = metrics.span("email_gate").start()
+            st.markdown("---")
+            st.markdown("## 🔒 Get Your Personalized ROI Report")
+            st.write("Enter your email to see your results and receive a detailed analysis.")
+            
+            with st.form("email_form"):
+                email_input = st.text_input("Work Email Address", placeholder="you@company.com")
+                submit_email = st.form_submit_button("Show My Results", type="primary", use_container_width=True)
+                
+                if submit_email:
+                    if email_input and "@" in email_input and "." in email_input:
+                        st.session_state.email_captured = True
+                        st.session_state.user_email = email_input
+                        # Queued for a background writer; never waits on disk
+                        lead_store.record("lead", email_input, inputs)
+                        st.success(f"✅ Results unlocked for {email_input}")
+                        gate_timer.stop()
+                        st.rerun()
+                    else:
+                        st.error("Please enter a valid email address")
+            
+            st.markdown("---")
+            st.info("💡 **Why we ask:** We'll send you a detailed PDF report and can connect you with an Open-AudIT specialist.")
+            gate_timer.stop()
+            st.stop()
+        
+        # NOW show results (only after email captured)
+        st.success(f"📊 Results for: {st.session_state.user_email}")
         
-        ### 🤝 Ready to Learn More?
+        # Calculate all values first (shared across sessions with the same inputs)
+        with metrics.span("calculations"):
+            line_items = result_cache.shared_cache.get_or_compute(
+                # Keyed only on what the line items read, so sub_cost and
+                # num_employees changes reuse the entry
+                result_cache.make_key("line_items", {name: inputs[name] for name in roi_engine.LINE_ITEM_INPUTS},
+                                      assumptions=profile.assumptions),
+                lambda: roi_engine.calculate_line_items(
+                    num_devices, hourly_rate, licence_requests, licence_hours,
+                    licence_spend, reports_per_year, checks_per_year,
+                    assumptions=profile.assumptions
+                )
+            )
         
-        See how Open-AudIT can deliver these savings for your organization.
+        # Display Results
+        st.header("💡 Your ROI Results")
         
-        """)
+        results_breakdown(line_items, inputs, shared_include, profile)
+
+    else:
+        # Instructions when calculator hasn't been run
+        st.info("👈 Enter your IT environment details in the sidebar and click 'Calculate ROI' to see your results.")
         
-        if st.button("📅 Book a 15-Minute Demo", type="primary", use_container_width=True):
-            st.success("✅ Demo request received! We'll contact you at " + st.session_state.user_email)
+        with st.expander("ℹ️ How to Use This Calculator"):
+            st.markdown("""
+            ### Instructions
+            
+            1. **Enter Your IT Environment Details** in the sidebar:
+               - Number of employees and IT devices
+               - Average hourly rate for IT staff
+               
+            2. **Describe Your Current Processes**:
+               - How many warranty/licence requests you handle annually
+               - Time spent per request
+               - Current licence spending
+               - Frequency of reports and config checks
+               
+            3. **Enter Your Investment**:
+               - Annual Open-AudIT subscription cost
+               
+            4. **Click 'Calculate ROI'** to see your results
+            
+            5. **Select which automation items to include** using the checkboxes
+            
+            6. **Download** your results as CSV or a formatted PDF report
+            
+            ### What This Calculator Shows You
+            
+            This calculator quantifies the time and cost savings from automating key IT operations tasks:
+            - **Warranty & Licence Management**: Reduced manual processing time
+            - **Software Licence Optimisation**: Eliminated overspending on unused licences
+            - **Asset Discovery**: Automated inventory management
+            - **Change Detection**: Streamlined configuration monitoring
+            - **Vulnerability Management**: Faster identification and remediation
+            - **Report Generation**: Automated compliance and audit reporting
+            """)
 
-else:
-    # Instructions when calculator hasn't been run
-    st.info("👈 Enter your IT environment details in the sidebar and click 'Calculate ROI' to see your results.")
-    
-    with st.expander("ℹ️ How to Use This Calculator"):
-        st.markdown("""
-        ### Instructions
-        
-        1. **Enter Your IT Environment Details** in the sidebar:
-           - Number of employees and IT devices
-           - Average hourly rate for IT staff
-           
-        2. **Describe Your Current Processes**:
-           - How many warranty/licence requests you handle annually
-           - Time spent per request
-           - Current licence spending
-           - Frequency of reports and config checks
-           
-        3. **Enter Your Investment**:
-           - Annual Open-AudIT subscription cost
-           
-        4. **Click 'Calculate ROI'** to see your results
-        
-        5. **Select which automation items to include** using the checkboxes
-        
-        6. **Download** your results as CSV or a formatted PDF report
-        
-        ### What This Calculator Shows You
-        
-        This calculator quantifies the time and cost savings from automating key IT operations tasks:
-        - **Warranty & Licence Management**: Reduced manual processing time
-        - **Software Licence Optimisation**: Eliminated overspending on unused licences
-        - **Asset Discovery**: Automated inventory management
-        - **Change Detection**: Streamlined configuration monitoring
-        - **Vulnerability Management**: Faster identification and remediation
-        - **Report Generation**: Automated compliance and audit reporting
-        """)
+    # Footer
+    st.divider()
+    st.markdown("""
+        <div style='text-align: center; color: #666; padding: 20px;'>
+            <p>Questions about Open-AudIT? Contact us at sales@firstwave.com</p>
+            <p style='font-size: 0.8rem;'>© 2025 FirstWave. All calculations are estimates based on industry averages.</p>
+        </div>
+    """, unsafe_allow_html=True)
 
-# Footer
-st.divider()
-st.markdown("""
-    <div style='text-align: center; color: #666; padding: 20px;'>
-        <p>Questions about Open-AudIT? Contact us at sales@firstwave.com</p>
-        <p style='font-size: 0.8rem;'>© 2025 FirstWave. All calculations are estimates based on industry averages.</p>
-    </div>
-""", unsafe_allow_html=True)
+finally:
+    rerun_timer.stop()
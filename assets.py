@@ -0,0 +1,120 @@
+"""Static page assets, loaded once per process.
+
+Streamlit re-executes app.py on every interaction, but imported modules are
+kept, so anything read from disk here is read once and shared by all
+sessions.
+"""
+import os
+from functools import lru_cache
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+
+LOGO_PATH = os.path.join(ASSET_DIR, "firstwave_logo.png")
+
+# Custom CSS with navy blue theme
+PAGE_CSS = """
+    <style>
+    .main-header {
+        font-size: 4rem;
+        color: #1f4788;
+        font-weight: bold;
+        margin-bottom: 1rem;
+        line-height: 1.2;
+    }
+    .sub-header {
+        font-size: 1.5rem;
+        color: #666;
+        margin-bottom: 2rem;
+    }
+    .savings-total {
+        background-color: #4a6fa5;
+        padding: 20px;
+        border-radius: 10px;
+        border: 2px solid #2c4a7c;
+        color: white;
+    }
+    .savings-total h3 {
+        color: white;
+    }
+    .savings-total p {
+        color: white;
+    }
+    /* Increase sidebar font sizes */
+    [data-testid="stSidebar"] label {
+        font-size: 18px !important;
+        font-weight: 700 !important;
+    }
+    [data-testid="stSidebar"] input {
+        font-size: 16px !important;
+    }
+    [data-testid="stSidebar"] .stNumberInput label {
+        font-size: 18px !important;
+        font-weight: 700 !important;
+    }
+    [data-testid="stSidebar"] div[data-baseweb="input"] label {
+        font-weight: 700 !important;
+        font-size: 18px !important;
+    }
+    /* Reduce sidebar spacing */
+    [data-testid="stSidebar"] .stNumberInput {
+        margin-bottom: 0rem !important;
+        margin-top: 0rem !important;
+    }
+    [data-testid="stSidebar"] [data-testid="stMarkdownContainer"] {
+        margin-bottom: 0.05rem !important;
+        margin-top: 0.05rem !important;
+    }
+    [data-testid="stSidebar"] hr {
+        margin-top: 0.2rem !important;
+        margin-bottom: 0.2rem !important;
+    }
+    [data-testid="stSidebar"] h2 {
+        margin-top: 0.2rem !important;
+        margin-bottom: 0.2rem !important;
+        font-size: 1.1rem !important;
+    }
+    /* Reduce caption spacing */
+    [data-testid="stSidebar"] .stCaption {
+        margin-top: 0 !important;
+        margin-bottom: 0 !important;
+    }
+    /* Tighter button spacing */
+    [data-testid="stSidebar"] .stButton {
+        margin-top: 0.3rem !important;
+    }
+    /* Reduce overall sidebar padding */
+    [data-testid="stSidebar"] > div:first-child {
+        padding-top: 0.5rem !important;
+    }
+    /* Make all input boxes same width */
+    [data-testid="stSidebar"] input[type="number"] {
+        width: 100% !important;
+    }
+    [data-testid="stSidebar"] div[data-baseweb="input"] {
+        width: 100% !important;
+    }
+    /* Green clear button */
+    .stButton button[kind="secondary"] {
+        background-color: #28a745 !important;
+        color: white !important;
+    }
+    .stButton button[kind="secondary"]:hover {
+        background-color: #218838 !important;
+    }
+    /* Hero section spacing */
+    .hero-section {
+        padding: 2rem 0;
+        margin-bottom: 2rem;
+    }
+    </style>
+"""
+
+
+@lru_cache(maxsize=None)
+def logo_bytes():
+    """Logo image bytes, or None when the file is not deployed."""
+    try:
+        with open(LOGO_PATH, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
@@ -0,0 +1,334 @@
+"""Benchmarks for the ROI engine, page reruns, exports, PDF rendering, device imports and analytics.
+
+Usage:
+    python benchmarks/run_benchmarks.py                   # compare with baseline.json
+    python benchmarks/run_benchmarks.py --update-baseline # record a new baseline
+    python benchmarks/run_benchmarks.py --only engine pdf
+
+Each benchmark reports the median seconds per operation over several
+repeats. A fixed reference workload runs before and after the suites, and
+every time is compared with its baseline relative to the reference, so a
+machine that is busier or slower overall than when the baseline was
+recorded does not show up as a regression. A benchmark fails when it is
+slower than its baseline by more than --threshold (default 25%), or by more
+than --fast-threshold (default 50%) for benchmarks that take under a
+millisecond, whose times are the noisiest; the script then exits with
+status 1. Baselines are machine-specific, so record them on the machine
+that runs the check.
+
+rerun.checkbox_toggle drives a local server through session_loadtest.py,
+so the line item checkbox reruns only its fragment as it does in a
+browser; streamlit's AppTest always reruns the whole script.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+BATCH_ROWS = 1_000_000
+
+DEVICE_ROWS = 200_000
+
+# Machine speed, measured alongside the suites; compare() scales by it
+REFERENCE = "reference.cpu"
+
+# Benchmarks faster than this get --fast-threshold
+FAST_SECONDS = 1e-3
+
+
+def measure(func, repeats=7, number=1, setup=None):
+    """Median seconds per call of ``func`` over ``repeats`` timed runs.
+
+    One untimed warm-up run comes first. The median is not thrown by one
+    run that a background task slowed down, as a single timing is.
+    """
+    samples = []
+    for i in range(repeats + 1):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        for _ in range(number):
+            func(state) if setup else func()
+        if i:
+            samples.append((time.perf_counter() - start) / number)
+    return statistics.median(samples)
+
+
+def reference_workload():
+    """Fixed interpreter and numpy work that no change to this repo affects."""
+    import numpy as np
+
+    total = 0
+    for i in range(100_000):
+        total += i * i % 7
+    values = np.arange(500_000, dtype=np.float64)[::-1] * 1.0001
+    np.sort(values)
+    return total
+
+
+def bench_engine():
+    import numpy as np
+    import roi_engine
+    import scenario_graph
+
+    rng = np.random.default_rng(0)
+    columns = {field: rng.uniform(0, 100_000, BATCH_ROWS) for field in roi_engine.INPUT_FIELDS}
+    # One edit on the comparison page: a changed rate in one of ten scenarios
+    graph = scenario_graph.ScenarioGraph([roi_engine.DEFAULT_INPUTS] * 10)
+    rates = iter(range(10**9))
+
+    def compare_edit():
+        graph.set(3, "hourly_rate", next(rates) % 100 + 1)
+        graph.results()
+
+    return {
+        "engine.scalar_scenario": measure(lambda: roi_engine.calculate_scenario(roi_engine.DEFAULT_INPUTS), number=2000, repeats=15),
+        "engine.batch_1m_rows": measure(lambda: roi_engine.calculate(columns), repeats=5),
+        "engine.compare_edit": measure(compare_edit, number=2000, repeats=15),
+    }
+
+
+def _app_test():
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+
+
+def _fresh_cache():
+    import result_cache
+    import share_links
+    result_cache.shared_cache.clear()
+    share_links.result_store.clear()
+
+
+def bench_reruns():
+    # Streamlit logs a warning per rerun in the harness; keep the output readable
+    logging.disable(logging.WARNING)
+    os.environ.setdefault("ROI_LEADS_DB", os.path.join(tempfile.mkdtemp(), "bench_leads.db"))
+
+    def first_load_setup():
+        _fresh_cache()
+        return _app_test()
+
+    def calculate_setup():
+        _fresh_cache()
+        return _app_test().run()
+
+    def email_setup():
+        _fresh_cache()
+        at = _app_test().run()
+        at.sidebar.button[0].click().run()
+        at.text_input[0].input("bench@example.com")
+        return at
+
+    return {
+        "rerun.first_load": measure(lambda at: at.run(), repeats=9, setup=first_load_setup),
+        "rerun.calculate_roi": measure(lambda at: at.sidebar.button[0].click().run(), repeats=9, setup=calculate_setup),
+        "rerun.email_submit": measure(lambda at: at.button[0].click().run(), repeats=9, setup=email_setup),
+        "rerun.checkbox_toggle": _fragment_toggle(repeats=25),
+    }
+
+
+def _fragment_toggle(repeats):
+    """Median seconds for a line item checkbox toggle, a fragment rerun, on a local server."""
+    import asyncio
+    import session_loadtest
+
+    async def toggle(stream_url):
+        session = session_loadtest.SimulatedSession(stream_url)
+        await session.connect()
+        try:
+            # Through the email gate to the results, then the first line item off and on
+            await session.run_flow(0)
+            checkbox = session.find("checkbox", key="chk1")
+            samples = []
+            for i in range(repeats + 1):
+                session.set_value(checkbox, i % 2 == 0)
+                seconds = await session.rerun(fragment_key=checkbox)
+                if i:
+                    samples.append(seconds)
+            return statistics.median(samples)
+        finally:
+            await session.close()
+
+    with session_loadtest.spawned_server() as (stream_url, _):
+        return asyncio.run(toggle(stream_url))
+
+
+def _scenario():
+    import roi_engine
+    results = roi_engine.calculate_scenario(roi_engine.DEFAULT_INPUTS)
+    results["sub_cost"] = float(roi_engine.DEFAULT_INPUTS["sub_cost"])
+    return results
+
+
+def bench_export():
+    import results_table
+
+    results = _scenario()
+    table = results_table.from_scenario(results)
+    return {
+        "export.results_table": measure(lambda: results_table.from_scenario(results), number=200),
+        "export.csv": measure(table.to_csv, number=200),
+        "export.parquet": measure(table.to_parquet, number=200),
+        "export.display_rows": measure(table.display_rows, number=200),
+    }
+
+
+def bench_pdf():
+    import pdf_report
+    import results_table
+    import roi_engine
+
+    results = _scenario()
+    table = results_table.from_scenario(results)
+    pdf_report.build_pdf(table, results)  # build the per-process static parts first
+    return {
+        "pdf.build_report": measure(
+            lambda: pdf_report.build_pdf(table, results, email="bench@example.com", inputs=roi_engine.DEFAULT_INPUTS),
+            number=10),
+    }
+
+
+def bench_devices():
+    import io
+    import json
+    import device_import
+
+    types = ("computer", "router", "switch", "printer", "firewall")
+    classes = ("desktop", "laptop", "server", "virtual server")
+    rows = [(types[i % 5], classes[i % 4], "retired" if i % 10 == 0 else "production") for i in range(DEVICE_ROWS)]
+    csv_data = ("type,class,status\n" + "".join(f"{t},{c},{s}\n" for t, c, s in rows)).encode()
+    json_data = json.dumps({"data": [{"type": "devices", "attributes": {"type": t, "class": c, "status": s}}
+                                     for t, c, s in rows]}).encode()
+    return {
+        "devices.csv_200k_rows": measure(lambda: device_import.summarise(io.BytesIO(csv_data), "devices.csv"), repeats=5),
+        "devices.json_200k_rows": measure(lambda: device_import.summarise(io.BytesIO(json_data), "devices.json"), repeats=5),
+    }
+
+
+def bench_analytics():
+    import numpy as np
+    import roi_engine
+    import scenario_log
+
+    rng = np.random.default_rng(0)
+    columns = {field: rng.uniform(0, 100_000, BATCH_ROWS) for field in roi_engine.INPUT_FIELDS}
+    columns.update(roi_engine.calculate(columns))
+    columns["profile"] = rng.choice(["default", "healthcare", "msp", "education", "finance"], BATCH_ROWS)
+    rollup = scenario_log.Rollup()
+    rollup.add_rows(columns)
+    return {
+        "analytics.rollup_1m_rows": measure(lambda: scenario_log.Rollup().add_rows(columns), repeats=3),
+        "analytics.median_query": measure(lambda: rollup.quantile("roi_percentage", 0.5, "5k-20k", "msp"), number=200),
+    }
+
+
+SUITES = {
+    "engine": bench_engine,
+    "reruns": bench_reruns,
+    "export": bench_export,
+    "pdf": bench_pdf,
+    "devices": bench_devices,
+    "analytics": bench_analytics,
+}
+
+
+def compare(results, baseline, threshold, fast_threshold=None):
+    """Return (rows, regressions) comparing results with the baseline.
+
+    A change is measured relative to REFERENCE when both sides have it.
+    Benchmarks whose baseline is under FAST_SECONDS may slow down by
+    ``fast_threshold`` (default: the same as ``threshold``).
+    """
+    fast_threshold = threshold if fast_threshold is None else max(threshold, fast_threshold)
+    scale = 1.0
+    if results.get(REFERENCE) and baseline.get(REFERENCE):
+        scale = baseline[REFERENCE] / results[REFERENCE]
+    rows = []
+    regressions = []
+    for name, seconds in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, seconds, None, None, "new"))
+            continue
+        if name == REFERENCE:
+            rows.append((name, seconds, base, seconds / base - 1, "reference"))
+            continue
+        change = seconds * scale / base - 1
+        allowed = fast_threshold if base < FAST_SECONDS else threshold
+        status = "REGRESSED" if change > allowed else "ok"
+        if status == "REGRESSED":
+            regressions.append(name)
+        rows.append((name, seconds, base, change, status))
+    return rows, regressions
+
+
+def _format_seconds(seconds):
+    if seconds is None:
+        return "-"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:9.1f} us"
+    return f"{seconds * 1e3:9.2f} ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the ROI calculator benchmarks.")
+    parser.add_argument("--only", nargs="+", choices=sorted(SUITES), help="run only these suites")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs baseline (default 0.25)")
+    parser.add_argument("--fast-threshold", type=float, default=0.5,
+                        help=f"allowed slowdown for benchmarks under {FAST_SECONDS * 1e3:g} ms (default 0.5)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    # Before and after the suites, so a change in machine load during the run shows in it
+    reference = [measure(reference_workload, repeats=9)]
+    results = {}
+    for name in args.only or SUITES:
+        results.update(SUITES[name]())
+    reference.append(measure(reference_workload, repeats=9))
+    results[REFERENCE] = statistics.mean(reference)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    rows, regressions = compare(results, baseline, args.threshold, args.fast_threshold)
+    print(f"{'benchmark':<28} {'current':>12} {'baseline':>12} {'change':>8}  status")
+    for name, seconds, base, change, status in rows:
+        change_text = f"{change:+.0%}" if change is not None else "-"
+        print(f"{name:<28} {_format_seconds(seconds):>12} {_format_seconds(base):>12} {change_text:>8}  {status}")
+
+    if args.update_baseline:
+        # Benchmarks the suites that ran no longer have are dropped, not kept forever
+        prefixes = {name.split(".")[0] for name in results}
+        # Kept times are rescaled to the new reference, so every entry is relative to the same one
+        rescale = results[REFERENCE] / baseline[REFERENCE] if baseline.get(REFERENCE) else 1.0
+        baseline = {name: seconds * rescale for name, seconds in baseline.items()
+                    if name.split(".")[0] not in prefixes}
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(dict(sorted(baseline.items())), f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%} "
+              f"({max(args.threshold, args.fast_threshold):.0%} under {FAST_SECONDS * 1e3:g} ms): "
+              f"{', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
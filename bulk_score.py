@@ -0,0 +1,224 @@
+"""Bulk-score a CSV or Parquet file of customer environments.
+
+Usage:
+    python bulk_score.py prospects.csv scored.parquet --chunk-size 500000 --workers 8
+    python bulk_score.py prospects.csv scored.csv --years 3 5 --discount-rate 0.08
+    python bulk_score.py devices_only.csv scored.csv --defaults
+
+The input needs the same fields as the sidebar (num_devices, hourly_rate,
+licence_requests, licence_hours, licence_spend, reports_per_year,
+checks_per_year, sub_cost). A missing column is an error, so a misspelt
+header is not silently scored with made-up numbers; with --defaults missing
+columns take the sidebar defaults instead. Every input column is passed through and the line items, totals,
+ROI %, net savings and payback months are appended. With --years, the
+multi-year TCO columns from tco.py (NPV, IRR, discounted payback, ...) are
+appended once per horizon with a "_<years>y" suffix, e.g. npv_3y.
+
+The file is read in fixed-size chunks and only a bounded number of chunks is
+in flight on the process pool at any time, so memory stays flat regardless of
+input size. Output rows keep the input order.
+"""
+import argparse
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+import roi_engine
+import tco
+
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        sys.exit("Parquet support needs pyarrow: pip install pyarrow")
+    return pa, pq
+
+
+def read_chunks(path, chunk_size):
+    """Yield DataFrames of at most ``chunk_size`` rows from a CSV or Parquet file."""
+    if _is_parquet(path):
+        _, pq = _import_pyarrow()
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def input_columns(path):
+    """Column names of a CSV or Parquet file, read without loading any rows."""
+    if _is_parquet(path):
+        _, pq = _import_pyarrow()
+        return pq.ParquetFile(path).schema_arrow.names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def check_columns(columns, defaults=False):
+    """Raise ValueError when an input field is missing and ``defaults`` is off."""
+    missing = [field for field in roi_engine.INPUT_FIELDS if field not in columns]
+    if missing and not defaults:
+        raise ValueError(f"The input is missing {', '.join(missing)}; "
+                         "fix the header or pass --defaults to use the sidebar defaults")
+
+
+def score_chunk(chunk, projections=(), defaults=False):
+    """Append engine results (and a TCO projection per entry of ``projections``) to a chunk of inputs.
+
+    Missing input columns raise ValueError unless ``defaults`` is set, in
+    which case they take the sidebar defaults.
+    """
+    check_columns(chunk.columns, defaults)
+    inputs = {}
+    for field in roi_engine.INPUT_FIELDS:
+        if field in chunk:
+            inputs[field] = chunk[field].to_numpy(dtype=np.float64)
+        else:
+            inputs[field] = np.full(len(chunk), roi_engine.DEFAULT_INPUTS[field], dtype=np.float64)
+
+    results = roi_engine.calculate(inputs)
+    scored = chunk.reset_index(drop=True)
+    for column in roi_engine.RESULT_COLUMNS:
+        scored[column] = results[column]
+    for projection in projections:
+        projected = tco.project(inputs, projection)
+        for column in tco.TCO_COLUMNS:
+            scored[f"{column}_{projection.years}y"] = projected[column]
+    return scored
+
+
+def _encode_csv(df, header):
+    # Arrow's CSV writer is roughly 10x faster than DataFrame.to_csv on float columns
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        return df.to_csv(header=header, index=False).encode("utf-8")
+    buffer = BytesIO()
+    pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buffer,
+                     pa_csv.WriteOptions(include_header=header))
+    return buffer.getvalue()
+
+
+def _score_for_output(chunk, as_csv, header, projections=(), defaults=False):
+    # CSV formatting is the expensive part of writing, so it runs in the worker
+    scored = score_chunk(chunk, projections, defaults)
+    if as_csv:
+        return _encode_csv(scored, header), len(scored)
+    return scored, len(scored)
+
+
+class CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, "wb")
+
+    def write(self, text):
+        self.file.write(text)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    def __init__(self, path):
+        self.pa, self.pq = _import_pyarrow()
+        self.path = path
+        self.writer = None
+
+    def write(self, df):
+        if self.writer is None:
+            table = self.pa.Table.from_pandas(df, preserve_index=False)
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        else:
+            table = self.pa.Table.from_pandas(df, schema=self.writer.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def score_file(input_path, output_path, chunk_size=500_000, workers=None, max_pending=None, projections=(),
+               defaults=False):
+    """Score ``input_path`` into ``output_path`` and return the row count.
+
+    Raises ValueError before anything is written when an input column is
+    missing and ``defaults`` is off.
+    """
+    check_columns(input_columns(input_path), defaults)
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 2
+    as_csv = not _is_parquet(output_path)
+    writer = CsvWriter(output_path) if as_csv else ParquetWriter(output_path)
+    rows = 0
+    try:
+        if workers == 1:
+            for i, chunk in enumerate(read_chunks(input_path, chunk_size)):
+                data, count = _score_for_output(chunk, as_csv, i == 0, projections, defaults)
+                writer.write(data)
+                rows += count
+            return rows
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for i, chunk in enumerate(read_chunks(input_path, chunk_size)):
+                pending.append(pool.submit(_score_for_output, chunk, as_csv, i == 0, projections, defaults))
+                # Backpressure: wait for the oldest chunk before reading more
+                if len(pending) >= max_pending:
+                    data, count = pending.popleft().result()
+                    writer.write(data)
+                    rows += count
+            while pending:
+                data, count = pending.popleft().result()
+                writer.write(data)
+                rows += count
+        return rows
+    finally:
+        writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-score customer environments with the Open-AudIT ROI engine.")
+    parser.add_argument("input", help="CSV or Parquet file of customer environments")
+    parser.add_argument("output", help="CSV or Parquet file to write (format from extension)")
+    parser.add_argument("--chunk-size", type=int, default=500_000, help="rows per chunk (default: 500000)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--defaults", action="store_true",
+                        help="use the sidebar defaults for missing input columns instead of failing")
+    parser.add_argument("--years", type=int, nargs="+", default=[], help="add TCO columns for these horizons, e.g. 3 5")
+    parser.add_argument("--discount-rate", type=float, default=tco.DEFAULT_PROJECTION.discount_rate)
+    parser.add_argument("--sub-escalation", type=float, default=0.0, help="yearly subscription increase, e.g. 0.05")
+    parser.add_argument("--rate-inflation", type=float, default=0.0, help="yearly staff-rate increase")
+    parser.add_argument("--device-growth", type=float, default=0.0, help="yearly device growth")
+    args = parser.parse_args(argv)
+
+    projections = [
+        tco.DEFAULT_PROJECTION._replace(
+            years=years,
+            discount_rate=args.discount_rate,
+            sub_escalation=args.sub_escalation,
+            rate_inflation=args.rate_inflation,
+            device_growth=args.device_growth,
+        )
+        for years in args.years
+    ]
+    try:
+        rows = score_file(args.input, args.output, chunk_size=args.chunk_size, workers=args.workers,
+                          projections=projections, defaults=args.defaults)
+    except ValueError as exc:
+        sys.exit(str(exc))
+    print(f"Scored {rows:,} rows -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
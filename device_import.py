@@ -0,0 +1,333 @@
+"""Derive sidebar inputs from an Open-AudIT device export.
+
+Usage:
+    python device_import.py devices.csv
+    python device_import.py devices.json
+
+Accepts the CSV or JSON device export (a JSON array, the API's
+{"data": [{"attributes": {...}}, ...]} form, or one JSON object per line).
+Only the type, class, status and criticality fields are read; a "devices."
+prefix on field names is ignored. Retired and deleted devices are skipped.
+
+A device is critical when its criticality is "critical" or "high", or, when
+the export has no criticality for it, when its class or type is one of
+CRITICAL_CLASSES / CRITICAL_TYPES (servers and network infrastructure).
+
+CSV is read in chunks of ``chunk_size`` rows and JSON a few MiB at a time,
+and only running counts are kept, so memory use does not depend on the
+size of the file. The result
+feeds the engine through num_devices and the critical_device_pct
+assumption, which drive the asset, change detection and vulnerability line
+items.
+"""
+import argparse
+import io
+import json
+import os
+import re
+from collections import Counter, namedtuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    # Several times faster than json on large windows; optional
+    from orjson import JSONDecodeError as _FastDecodeError, loads as _loads
+except ImportError:
+    _FastDecodeError = json.JSONDecodeError
+    _loads = json.loads
+
+FIELDS = ("type", "class", "status", "criticality")
+
+SKIPPED_STATUSES = frozenset(("retired", "deleted"))
+
+CRITICAL_LEVELS = frozenset(("critical", "high"))
+
+CRITICAL_CLASSES = frozenset(("server", "virtual server", "hypervisor"))
+
+CRITICAL_TYPES = frozenset((
+    "router",
+    "switch",
+    "firewall",
+    "load balancer",
+    "san",
+    "nas",
+    "gateway",
+))
+
+DeviceSummary = namedtuple("DeviceSummary", ["devices", "critical_devices", "by_type", "skipped"])
+
+# Separators between records in a JSON array or a JSON Lines file
+_SEPARATORS = re.compile(r"[\s,]*")
+
+_DATA_ARRAY = re.compile(r'"data"\s*:\s*\[')
+
+
+def _field_name(column):
+    name = str(column).strip().lower()
+    return name[len("devices."):] if name.startswith("devices.") else name
+
+
+def _factorize(chunk, field):
+    """(codes, normalised distinct values) of a column; missing cells are ""."""
+    if field not in chunk:
+        return np.zeros(len(chunk), dtype=np.intp), np.array([""], dtype=object)
+    codes, uniques = pd.factorize(chunk[field])
+    # Normalise the few distinct values rather than every row; missing cells get a trailing ""
+    codes[codes < 0] = len(uniques)
+    values = np.array([str(value).strip().lower() for value in uniques] + [""], dtype=object)
+    return codes, values
+
+
+def _summarise_chunk(chunk, counts, weights=None):
+    """Add a DataFrame of device rows (columns from FIELDS) to ``counts``.
+
+    ``weights`` gives the number of devices each row stands for (default 1).
+    """
+    columns = {field: _factorize(chunk, field) for field in FIELDS}
+    weights = np.ones(len(chunk), dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.int64)
+
+    def matches(field, allowed):
+        codes, values = columns[field]
+        return np.array([value in allowed for value in values])[codes]
+
+    active = ~matches("status", SKIPPED_STATUSES)
+    counts["skipped"] += int(weights[~active].sum())
+
+    rated = ~matches("criticality", {""})
+    critical = matches("criticality", CRITICAL_LEVELS) | (
+        ~rated & (matches("class", CRITICAL_CLASSES) | matches("type", CRITICAL_TYPES)))
+    counts["devices"] += int(weights[active].sum())
+    counts["critical_devices"] += int(weights[active & critical].sum())
+
+    type_codes, type_values = columns["type"]
+    per_value = np.bincount(type_codes[active], weights=weights[active], minlength=len(type_values))
+    for value, count in zip(type_values, per_value.tolist()):
+        if count:
+            counts["by_type"][value or "unknown"] += int(count)
+
+
+def _record_end(buffer, start):
+    """Index just past the last "}" that is followed by "," and "{" after ``start``, or -1.
+
+    That is the end of a record unless the "},{" sits inside a nested array
+    or a string; the text up to it is then not valid JSON on its own.
+    """
+    brace = len(buffer)
+    while True:
+        brace = buffer.rfind("{", start + 1, brace)
+        if brace < 0:
+            return -1
+        low = max(start, brace - 64)
+        before = buffer[low:brace].rstrip()
+        if before.endswith(","):
+            before = before[:-1].rstrip()
+            if before.endswith("}"):
+                return low + len(before)
+
+
+def _decode_window(decoder, window):
+    """Records in ``window``, a run of whole JSON objects separated by commas."""
+    try:
+        # One C-level parse for the whole window
+        return _loads("[" + window + "]")
+    except _FastDecodeError:
+        records = []
+        pos = 0
+        while True:
+            pos = _SEPARATORS.match(window, pos).end()
+            if pos == len(window):
+                return records
+            record, pos = decoder.raw_decode(window, pos)
+            records.append(record)
+
+
+def _decode_records(decoder, buffer, pos, eof):
+    """(records, end, done) for the whole array items in ``buffer`` from ``pos``.
+
+    Decoding stops at the array's closing "]" (``done``) or before an item
+    cut off by the end of the buffer, which the next read completes; at the
+    end of the stream that item is an error.
+    """
+    records = []
+    while True:
+        pos = _SEPARATORS.match(buffer, pos).end()
+        if pos == len(buffer) or buffer[pos] == "]":
+            return records, pos, eof or pos < len(buffer)
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            return records, pos, False
+        if end == len(buffer) and not eof:
+            # A number or literal at the end of a read may go on in the next one
+            return records, pos, False
+        records.append(record)
+        pos = end
+
+
+def _iter_json_batches(stream, lines=False, chunk_chars=1 << 22):
+    """Yield lists of device objects from a JSON array, {"data": [...]} or JSON Lines stream.
+
+    The stream is read ``chunk_chars`` at a time and each read yields the
+    whole records it completes; a record longer than four reads is rejected.
+    """
+    decoder = json.JSONDecoder()
+    buffer = stream.read(chunk_chars).lstrip()
+    eof = not buffer
+    pos = 0
+    if buffer.startswith("["):
+        pos = 1
+    elif buffer.startswith("{") and not lines:
+        # The API response; the data array follows a short "meta" object
+        while True:
+            match = _DATA_ARRAY.search(buffer)
+            if match or eof or len(buffer) > 4 * chunk_chars:
+                break
+            more = stream.read(chunk_chars)
+            eof = not more
+            buffer += more
+        if not match:
+            raise ValueError('The device export has no "data" array')
+        pos = match.end()
+    else:
+        lines = True
+
+    try:
+        while True:
+            if lines:
+                cut = len(buffer) if eof else buffer.rfind("\n", pos) + 1
+                window = ",".join(line for line in buffer[pos:cut].split("\n") if line.strip())
+                if window:
+                    yield _unwrap(_decode_window(decoder, window))
+                    pos = cut
+                done = eof
+            else:
+                pos = _SEPARATORS.match(buffer, pos).end()
+                cut = _record_end(buffer, pos)
+                try:
+                    # One C-level parse for the whole records in the read
+                    records = _loads("[" + buffer[pos:cut] + "]") if cut > pos else None
+                except _FastDecodeError:
+                    # The "},{" was inside a record; decode the records one by one
+                    records = None
+                if records is None:
+                    records, pos, done = _decode_records(decoder, buffer, pos, eof)
+                else:
+                    pos, done = cut, False
+                if records:
+                    yield _unwrap(records)
+                if len(buffer) - pos > 4 * chunk_chars:
+                    raise ValueError("The device export is not valid JSON: a record does not end")
+            if done:
+                break
+            more = stream.read(chunk_chars)
+            eof = not more
+            buffer = buffer[pos:] + more
+            pos = 0
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"The device export is not valid JSON: {exc}") from exc
+
+
+def _unwrap(records):
+    # API responses nest the device fields under "attributes"
+    return [record.get("attributes", record) for record in records if isinstance(record, dict)]
+
+
+def _json_chunks(stream, lines=False):
+    """Yield (DataFrame of distinct field combinations, device count per row)."""
+    for records in _iter_json_batches(stream, lines):
+        if not records:
+            continue
+        # Exports use one spelling per file, so the first record maps the keys
+        keys = {_field_name(key): key for key in records[0]}
+        type_key, class_key, status_key, criticality_key = (keys.get(field, field) for field in FIELDS)
+        # Devices repeat a handful of combinations, so count those instead of building rows
+        try:
+            combinations = Counter(
+                (record.get(type_key), record.get(class_key), record.get(status_key), record.get(criticality_key))
+                for record in records
+            )
+        except TypeError:
+            # A list or object where a single value belongs
+            raise ValueError(f"The device export's {', '.join(FIELDS)} fields must be text or numbers") from None
+        yield pd.DataFrame(list(combinations), columns=list(FIELDS)), list(combinations.values())
+
+
+def _csv_chunks(stream, chunk_size):
+    # Closed here, not when the reader is collected after an error: that
+    # would close the caller's file
+    with pd.read_csv(stream, usecols=lambda column: _field_name(column) in FIELDS, dtype=str,
+                     keep_default_na=False, chunksize=chunk_size) as reader:
+        for chunk in reader:
+            # Otherwise any CSV (a different export, say) would count as no devices
+            if chunk.columns.empty:
+                raise ValueError(f"The device export has none of the columns {', '.join(FIELDS)}")
+            yield chunk.rename(columns=_field_name), None
+
+
+def _is_json(name, head):
+    extension = os.path.splitext(name or "")[1].lower()
+    if extension in (".json", ".jsonl", ".ndjson"):
+        return True
+    if extension == ".csv":
+        return False
+    return head.lstrip()[:1] in (b"[", b"{")
+
+
+def summarise(source, name=None, chunk_size=200_000):
+    """Count devices in an export given as a path or a binary file object.
+
+    ``name`` (defaults to the path) picks the format by extension; without
+    one the content is sniffed.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return summarise(f, name or os.fspath(source), chunk_size)
+
+    stream = source if hasattr(source, "peek") else io.BufferedReader(source)
+    text = None
+    if _is_json(name, stream.peek(64)[:64]):
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig")
+        lines = os.path.splitext(name or "")[1].lower() in (".jsonl", ".ndjson")
+        chunks = _json_chunks(text, lines)
+    else:
+        chunks = _csv_chunks(stream, chunk_size)
+
+    counts = {"devices": 0, "critical_devices": 0, "by_type": Counter(), "skipped": 0}
+    try:
+        for chunk, weights in chunks:
+            _summarise_chunk(chunk, counts, weights)
+    except (pd.errors.ParserError, UnicodeDecodeError) as exc:
+        raise ValueError(f"Could not read the device export: {exc}") from exc
+    finally:
+        # Leave the caller's file object open
+        if text is not None:
+            text.detach()
+        if stream is not source:
+            stream.detach()
+    return DeviceSummary(counts["devices"], counts["critical_devices"], dict(counts["by_type"].most_common()),
+                         counts["skipped"])
+
+
+def apply(summary, inputs, assumptions):
+    """Return (inputs, assumptions) with the export's device and critical device counts."""
+    inputs = dict(inputs, num_devices=summary.devices)
+    if summary.devices:
+        assumptions = assumptions._replace(critical_device_pct=summary.critical_devices / summary.devices)
+    return inputs, assumptions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise an Open-AudIT device export for the ROI calculator.")
+    parser.add_argument("export", help="CSV or JSON device export")
+    parser.add_argument("--chunk-size", type=int, default=200_000, help="rows per CSV chunk (default: 200000)")
+    args = parser.parse_args(argv)
+
+    summary = summarise(args.export, chunk_size=args.chunk_size)
+    print(json.dumps(summary._asdict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Goal seek: the input value that hits a target ROI, net savings or payback.
+
+    goal_seek.solve("sub_cost", "payback_months", 6)        # highest price that pays back in 6 months
+    goal_seek.solve("num_devices", "roi_percentage", 300)   # devices needed for 300% ROI
+    goal_seek.solve("num_devices", "roi_percentage", np.arange(100, 1000, 50))
+
+Total savings are linear in every single input with the others held fixed,
+so each target reduces to a required total savings and the input follows in
+closed form from two engine evaluations. Where that does not hold (e.g.
+assumptions that clip a line item), the remaining rows are solved together
+by bisection on the engine itself. Targets and inputs may be scalars or
+arrays and broadcast together, like roi_engine; solutions that are negative
+or unreachable are NaN.
+"""
+import numpy as np
+
+import roi_engine
+
+TARGETS = ("roi_percentage", "net_savings", "payback_months")
+
+SOLVABLE_FIELDS = roi_engine.INPUT_FIELDS
+
+# Bisection bracket for the fallback: doubled from 1 until it holds the answer
+_MAX_BRACKET = 1e15
+
+
+def required_savings(target, value, sub_cost):
+    """Total annual savings needed for ``target`` to equal ``value``."""
+    value = np.asarray(value, dtype=np.float64)
+    sub_cost = np.asarray(sub_cost, dtype=np.float64)
+    if target == "roi_percentage":
+        return sub_cost * (1 + value / 100)
+    if target == "net_savings":
+        return sub_cost + value
+    if target == "payback_months":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(value > 0, 12 * sub_cost / value, np.nan)
+    raise ValueError(f"Unknown target {target!r}; expected one of {', '.join(TARGETS)}")
+
+
+def _subscription_for(target, value, total_dollars):
+    value = np.asarray(value, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if target == "roi_percentage":
+            return np.where(value > -100, total_dollars / (1 + value / 100), np.nan)
+        if target == "net_savings":
+            return total_dollars - value
+        if target == "payback_months":
+            return np.where(value > 0, value * total_dollars / 12, np.nan)
+    raise ValueError(f"Unknown target {target!r}; expected one of {', '.join(TARGETS)}")
+
+
+def _evaluate(field, x, inputs, include, assumptions):
+    columns = {name: inputs[name] for name in roi_engine.INPUT_FIELDS}
+    columns[field] = x
+    return roi_engine.calculate(columns, assumptions, include)
+
+
+def _bisect(field, target, value, inputs, include, assumptions, iterations=200):
+    # Monotonic in the input over [0, hi]; hi doubles until the target is inside
+    def gap(x):
+        return _evaluate(field, x, inputs, include, assumptions)[target] - value
+
+    value = np.asarray(value, dtype=np.float64)
+    lo = np.zeros(value.shape)
+    hi = np.ones(value.shape)
+    g_lo = gap(lo)
+    g_hi = gap(hi)
+    while True:
+        open_rows = (np.sign(g_lo) == np.sign(g_hi)) & (hi < _MAX_BRACKET)
+        if not open_rows.any():
+            break
+        hi = np.where(open_rows, hi * 2, hi)
+        g_hi = gap(hi)
+    found = np.sign(g_lo) != np.sign(g_hi)
+
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        g_mid = gap(mid)
+        left = np.sign(g_mid) == np.sign(g_lo)
+        lo = np.where(left, mid, lo)
+        g_lo = np.where(left, g_mid, g_lo)
+        hi = np.where(left, hi, mid)
+        if np.all(hi - lo <= 1e-12 * np.maximum(hi, 1.0)):
+            break
+    return np.where(found, (lo + hi) / 2, np.nan)
+
+
+def solve(field, target, value, inputs=None, include=None, assumptions=roi_engine.DEFAULT_ASSUMPTIONS):
+    """Value of input ``field`` at which ``target`` equals ``value``.
+
+    ``inputs`` supplies the other inputs (default: the sidebar defaults) and
+    ``include`` the line item flags, as for roi_engine.calculate.
+    """
+    if field not in SOLVABLE_FIELDS:
+        raise ValueError(f"Cannot solve for {field!r}; expected one of {', '.join(SOLVABLE_FIELDS)}")
+    if target not in TARGETS:
+        raise ValueError(f"Unknown target {target!r}; expected one of {', '.join(TARGETS)}")
+    inputs = {**roi_engine.DEFAULT_INPUTS, **(inputs or {})}
+    value = np.asarray(value, dtype=np.float64)
+
+    if field == "sub_cost":
+        # Savings do not depend on the subscription
+        total = _evaluate(field, 0.0, inputs, include, assumptions)["total_dollars"]
+        solution = _subscription_for(target, value, total)
+    else:
+        needed = required_savings(target, value, inputs["sub_cost"])
+        t0, t1, t2 = (_evaluate(field, x, inputs, include, assumptions)["total_dollars"] for x in (0.0, 1.0, 2.0))
+        slope = t1 - t0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            solution = np.where(slope != 0, (needed - t0) / slope, np.nan)
+        linear = np.abs(t2 - (t0 + 2 * slope)) <= 1e-9 * np.maximum(np.abs(t2), 1.0)
+        if not np.all(linear):
+            shape = np.broadcast(solution, linear).shape
+            solution = np.broadcast_to(solution, shape).copy()
+            rows = ~np.broadcast_to(linear, shape)
+            row_inputs = {name: np.broadcast_to(np.asarray(inputs[name], dtype=np.float64), shape)[rows]
+                          for name in roi_engine.INPUT_FIELDS}
+            row_include = {key: np.broadcast_to(np.asarray(flag), shape)[rows]
+                           for key, flag in (include or {}).items()}
+            solution[rows] = _bisect(field, target, np.broadcast_to(value, shape)[rows],
+                                     row_inputs, row_include, assumptions)
+
+    with np.errstate(invalid="ignore"):
+        return np.where(solution >= 0, solution, np.nan)
+
+
+def solve_scenario(field, target, value, inputs=None, include=None, assumptions=roi_engine.DEFAULT_ASSUMPTIONS):
+    """Solve for one target value and return a float (NaN when unreachable)."""
+    return float(solve(field, target, value, inputs, include, assumptions))
@@ -0,0 +1,164 @@
+"""ROI and payback over a grid of two inputs, computed in cached tiles.
+
+    view = heatmap.grid("num_devices", (0, 50_000), "hourly_rate", (10, 200), inputs, cells=(1000, 1000))
+    view["x"], view["y"], view["roi_percentage"]      # shapes (nx,), (ny,), (ny, nx)
+
+The other inputs stay at their values in ``inputs``. Each axis is snapped to a
+lattice of "nice" steps (NICE_STEPS x 10^k), and the lattice is cut into
+TILE x TILE tiles that are evaluated by broadcasting the x values against the
+y values through roi_engine. Tiles are kept in an LRU ResultCache, so panning
+only computes the tiles that come into view and zooming back to an earlier
+step reuses the old ones.
+
+The tile cache size can be set through the environment:
+    ROI_HEATMAP_CACHE_BYTES  (default 256 MiB)
+"""
+import math
+import os
+
+import numpy as np
+
+import result_cache
+import roi_engine
+
+TILE = 128
+
+METRICS = ("roi_percentage", "payback_months")
+
+# Axis steps are one of these x 10^k, so a view has at most ~1.3x the cells asked for
+NICE_STEPS = (1, 1.2, 1.5, 2, 2.5, 3, 4, 5, 6, 8)
+
+tile_cache = result_cache.ResultCache(
+    max_entries=100_000,
+    max_bytes=int(os.environ.get("ROI_HEATMAP_CACHE_BYTES", 256 * 1024 * 1024)),
+    ttl=0,
+)
+
+
+def nice_step(step):
+    """Largest NICE_STEPS x 10^k that is at most ``step``."""
+    if step <= 0:
+        return 1.0
+    exponent = math.floor(math.log10(step))
+    for factor in reversed(NICE_STEPS):
+        candidate = factor * 10.0 ** exponent
+        if candidate <= step * (1 + 1e-12):
+            return candidate
+    return 10.0 ** exponent
+
+
+def axis(value_range, cells):
+    """Snap ``value_range`` to the lattice: (first index, cell count, step)."""
+    lo, hi = max(0.0, float(value_range[0])), max(0.0, float(value_range[1]))
+    if hi < lo:
+        lo, hi = hi, lo
+    step = nice_step((hi - lo) / max(cells - 1, 1))
+    first = math.ceil(lo / step - 1e-9)
+    last = math.floor(hi / step + 1e-9)
+    return first, max(last - first + 1, 1), step
+
+
+def _compute_tile(x_field, y_field, x_step, y_step, tx, ty, inputs, include, assumptions):
+    x = (tx * TILE + np.arange(TILE)) * x_step
+    y = (ty * TILE + np.arange(TILE)) * y_step
+    columns = {name: inputs[name] for name in roi_engine.INPUT_FIELDS}
+    columns[x_field] = x[None, :]
+    columns[y_field] = y[:, None]
+    results = roi_engine.calculate(columns, assumptions, include)
+    return {name: np.broadcast_to(results[name], (TILE, TILE)).copy() for name in METRICS}
+
+
+def grid(x_field, x_range, y_field, y_range, inputs=None, include=None, cells=(500, 500),
+         assumptions=roi_engine.DEFAULT_ASSUMPTIONS, cache=tile_cache):
+    """ROI % and payback months over a grid of ``x_field`` by ``y_field``.
+
+    Returns x and y (the snapped axis values) and one (ny, nx) array per
+    metric in METRICS, row 0 being the lowest y.
+    """
+    for field in (x_field, y_field):
+        if field not in roi_engine.INPUT_FIELDS:
+            raise ValueError(f"Unknown input {field!r}; expected one of {', '.join(roi_engine.INPUT_FIELDS)}")
+    if x_field == y_field:
+        raise ValueError("Choose two different inputs")
+    inputs = {**roi_engine.DEFAULT_INPUTS, **(inputs or {})}
+    x_first, nx, x_step = axis(x_range, cells[0])
+    y_first, ny, y_step = axis(y_range, cells[1])
+
+    fixed = {name: value for name, value in inputs.items() if name not in (x_field, y_field)}
+    base = (result_cache.make_key("heatmap", fixed, include, assumptions), x_field, y_field, x_step, y_step)
+
+    out = {name: np.empty((ny, nx)) for name in METRICS}
+    for ty in range(y_first // TILE, (y_first + ny - 1) // TILE + 1):
+        for tx in range(x_first // TILE, (x_first + nx - 1) // TILE + 1):
+            tile = cache.get_or_compute(
+                base + (tx, ty),
+                lambda: _compute_tile(x_field, y_field, x_step, y_step, tx, ty, inputs, include, assumptions))
+            # Overlap of this tile with the requested cells, in tile and output coordinates
+            x0, x1 = max(x_first, tx * TILE), min(x_first + nx, (tx + 1) * TILE)
+            y0, y1 = max(y_first, ty * TILE), min(y_first + ny, (ty + 1) * TILE)
+            for name in METRICS:
+                out[name][y0 - y_first:y1 - y_first, x0 - x_first:x1 - x_first] = \
+                    tile[name][y0 - ty * TILE:y1 - ty * TILE, x0 - tx * TILE:x1 - tx * TILE]
+
+    return {
+        "x": (x_first + np.arange(nx)) * x_step,
+        "y": (y_first + np.arange(ny)) * y_step,
+        **out,
+    }
+
+
+def break_even(roi):
+    """Cells where ROI changes sign against a neighbour (the break-even line)."""
+    positive = roi > 0
+    edge = np.zeros(roi.shape, dtype=bool)
+    edge[:, 1:] |= positive[:, 1:] != positive[:, :-1]
+    edge[1:, :] |= positive[1:, :] != positive[:-1, :]
+    return edge
+
+
+def _gradient(*stops):
+    # 256-entry colour table running through the given RGB stops
+    stops = np.array(stops, dtype=np.float64)
+    positions = np.linspace(0, 1, len(stops))
+    t = np.linspace(0, 1, 256)
+    return np.stack([np.interp(t, positions, stops[:, c]) for c in range(3)], axis=-1).astype(np.uint8)
+
+
+_ROI_COLOURS = _gradient((198, 40, 40), (247, 247, 247), (46, 125, 50))
+_PAYBACK_COLOURS = _gradient((46, 125, 50), (251, 192, 45), (198, 40, 40))
+
+
+def colorize(values, metric):
+    """RGB image (uint8, top row = highest y) for a metric array from grid().
+
+    ROI is red below break-even and green above it, with the break-even line
+    in black; payback runs from green (fast) to red (24+ months), with
+    "never" in grey.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if metric == "roi_percentage":
+        # A strided sample is plenty for the colour scale and much cheaper to sort
+        scale = max(float(np.nanpercentile(np.abs(values[::4, ::4]), 95)), 1.0)
+        index = np.clip((values / scale + 1) * 127.5, 0, 255).astype(np.uint8)
+        rgb = _ROI_COLOURS[index]
+        rgb[break_even(values)] = 0
+    elif metric == "payback_months":
+        never = ~(values > 0)
+        index = np.clip(np.where(never, 0, values) / 24 * 255, 0, 255).astype(np.uint8)
+        rgb = _PAYBACK_COLOURS[index]
+        rgb[never] = (189, 189, 189)
+    else:
+        raise ValueError(f"Unknown metric {metric!r}; expected one of {', '.join(METRICS)}")
+    return rgb[::-1]
+
+
+def mark(image, view, x_value, y_value, size=6):
+    """Draw a white cross on ``image`` (from colorize) at the given input values."""
+    x, y = view["x"], view["y"]
+    if not (x[0] <= x_value <= x[-1] and y[0] <= y_value <= y[-1]):
+        return image
+    col = int(np.abs(x - x_value).argmin())
+    row = len(y) - 1 - int(np.abs(y - y_value).argmin())
+    image[max(row - size, 0):row + size + 1, max(col - 1, 0):col + 2] = 255
+    image[max(row - 1, 0):row + 2, max(col - size, 0):col + size + 1] = 255
+    return image
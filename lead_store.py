@@ -0,0 +1,229 @@
+"""Non-blocking persistence for captured leads and demo requests.
+
+record() only appends to an in-memory queue; a background thread drains it
+and writes events to the store in batches. The queue is bounded and
+record() never waits: when a spike outruns the store, the event is
+dropped rather than holding up the rerun. Drops are counted in
+stats()["dropped"], which the metrics page reports. Offline callers that
+would rather wait than drop (imports, backfills) can give the queue a
+put_timeout. Pending events are flushed at interpreter shutdown, and events
+submitted after close() are counted as dropped.
+
+Any object with write_batch(events) and close() can be used as the store.
+A store may also define tick(), which is called whenever the queue has
+been idle for flush_interval, for time-based work such as closing old
+files. All of these are only ever called on the writer thread. SQLiteLeadStore is the
+default; it opens its connection on the first write, on the writer thread.
+The database path comes from ROI_LEADS_DB (default leads.db next to this
+file).
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "leads.db")
+
+
+class SQLiteLeadStore:
+    """Stores events in a local SQLite table."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self.conn = None
+
+    def _connect(self):
+        # Called from write_batch, so the connection belongs to the writer thread
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " kind TEXT NOT NULL,"
+            " email TEXT NOT NULL,"
+            " payload TEXT,"
+            " created_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def write_batch(self, events):
+        if self.conn is None:
+            self._connect()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO events (kind, email, payload, created_at) VALUES (?, ?, ?, ?)",
+                [(e["kind"], e["email"], json.dumps(e.get("payload")), e["created_at"]) for e in events],
+            )
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+# Queued by close() behind the last event; the writer stops when it gets it
+_CLOSE = object()
+
+
+class WriteBehindQueue:
+    """Batches events onto a store from a background thread."""
+
+    def __init__(self, store, max_queue=50_000, batch_size=500, flush_interval=0.5, put_timeout=None,
+                 name="lead-writer"):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        # Guards _closed, _submitting and dropped; close() waits on it for in-flight submits
+        self._lock = threading.Condition()
+        self._closed = False
+        self._submitting = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, event):
+        """Queue any event the store accepts; returns False if it was dropped.
+
+        Never blocks unless the queue has a put_timeout; then it waits at
+        most that long for room in a full queue.
+        """
+        with self._lock:
+            if self._closed:
+                self.dropped += 1
+                return False
+            self._submitting += 1
+        queued = False
+        try:
+            if self.put_timeout:
+                self._queue.put(event, timeout=self.put_timeout)
+            else:
+                self._queue.put_nowait(event)
+            queued = True
+        except queue.Full:
+            pass
+        finally:
+            with self._lock:
+                self._submitting -= 1
+                if not queued:
+                    self.dropped += 1
+                self._lock.notify_all()
+        return queued
+
+    def record(self, kind, email, payload=None):
+        """Queue a lead event; returns False if it was dropped."""
+        if self.submit({"kind": kind, "email": email, "payload": payload, "created_at": time.time()}):
+            return True
+        logger.warning("Lead queue full, dropped %s event for %s", kind, email)
+        return False
+
+    def _drain(self, first):
+        """Return (batch, closing): up to batch_size events, stopping at the close sentinel."""
+        batch = []
+        item = first
+        while item is not _CLOSE:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, False
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return batch, False
+        return batch, True
+
+    def _write(self, batch):
+        try:
+            self.store.write_batch(batch)
+            self.written += len(batch)
+        except Exception:
+            self.failed += len(batch)
+            logger.exception("%s failed to write %d events", self._thread.name, len(batch))
+
+    def _tick(self):
+        tick = getattr(self.store, "tick", None)
+        if tick is None:
+            return
+        try:
+            tick()
+        except Exception:
+            logger.exception("%s store tick failed", self._thread.name)
+
+    def _run(self):
+        closing = False
+        while not closing:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._tick()
+                continue
+            batch, closing = self._drain(first)
+            if batch:
+                self._write(batch)
+        try:
+            self.store.close()
+        except Exception:
+            logger.exception("%s failed to close its store", self._thread.name)
+
+    def close(self, timeout=5.0):
+        """Stop accepting events, flush everything queued and close the store."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            # Submits already past the closed check finish before the sentinel goes in
+            self._lock.wait_for(lambda: self._submitting == 0)
+        try:
+            self._queue.put(_CLOSE, timeout=timeout)
+        except queue.Full:
+            logger.warning("%s did not drain its queue within %.1fs", self._thread.name, timeout)
+            return
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("%s did not finish flushing within %.1fs", self._thread.name, timeout)
+
+    def stats(self):
+        with self._lock:
+            dropped = self.dropped
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": dropped,
+            "failed": self.failed,
+        }
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder():
+    """Process-wide queue, created on first use and flushed at exit."""
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = WriteBehindQueue(SQLiteLeadStore(os.environ.get("ROI_LEADS_DB", DEFAULT_DB_PATH)))
+                atexit.register(_recorder.close)
+    return _recorder
+
+
+def stats():
+    """Counters of the shared queue (all zero before the first event)."""
+    if _recorder is None:
+        return {"queued": 0, "written": 0, "dropped": 0, "failed": 0}
+    return _recorder.stats()
+
+
+def record(kind, email, payload=None):
+    """Queue a "lead" or "demo_request" event for the shared store."""
+    return get_recorder().record(kind, email, payload)
@@ -0,0 +1,71 @@
+"""Lean session mode: less state per browser session, for more sessions per process.
+
+Set ROI_LEAN_SESSIONS=1 to enable it. Results, line items, tables and share
+text are already shared between sessions through result_cache and the share
+store; lean mode removes what each session still holds on its own:
+
+* the goal seek and multi-year projection sections are only built when
+  their toggle is on (like the explorer), so a session that never opens
+  them holds none of their widgets and skips their work on every rerun
+* the share text is shown as a code block with a copy button instead of a
+  text area, so its string is not kept as a widget value
+* an uploaded device or software export is released as soon as it has been
+  parsed; the session keeps the figures from it (and the top of the
+  licence table), not the file
+* switching the scenario comparison off discards its state
+
+SESSION_MEMORY_BUDGET is the server memory one connected, idle session may
+cost after the full flow; session_loadtest.py measures it.
+"""
+import os
+
+import streamlit as st
+from streamlit.runtime.memory_uploaded_file_manager import MemoryUploadedFileManager
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+ENABLED = os.environ.get("ROI_LEAN_SESSIONS", "0") not in ("0", "false", "no")
+
+SESSION_MEMORY_BUDGET = 256 * 1024
+
+# Licence audit rows kept in the session (what the sidebar shows)
+LICENCE_PRODUCTS_KEPT = 20
+
+
+def opened(label, key):
+    """Whether an optional section is built: always, or in lean mode when its toggle is on."""
+    return not ENABLED or st.toggle(label, key=key)
+
+
+def upload_key(name):
+    """Widget key for a file uploader; release_uploads() moves it on to drop the file."""
+    return f"{name}_{st.session_state.get(f'{name}_round', 0)}"
+
+
+def release_uploads(*names):
+    """In lean mode, drop these uploaders' files from the session, and rerun.
+
+    Streamlit keeps an uploaded file's bytes until the browser deletes it or
+    the session ends, whether or not a widget still shows it, so the file is
+    removed from the uploaded file manager and the uploader gets a new key.
+    The rerun costs one extra script run per upload. Without it the widget
+    holds the file until the visitor's next interaction, which for a tab left
+    open after an import is for good: a device or software export is
+    megabytes against a SESSION_MEMORY_BUDGET of 256 KB.
+    """
+    if not ENABLED:
+        return
+    ctx = get_script_run_ctx()
+    for name in names:
+        uploaded = st.session_state.get(upload_key(name))
+        # Only the in-memory manager (the default) can drop a single file
+        if uploaded is not None and ctx is not None and isinstance(ctx.uploaded_file_mgr, MemoryUploadedFileManager):
+            ctx.uploaded_file_mgr.remove_file(session_id=ctx.session_id, file_id=uploaded.file_id)
+        st.session_state[f"{name}_round"] = st.session_state.get(f"{name}_round", 0) + 1
+    st.rerun()
+
+
+def discard(*keys):
+    """In lean mode, drop session state a closed section no longer needs."""
+    if ENABLED:
+        for key in keys:
+            st.session_state.pop(key, None)
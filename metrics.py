@@ -0,0 +1,315 @@
+"""Timing spans for the hot sections of a page rerun.
+
+    with metrics.span("sidebar"):
+        ...
+
+    timer = metrics.span("checkbox_table").start()
+    ...
+    timer.stop()
+
+Spans are aggregated per process into one fixed-bucket histogram per section
+name. A span given a session id also adds to that session's running total, so
+the most expensive sessions can be listed. When disabled, span() returns a
+shared no-op object and costs well under a microsecond.
+
+The aggregates are available as Prometheus text (prometheus_text()) and as
+JSON (snapshot()). Other modules can add their numbers with
+register_collector(); the ones named as counters (monotonic totals such as
+cache hits) are exported as Prometheus counters, the rest as gauges. The
+exporter listens on 127.0.0.1 unless serve() is given another host.
+Settings come from the environment:
+    ROI_METRICS       0 disables the spans (default 1)
+    ROI_METRICS_PORT  serve /metrics and /metrics.json on this port
+"""
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds; sections range from tens of microseconds to seconds
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+           0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Sessions tracked for the slowest-sessions list (least recently seen are dropped)
+MAX_SESSIONS = 1_000
+
+logger = logging.getLogger(__name__)
+
+_enabled = os.environ.get("ROI_METRICS", "1") not in ("0", "false", "no")
+
+
+class Histogram:
+    """Per-bucket (not cumulative) counts plus sum, count and max."""
+
+    __slots__ = ("counts", "sum", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding quantile ``q`` (max for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Registry:
+    """Per-process section histograms and per-session rerun totals."""
+
+    def __init__(self, max_sessions=MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._sessions = OrderedDict()  # session id -> [reruns, total_s, max_s]
+        self._collectors = {}  # name -> (collect, counter keys)
+
+    def observe(self, name, seconds, session=None):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+            if session is not None:
+                totals = self._sessions.get(session)
+                if totals is None:
+                    totals = self._sessions[session] = [0, 0.0, 0.0]
+                    if len(self._sessions) > self.max_sessions:
+                        self._sessions.popitem(last=False)
+                else:
+                    self._sessions.move_to_end(session)
+                totals[0] += 1
+                totals[1] += seconds
+                totals[2] = max(totals[2], seconds)
+
+    def register_collector(self, name, collect, counters=()):
+        """Add ``collect()``'s dict of numbers to every export under ``name``.
+
+        Keys in ``counters`` only ever increase and are exported as Prometheus
+        counters; every other key is a gauge.
+        """
+        with self._lock:
+            self._collectors[name] = (collect, frozenset(counters))
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._sessions.clear()
+
+    def _collect(self):
+        collected = {}
+        for name, (collect, _) in list(self._collectors.items()):
+            try:
+                collected[name] = {key: value for key, value in collect().items()
+                                   if isinstance(value, (int, float))}
+            except Exception:
+                collected[name] = {}
+        return collected
+
+    def snapshot(self, top_sessions=20):
+        """JSON-ready dump of every histogram, the slowest sessions and collectors."""
+        with self._lock:
+            sections = {
+                name: {
+                    "count": h.count,
+                    "sum_s": h.sum,
+                    "mean_s": h.sum / h.count if h.count else 0.0,
+                    "p50_s": h.quantile(0.5),
+                    "p95_s": h.quantile(0.95),
+                    "p99_s": h.quantile(0.99),
+                    "max_s": h.max,
+                    "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], h.counts)),
+                }
+                for name, h in sorted(self._histograms.items())
+            }
+            sessions = sorted(self._sessions.items(), key=lambda item: item[1][1], reverse=True)[:top_sessions]
+            tracked = len(self._sessions)
+        return {
+            "enabled": _enabled,
+            "sections": sections,
+            "sessions_tracked": tracked,
+            "slowest_sessions": [
+                {"session": session, "reruns": reruns, "total_s": total, "max_s": worst}
+                for session, (reruns, total, worst) in sessions
+            ],
+            "collectors": self._collect(),
+        }
+
+    def prometheus_text(self):
+        """Histograms and collector values in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = [(name, list(h.counts), h.sum, h.count) for name, h in sorted(self._histograms.items())]
+            tracked = len(self._sessions)
+            counters = {name: keys for name, (_, keys) in self._collectors.items()}
+        lines = [
+            "# HELP roi_app_section_seconds Time spent in each section of an app rerun.",
+            "# TYPE roi_app_section_seconds histogram",
+        ]
+        for name, counts, total, count in histograms:
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, counts):
+                cumulative += bucket
+                lines.append(f'roi_app_section_seconds_bucket{{section="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'roi_app_section_seconds_bucket{{section="{name}",le="+Inf"}} {count}')
+            lines.append(f'roi_app_section_seconds_sum{{section="{name}"}} {total!r}')
+            lines.append(f'roi_app_section_seconds_count{{section="{name}"}} {count}')
+        lines.append("# HELP roi_app_sessions_tracked Sessions with recorded reruns.")
+        lines.append("# TYPE roi_app_sessions_tracked gauge")
+        lines.append(f"roi_app_sessions_tracked {tracked}")
+        for collector, values in sorted(self._collect().items()):
+            for key, value in sorted(values.items()):
+                if key in counters.get(collector, ()):
+                    metric = f"roi_{collector}_{key}_total"
+                    lines.append(f"# TYPE {metric} counter")
+                else:
+                    metric = f"roi_{collector}_{key}"
+                    lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {float(value)!r}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class _Span:
+    __slots__ = ("name", "session", "started")
+
+    def __init__(self, name, session):
+        self.name = name
+        self.session = session
+        self.started = 0.0
+
+    def start(self):
+        self.started = time.perf_counter()
+        return self
+
+    def stop(self):
+        registry.observe(self.name, time.perf_counter() - self.started, self.session)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registry.observe(self.name, time.perf_counter() - self.started, self.session)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name, session=None):
+    """Timer for one section; use as a context manager or with start()/stop()."""
+    if not _enabled:
+        return _NOOP
+    return _Span(name, session)
+
+
+def enabled():
+    return _enabled
+
+
+def set_enabled(value):
+    global _enabled
+    _enabled = bool(value)
+
+
+def register_collector(name, collect, counters=()):
+    registry.register_collector(name, collect, counters)
+
+
+def snapshot(top_sessions=20):
+    return registry.snapshot(top_sessions)
+
+
+def prometheus_text():
+    return registry.prometheus_text()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body = prometheus_text().encode()
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            body = json.dumps(snapshot()).encode()
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_failed = False
+_server_lock = threading.Lock()
+
+
+def serve(port=None, host="127.0.0.1"):
+    """Start the exporter thread once per process (port from ROI_METRICS_PORT).
+
+    Safe to call on every rerun; returns None when no port is configured or
+    the port could not be bound. Pass host="0.0.0.0" to let a scraper on
+    another machine reach it.
+    """
+    global _server, _server_failed
+    if _server is not None or _server_failed:
+        return _server
+    port = port if port is not None else os.environ.get("ROI_METRICS_PORT")
+    if port in (None, ""):
+        return None
+    with _server_lock:
+        if _server is None and not _server_failed:
+            try:
+                server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            except (OSError, ValueError):
+                _server_failed = True
+                logger.exception("Could not start the metrics exporter on port %s", port)
+                return None
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+            _server = server
+    return _server
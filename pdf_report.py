@@ -0,0 +1,224 @@
+"""PDF report rendering for the ROI results.
+
+build_pdf() renders one report from a results_table.ResultsTable and summary
+values. The styles and table styles are built once per process and reused
+for every report. Paragraphs are made fresh for each report, because
+reportlab lays a flowable out in place and a shared one would race between
+concurrent builds.
+
+render_batch() renders personalised reports for many leads on a process pool
+and streams them into a ZIP file as they finish, so only the in-flight PDFs
+are held in memory.
+
+Usage:
+    python pdf_report.py leads.csv reports.zip --workers 8
+
+leads.csv needs an ``email`` column; any sidebar input columns present
+override the defaults for that lead.
+"""
+import argparse
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+import pandas as pd
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+import results_table
+import roi_engine
+
+NAVY = colors.HexColor("#1f4788")
+SUMMARY_BLUE = colors.HexColor("#4a6fa5")
+
+METHODOLOGY = (
+    "<b>Methodology.</b> Savings are estimated from the environment details you provided "
+    "and industry-average assumptions: time per warranty and licence request, minutes per "
+    "device for discovery, change checks and vulnerability identification, and hours per "
+    "report. Licence savings assume a reduction in current licence spend through "
+    "optimisation. ROI is (annual savings - annual investment) / annual investment, and "
+    "the payback period is the investment divided by average monthly savings. All "
+    "calculations are estimates based on industry averages."
+)
+
+FOOTER = "Questions about Open-AudIT? Contact us at sales@firstwave.com"
+
+
+@lru_cache(maxsize=None)
+def _static_parts():
+    # Built once per process: paragraph styles and table styles, which
+    # reportlab only reads. Flowables are made per report in build_pdf.
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle("ReportTitle", parent=styles["Title"], textColor=NAVY, fontSize=24, leading=28)
+    subtitle_style = ParagraphStyle("ReportSubtitle", parent=styles["Normal"], textColor=colors.HexColor("#666666"),
+                                    fontSize=12, leading=16, spaceAfter=12)
+    heading_style = ParagraphStyle("ReportHeading", parent=styles["Heading2"], textColor=NAVY)
+    body_style = ParagraphStyle("ReportBody", parent=styles["Normal"], fontSize=10, leading=14)
+    summary_style = ParagraphStyle("ReportSummary", parent=styles["Normal"], textColor=colors.white,
+                                   fontSize=11, leading=16)
+    small_style = ParagraphStyle("ReportSmall", parent=styles["Normal"], fontSize=8, leading=10,
+                                 textColor=colors.HexColor("#666666"))
+
+    table_style = TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), NAVY),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#eef2f8")]),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#c8d2e3")),
+        ("TOPPADDING", (0, 0), (-1, -1), 6),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+    ])
+    summary_table_style = TableStyle([
+        ("BACKGROUND", (0, 0), (-1, -1), SUMMARY_BLUE),
+        ("BOX", (0, 0), (-1, -1), 2, colors.HexColor("#2c4a7c")),
+        ("LEFTPADDING", (0, 0), (-1, -1), 14),
+        ("TOPPADDING", (0, 0), (-1, -1), 10),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 10),
+    ])
+
+    return {
+        "styles": {
+            "title": title_style,
+            "subtitle": subtitle_style,
+            "heading": heading_style,
+            "body": body_style,
+            "summary": summary_style,
+            "small": small_style,
+        },
+        "table_style": table_style,
+        "summary_table_style": summary_table_style,
+    }
+
+
+def build_pdf(table, summary, email=None, inputs=None):
+    """Render a report and return the PDF bytes.
+
+    ``table`` is the ResultsTable shown on the page, ``summary`` holds
+    total_dollars, total_hours, sub_cost, net_savings, roi_percentage and
+    payback_months, and ``inputs`` (optional) the sidebar values.
+    """
+    static = _static_parts()
+    styles = static["styles"]
+
+    story = [
+        Paragraph("Open-AudIT ROI Report", styles["title"]),
+        Paragraph("Your return on investment with Open-AudIT automation", styles["subtitle"]),
+    ]
+    if email:
+        story.append(Paragraph(f"Prepared for: {escape(str(email))}", styles["body"]))
+    if inputs:
+        story.append(Paragraph(
+            f"Based on {inputs.get('num_employees', 0):,} employees, {inputs.get('num_devices', 0):,} IT devices "
+            f"and an IT staff rate of ${inputs.get('hourly_rate', 0):,.2f}/hr.",
+            styles["body"],
+        ))
+    story.append(Spacer(1, 0.2 * inch))
+
+    story.append(Paragraph("Detailed Savings Breakdown", styles["heading"]))
+    breakdown = Table([list(results_table.DISPLAY_COLUMNS)] + table.display_rows(),
+                      colWidths=[3.6 * inch, 1.4 * inch, 1.5 * inch])
+    breakdown.setStyle(static["table_style"])
+    story.append(breakdown)
+    story.append(Spacer(1, 0.3 * inch))
+
+    story.append(Paragraph("Summary", styles["heading"]))
+    payback = f"{summary['payback_months']:.1f} months" if summary["payback_months"] > 0 else "N/A"
+    summary_text = (
+        f"<font size=14><b>Total Annual Savings: ${summary['total_dollars']:,.0f}</b></font><br/>"
+        f"<b>Total Hours Saved:</b> {summary['total_hours']:,.0f} hours/year<br/>"
+        f"<b>Annual Investment:</b> ${summary['sub_cost']:,.0f}<br/>"
+        f"<b>Net Savings:</b> ${summary['net_savings']:,.0f}<br/>"
+        f"<b>Return on Investment:</b> {summary['roi_percentage']:.0f}%<br/>"
+        f"<b>Payback Period:</b> {payback}"
+    )
+    summary_box = Table([[Paragraph(summary_text, styles["summary"])]], colWidths=[6.5 * inch])
+    summary_box.setStyle(static["summary_table_style"])
+    story.append(summary_box)
+    story.append(Spacer(1, 0.3 * inch))
+
+    story.append(Paragraph(METHODOLOGY, styles["body"]))
+    story.append(Spacer(1, 0.2 * inch))
+    story.append(Paragraph(FOOTER, styles["small"]))
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, title="Open-AudIT ROI Report",
+                            topMargin=0.75 * inch, bottomMargin=0.75 * inch)
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def render_lead(lead):
+    """Score and render one lead; returns (email, pdf bytes)."""
+    inputs = dict(roi_engine.DEFAULT_INPUTS)
+    inputs.update({key: value for key, value in lead.items() if key in inputs and not pd.isna(value)})
+    results = roi_engine.calculate_scenario(inputs)
+    results["sub_cost"] = float(inputs["sub_cost"])
+    return lead.get("email"), build_pdf(results_table.from_scenario(results), results, email=lead.get("email"), inputs=inputs)
+
+
+def _report_name(email, index):
+    # The index keeps names unique when a lead appears more than once
+    if not email:
+        return f"roi_report_{index:06d}.pdf"
+    return f"roi_report_{index:06d}_" + re.sub(r"[^A-Za-z0-9._@-]+", "_", str(email)) + ".pdf"
+
+
+def render_batch(leads, zip_path, workers=None, max_pending=None):
+    """Render a PDF per lead into ``zip_path`` and return the report count.
+
+    ``leads`` is an iterable of dicts (email plus any sidebar inputs). Reports
+    are written to the archive in lead order while later ones still render.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    count = 0
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as archive:
+        def write(result):
+            nonlocal count
+            email, pdf = result
+            archive.writestr(_report_name(email, count), pdf)
+            count += 1
+
+        if workers == 1:
+            for lead in leads:
+                write(render_lead(lead))
+            return count
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for lead in leads:
+                pending.append(pool.submit(render_lead, lead))
+                if len(pending) >= max_pending:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+    return count
+
+
+def _read_leads(path, chunk_size=10_000):
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        yield from chunk.to_dict("records")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render personalised Open-AudIT ROI reports into a ZIP file.")
+    parser.add_argument("leads", help="CSV file with an email column and optional sidebar input columns")
+    parser.add_argument("output", help="ZIP file to write")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    count = render_batch(_read_leads(args.leads), args.output, workers=args.workers)
+    print(f"Rendered {count:,} reports -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
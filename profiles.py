@@ -0,0 +1,173 @@
+"""Named assumption profiles (industry presets) loaded from a JSON file.
+
+The file maps a profile name to a label and the assumptions it changes;
+anything not listed keeps the roi_engine default:
+
+    {
+      "healthcare": {
+        "label": "Healthcare",
+        "assumptions": {"critical_device_pct": 0.5, "min_per_check_manual": 8}
+      }
+    }
+
+A "default" profile with the built-in assumptions is always available. The
+file is validated when it is loaded and each profile is compiled once into
+the float Assumptions tuple the formulas take, together with its cache
+fingerprint, so selecting a profile on a rerun is a dict lookup.
+
+``registry`` watches the file: get() and profiles() stat it at most once per
+ROI_PROFILES_CHECK_INTERVAL seconds (default 2) and swap in the new
+profiles when it has changed. A file that fails validation on reload is
+logged and the previous profiles stay in use. The path comes from
+ROI_PROFILES_PATH (default profiles.json next to this file).
+"""
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+
+import result_cache
+import roi_engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles.json")
+
+DEFAULT_PROFILE = "default"
+
+# Names go into share links, so they are kept short and URL-safe
+NAME_PATTERN = re.compile(r"^[a-z0-9_-]{1,32}$")
+
+# Assumptions that are fractions and must lie in [0, 1]
+FRACTION_FIELDS = frozenset((
+    "saving_pct_license",
+    "licence_spend_reduction_pct",
+    "saving_pct_asset",
+    "critical_device_pct",
+))
+
+Profile = namedtuple("Profile", ["name", "label", "assumptions", "version"])
+
+
+def compile_profile(name, spec):
+    """Validate one profile entry and return a Profile."""
+    if not isinstance(name, str) or not NAME_PATTERN.fullmatch(name):
+        raise ValueError(f"Profile name {name!r} must be 1-32 of a-z, 0-9, '_' or '-'")
+    if not isinstance(spec, dict):
+        raise ValueError(f"Profile {name!r} must be an object")
+    unknown = set(spec) - {"label", "assumptions"}
+    if unknown:
+        raise ValueError(f"Profile {name!r} has unknown keys: {', '.join(sorted(unknown))}")
+    label = spec.get("label", name)
+    if not isinstance(label, str) or not label:
+        raise ValueError(f"Profile {name!r} needs a non-empty label")
+    overrides = spec.get("assumptions", {})
+    if not isinstance(overrides, dict):
+        raise ValueError(f"Profile {name!r}: assumptions must be an object")
+    unknown = set(overrides) - set(roi_engine.Assumptions._fields)
+    if unknown:
+        raise ValueError(f"Profile {name!r} has unknown assumptions: {', '.join(sorted(unknown))}")
+
+    values = {}
+    for field in roi_engine.Assumptions._fields:
+        value = overrides.get(field, getattr(roi_engine.DEFAULT_ASSUMPTIONS, field))
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value < 0:
+            raise ValueError(f"Profile {name!r}: {field} must be a non-negative number, got {value!r}")
+        if field in FRACTION_FIELDS and value > 1:
+            raise ValueError(f"Profile {name!r}: {field} is a fraction and must be at most 1, got {value!r}")
+        values[field] = float(value)
+    assumptions = roi_engine.Assumptions(**values)
+    return Profile(name, label, assumptions, result_cache.assumptions_version(assumptions))
+
+
+def compile_profiles(config):
+    """Validate a parsed profiles file and return {name: Profile}, default first."""
+    if not isinstance(config, dict):
+        raise ValueError("The profiles file must hold an object of profiles")
+    config = dict(config)
+    compiled = {DEFAULT_PROFILE: compile_profile(DEFAULT_PROFILE, config.pop(DEFAULT_PROFILE, {"label": "Default"}))}
+    for name, spec in config.items():
+        compiled[name] = compile_profile(name, spec)
+    return compiled
+
+
+def load(path):
+    """Read and compile a profiles file; a missing file gives only the default."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        config = {}
+    return compile_profiles(config)
+
+
+class ProfileRegistry:
+    """The current profiles from ``path``, reloaded when the file changes."""
+
+    def __init__(self, path=DEFAULT_PATH, check_interval=2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.reload_errors = 0
+        # A broken file at startup should stop the process, not serve defaults
+        self._signature = self._stat()
+        self._profiles = load(path)
+        self._next_check = time.monotonic() + check_interval
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            signature = self._stat()
+            if signature == self._signature:
+                return
+            self._signature = signature
+            try:
+                profiles = load(self.path)
+            except (OSError, ValueError):
+                self.reload_errors += 1
+                logger.exception("Could not reload %s; keeping the previous profiles", self.path)
+                return
+            self._profiles = profiles
+            self.reloads += 1
+            logger.info("Reloaded %d profiles from %s", len(profiles), self.path)
+
+    def profiles(self):
+        """{name: Profile} snapshot, default first."""
+        self._maybe_reload()
+        return self._profiles
+
+    def get(self, name=DEFAULT_PROFILE):
+        """Profile ``name``, or the default when it is unknown or was removed."""
+        profiles = self.profiles()
+        return profiles.get(name) or profiles[DEFAULT_PROFILE]
+
+    def stats(self):
+        return {
+            "profiles": len(self._profiles),
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+        }
+
+
+# Imported modules are shared by every Streamlit session in the process
+registry = ProfileRegistry(
+    os.environ.get("ROI_PROFILES_PATH", DEFAULT_PATH),
+    check_interval=float(os.environ.get("ROI_PROFILES_CHECK_INTERVAL", 2)),
+)
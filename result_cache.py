@@ -0,0 +1,171 @@
+"""Process-wide cache of computed results, shared by all sessions.
+
+Entries are keyed by a canonical hash of the inputs plus the assumptions
+version, evicted least-recently-used once the entry or memory cap is reached,
+and expire after a TTL. Hit/miss/eviction counters are available from
+stats(). Every caller gets the same stored object back, so numpy arrays in
+a value are made read-only when it is stored: an in-place change in one
+session would otherwise show in every other.
+
+Limits can be set through the environment:
+    ROI_CACHE_MAX_ENTRIES  (default 10000)
+    ROI_CACHE_MAX_BYTES    (default 64 MiB)
+    ROI_CACHE_TTL          seconds, 0 disables expiry (default 3600)
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+import roi_engine
+
+
+@lru_cache(maxsize=32)
+def assumptions_version(assumptions=roi_engine.DEFAULT_ASSUMPTIONS):
+    """Short fingerprint of the assumption values, part of every cache key."""
+    payload = json.dumps([float(value) for value in assumptions], separators=(",", ":"))
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+def make_key(kind, inputs, include=None, assumptions=roi_engine.DEFAULT_ASSUMPTIONS):
+    """Canonical key for ``inputs`` (and checkbox ``include`` flags).
+
+    Numbers are normalised to floats and keys sorted, so 1000 and 1000.0 or a
+    different dict order map to the same entry.
+    """
+    canonical = {
+        "kind": kind,
+        "version": assumptions_version(assumptions),
+        "inputs": {name: float(value) for name, value in sorted(inputs.items())},
+    }
+    if include is not None:
+        canonical["include"] = {name: bool(value) for name, value in sorted(include.items())}
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def estimate_size(value):
+    """Rough size in bytes of a cached value."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 112
+    if hasattr(value, "memory_usage"):
+        # pandas DataFrame / Series
+        usage = value.memory_usage(index=True, deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if hasattr(type(value), "__slots__"):
+        # e.g. results_table.ResultsTable
+        return sys.getsizeof(value) + sum(estimate_size(getattr(value, name)) for name in type(value).__slots__)
+    return sys.getsizeof(value)
+
+
+def freeze(value):
+    """Make the numpy arrays in ``value`` read-only, in place; returns ``value``."""
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, dict):
+        for item in value.values():
+            freeze(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            freeze(item)
+    elif hasattr(type(value), "__slots__"):
+        # e.g. results_table.ResultsTable
+        for name in type(value).__slots__:
+            freeze(getattr(value, name, None))
+    return value
+
+
+class ResultCache:
+    """Thread-safe LRU cache with a TTL and a memory cap."""
+
+    def __init__(self, max_entries=10_000, max_bytes=64 * 1024 * 1024, ttl=3600.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, size, stored_at)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if self.ttl and time.monotonic() - entry[2] > self.ttl:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size=None):
+        size = estimate_size(value) if size is None else size
+        freeze(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for ``key``, computing and storing it on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Imported modules are shared by every Streamlit session in the process
+shared_cache = ResultCache(
+    max_entries=int(os.environ.get("ROI_CACHE_MAX_ENTRIES", 10_000)),
+    max_bytes=int(os.environ.get("ROI_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    ttl=float(os.environ.get("ROI_CACHE_TTL", 3600)),
+)
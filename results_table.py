@@ -0,0 +1,110 @@
+"""Typed results table for one scenario's line item breakdown.
+
+ResultsTable keeps the breakdown as columns of raw values: the line item
+key and label, then hours and dollars saved as contiguous float64 arrays.
+Cells that do not apply (licence spend has no hours) are NaN, written as
+empty/null in exports, and excluded line items are 0. Nothing is formatted
+until the table is displayed, so exports stay numeric:
+
+    table.to_csv()       CSV bytes
+    table.to_arrow()     pyarrow.Table sharing the float arrays' memory
+    table.to_parquet()   Parquet bytes (needs pyarrow, see PARQUET_AVAILABLE)
+    table.to_frame()     pandas DataFrame
+    table.display_rows() formatted rows for the page and the PDF
+"""
+import importlib.util
+from functools import lru_cache
+from io import BytesIO
+
+import numpy as np
+
+import roi_engine
+
+ITEM_KEYS = tuple(key for key, _, _, _ in roi_engine.LINE_ITEMS)
+
+ITEM_LABELS = tuple(label for _, label, _, _ in roi_engine.LINE_ITEMS)
+
+# Column names in exports
+EXPORT_COLUMNS = ("item", "automation_item", "hours_saved", "dollars_saved")
+
+# Column headings when displayed
+DISPLAY_COLUMNS = ("Automation Item", "Hours Saved", "$ Saved")
+
+# Whether to_arrow() and to_parquet() can work; checked without importing pyarrow
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+
+class ResultsTable:
+    """Hours and dollars saved per line item, in roi_engine.LINE_ITEMS order."""
+
+    __slots__ = ("hours", "dollars")
+
+    def __init__(self, hours, dollars):
+        self.hours = hours
+        self.dollars = dollars
+
+    @classmethod
+    def from_line_items(cls, line_items, include=None):
+        """Table from calculate_line_items() output (scalars per column).
+
+        ``include`` maps line item keys to bools; missing keys count as
+        included, excluded items are 0.
+        """
+        include = include or {}
+        hours = np.empty(len(roi_engine.LINE_ITEMS))
+        dollars = np.empty(len(roi_engine.LINE_ITEMS))
+        for row, (key, _, hours_col, dollars_col) in enumerate(roi_engine.LINE_ITEMS):
+            included = include.get(key, True)
+            hours[row] = np.nan if hours_col is None else (float(line_items[hours_col]) if included else 0.0)
+            dollars[row] = float(line_items[dollars_col]) if included else 0.0
+        return cls(hours, dollars)
+
+    def __len__(self):
+        return len(self.hours)
+
+    def display_rows(self):
+        """Rows of formatted strings under DISPLAY_COLUMNS."""
+        return [
+            [label, "-" if np.isnan(hours) else f"{hours:,.1f}", f"${dollars:,.0f}"]
+            for label, hours, dollars in zip(ITEM_LABELS, self.hours.tolist(), self.dollars.tolist())
+        ]
+
+    def to_frame(self):
+        import pandas as pd
+        return pd.DataFrame(dict(zip(EXPORT_COLUMNS, (ITEM_KEYS, ITEM_LABELS, self.hours, self.dollars))),
+                            copy=False)
+
+    def to_arrow(self):
+        import pyarrow as pa
+        keys, labels = _arrow_labels()
+        # The float arrays are wrapped, not copied; NaN cells become nulls
+        return pa.Table.from_arrays([keys, labels, pa.array(self.hours, from_pandas=True),
+                                     pa.array(self.dollars, from_pandas=True)],
+                                    names=list(EXPORT_COLUMNS))
+
+    def to_csv(self):
+        try:
+            import pyarrow.csv as pa_csv
+        except ImportError:
+            return self.to_frame().to_csv(index=False).encode("utf-8")
+        buffer = BytesIO()
+        pa_csv.write_csv(self.to_arrow(), buffer)
+        return buffer.getvalue()
+
+    def to_parquet(self):
+        import pyarrow.parquet as pq
+        buffer = BytesIO()
+        pq.write_table(self.to_arrow(), buffer)
+        return buffer.getvalue()
+
+
+def from_scenario(results):
+    """Table for a calculate_scenario() result, all line items included."""
+    return ResultsTable.from_line_items(results)
+
+
+@lru_cache(maxsize=1)
+def _arrow_labels():
+    # The key and label columns never change, so they are built once per process
+    import pyarrow as pa
+    return pa.array(ITEM_KEYS), pa.array(ITEM_LABELS)
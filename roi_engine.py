@@ -0,0 +1,224 @@
+"""Vectorized ROI engine shared by the Streamlit page and the batch tools.
+
+Every function here accepts scalars or equal-length NumPy arrays (or anything
+np.asarray understands, e.g. pandas Series) and evaluates all rows in one
+pass, so the same code scores a single sidebar scenario or millions of
+prospects.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# Constants (from your VBA module)
+SAVING_PCT_LICENSE = 0.6
+LICENCE_SPEND_REDUCTION_PCT = 0.05
+MIN_PER_DEVICE_DISCOVERY = 10
+HOURS_PER_ASSET_REPORT = 0.5
+SAVING_PCT_ASSET = 0.8
+CRITICAL_DEVICE_PCT = 0.3
+MIN_PER_CHECK_MANUAL = 5
+MIN_PER_CHECK_AUTOMATED = 1
+MIN_PER_DEVICE_VULN_PER_YEAR = 10
+HOURS_PER_REPORT = 312
+
+# The assumptions the savings formulas depend on. Fields may be floats or
+# arrays (one value per row), which is how sensitivity runs vary them.
+Assumptions = namedtuple("Assumptions", [
+    "saving_pct_license",
+    "licence_spend_reduction_pct",
+    "min_per_device_discovery",
+    "hours_per_asset_report",
+    "saving_pct_asset",
+    "critical_device_pct",
+    "min_per_check_manual",
+    "min_per_check_automated",
+    "min_per_device_vuln_per_year",
+    "hours_per_report",
+])
+
+DEFAULT_ASSUMPTIONS = Assumptions(
+    saving_pct_license=SAVING_PCT_LICENSE,
+    licence_spend_reduction_pct=LICENCE_SPEND_REDUCTION_PCT,
+    min_per_device_discovery=MIN_PER_DEVICE_DISCOVERY,
+    hours_per_asset_report=HOURS_PER_ASSET_REPORT,
+    saving_pct_asset=SAVING_PCT_ASSET,
+    critical_device_pct=CRITICAL_DEVICE_PCT,
+    min_per_check_manual=MIN_PER_CHECK_MANUAL,
+    min_per_check_automated=MIN_PER_CHECK_AUTOMATED,
+    min_per_device_vuln_per_year=MIN_PER_DEVICE_VULN_PER_YEAR,
+    hours_per_report=HOURS_PER_REPORT,
+)
+
+# Inputs the savings formulas read (num_employees is display-only)
+INPUT_FIELDS = (
+    "num_devices",
+    "hourly_rate",
+    "licence_requests",
+    "licence_hours",
+    "licence_spend",
+    "reports_per_year",
+    "checks_per_year",
+    "sub_cost",
+)
+
+# Sidebar defaults
+DEFAULT_INPUTS = {
+    "num_employees": 1000,
+    "num_devices": 10000,
+    "hourly_rate": 50.0,
+    "licence_requests": 1000,
+    "licence_hours": 0.5,
+    "licence_spend": 5000000,
+    "reports_per_year": 12,
+    "checks_per_year": 12,
+    "sub_cost": 100000,
+}
+
+# Line items in table order: (key, label, hours column, dollars column)
+LINE_ITEMS = (
+    ("warranty", "Warranty Requests Response Automation", "warranty_hours", "warranty_dollars"),
+    ("licence_spend", "Enterprise Software Licence Spend Optimisation", None, "licence_spend_savings"),
+    ("asset", "Asset Discovery & Inventory", "asset_hours", "asset_dollars"),
+    ("change", "Change Detection & Config Management", "change_hours", "change_dollars"),
+    ("vuln", "Vulnerability Identification", "vuln_hours", "vuln_dollars"),
+    ("report", "Report Generation & Distribution", "report_hours", "report_dollars"),
+)
+
+LINE_ITEM_COLUMNS = tuple(
+    col for _, _, hours_col, dollars_col in LINE_ITEMS
+    for col in (hours_col, dollars_col) if col is not None
+)
+
+TOTAL_COLUMNS = ("total_hours", "total_dollars", "net_savings", "roi_percentage", "payback_months")
+
+RESULT_COLUMNS = LINE_ITEM_COLUMNS + TOTAL_COLUMNS
+
+
+def _column(value):
+    return np.asarray(value, dtype=np.float64)
+
+
+def _change_hours(a, critical_devices, checks_per_year):
+    change_hours = critical_devices * checks_per_year * ((a.min_per_check_manual - a.min_per_check_automated) / 60.0)
+    return np.maximum(change_hours, 0.0)
+
+
+# The line item formulas as a dependency graph, in evaluation order: (node,
+# the inputs or earlier nodes it reads, formula taking the assumptions and
+# those values). calculate_line_items evaluates every node; scenario_graph
+# re-evaluates only the nodes downstream of a changed input.
+LINE_ITEM_GRAPH = (
+    ("warranty_hours", ("licence_requests", "licence_hours"),
+     lambda a, licence_requests, licence_hours: licence_requests * licence_hours * a.saving_pct_license),
+    ("warranty_dollars", ("warranty_hours", "hourly_rate"),
+     lambda a, hours, hourly_rate: hours * hourly_rate),
+    ("licence_spend_savings", ("licence_spend",),
+     lambda a, licence_spend: licence_spend * a.licence_spend_reduction_pct),
+    ("asset_hours", ("num_devices", "reports_per_year"),
+     lambda a, num_devices, reports_per_year: ((num_devices * (a.min_per_device_discovery / 60.0)) +
+                                               (reports_per_year * a.hours_per_asset_report)) * a.saving_pct_asset),
+    ("asset_dollars", ("asset_hours", "hourly_rate"),
+     lambda a, hours, hourly_rate: hours * hourly_rate),
+    ("critical_devices", ("num_devices",),
+     lambda a, num_devices: num_devices * a.critical_device_pct),
+    ("change_hours", ("critical_devices", "checks_per_year"), _change_hours),
+    ("change_dollars", ("change_hours", "hourly_rate"),
+     lambda a, hours, hourly_rate: hours * hourly_rate),
+    ("vuln_hours", ("num_devices",),
+     lambda a, num_devices: num_devices * (a.min_per_device_vuln_per_year / 60.0)),
+    ("vuln_dollars", ("vuln_hours", "hourly_rate"),
+     lambda a, hours, hourly_rate: hours * hourly_rate),
+    ("report_hours", ("reports_per_year",),
+     lambda a, reports_per_year: reports_per_year * a.hours_per_report),
+    ("report_dollars", ("report_hours", "hourly_rate"),
+     lambda a, hours, hourly_rate: hours * hourly_rate),
+)
+
+# Inputs the line items read, in INPUT_FIELDS order (sub_cost only enters the totals)
+LINE_ITEM_INPUTS = tuple(name for name in INPUT_FIELDS if any(name in deps for _, deps, _ in LINE_ITEM_GRAPH))
+
+
+def calculate_line_items(num_devices, hourly_rate, licence_requests, licence_hours,
+                         licence_spend, reports_per_year, checks_per_year,
+                         assumptions=DEFAULT_ASSUMPTIONS):
+    """Return a dict of hours/dollars arrays for every line item."""
+    values = {
+        "num_devices": _column(num_devices),
+        "hourly_rate": _column(hourly_rate),
+        "licence_requests": _column(licence_requests),
+        "licence_hours": _column(licence_hours),
+        "licence_spend": _column(licence_spend),
+        "reports_per_year": _column(reports_per_year),
+        "checks_per_year": _column(checks_per_year),
+    }
+    for node, deps, formula in LINE_ITEM_GRAPH:
+        values[node] = formula(assumptions, *[values[dep] for dep in deps])
+    return {column: values[column] for column in LINE_ITEM_COLUMNS}
+
+
+def calculate_totals(items, sub_cost, include=None):
+    """Return totals, ROI % and payback months for the included line items.
+
+    ``include`` maps line item keys ("warranty", "asset", ...) to a bool or a
+    per-row bool array; missing keys count as included.
+    """
+    include = include or {}
+    sub_cost = _column(sub_cost)
+
+    shape = np.broadcast(sub_cost, *items.values()).shape
+    total_hours = np.zeros(shape)
+    total_dollars = np.zeros(shape)
+    for key, _, hours_col, dollars_col in LINE_ITEMS:
+        mask = include.get(key, True)
+        if np.ndim(mask) == 0:
+            if not mask:
+                continue
+            if hours_col is not None:
+                total_hours += items[hours_col]
+            total_dollars += items[dollars_col]
+        else:
+            mask = np.asarray(mask, dtype=bool)
+            if hours_col is not None:
+                total_hours += np.where(mask, items[hours_col], 0.0)
+            total_dollars += np.where(mask, items[dollars_col], 0.0)
+
+    net_savings = total_dollars - sub_cost
+
+    # Same guards as the page: 0 when there is no subscription or no savings
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi_percentage = np.where(sub_cost > 0, net_savings / sub_cost * 100, 0.0)
+        monthly_savings = np.where(total_dollars > 0, total_dollars / 12, 0.0)
+        payback_months = np.where(monthly_savings > 0, sub_cost / monthly_savings, 0.0)
+
+    return {
+        "total_hours": total_hours,
+        "total_dollars": total_dollars,
+        "net_savings": net_savings,
+        "roi_percentage": roi_percentage,
+        "payback_months": payback_months,
+    }
+
+
+def calculate(inputs, assumptions=DEFAULT_ASSUMPTIONS, include=None):
+    """Score columnar ``inputs`` (a mapping of INPUT_FIELDS to arrays).
+
+    Returns a dict with every line item and total in RESULT_COLUMNS order.
+    """
+    items = calculate_line_items(
+        inputs["num_devices"],
+        inputs["hourly_rate"],
+        inputs["licence_requests"],
+        inputs["licence_hours"],
+        inputs["licence_spend"],
+        inputs["reports_per_year"],
+        inputs["checks_per_year"],
+        assumptions=assumptions,
+    )
+    results = dict(items)
+    results.update(calculate_totals(items, inputs["sub_cost"], include))
+    return results
+
+
+def calculate_scenario(inputs, assumptions=DEFAULT_ASSUMPTIONS, include=None):
+    """Score a single scenario and return plain Python floats."""
+    return {key: float(value) for key, value in calculate(inputs, assumptions, include).items()}
@@ -0,0 +1,127 @@
+"""Side-by-side scenarios recomputed incrementally over the calculation graph.
+
+ScenarioGraph holds every input, intermediate (critical_devices, ...), line
+item and total as one array with a row per scenario. Changing an input in
+one scenario marks only the nodes downstream of it in
+roi_engine.LINE_ITEM_GRAPH, and only in that scenario's row; the next read
+re-evaluates just those cells. Raising hourly_rate, for example, reruns the
+five dollar nodes and the totals, but not the hours or critical_devices.
+
+    graph = ScenarioGraph([current, proposed])
+    graph.set(1, "num_devices", 25_000)
+    graph.results()["roi_percentage"]   # one value per scenario
+
+``evaluations`` counts node evaluations per node, which is what the
+comparison page and the benchmarks watch.
+"""
+from collections import Counter
+
+import numpy as np
+
+import roi_engine
+
+# Everything the totals read
+TOTAL_DEPS = roi_engine.LINE_ITEM_COLUMNS + ("sub_cost",)
+
+TOTALS_NODE = "totals"
+
+_ORDER = tuple(node for node, _, _ in roi_engine.LINE_ITEM_GRAPH) + (TOTALS_NODE,)
+
+
+def _downstream():
+    """{input or node: nodes that depend on it, directly or not, in evaluation order}."""
+    deps = {node: set(node_deps) for node, node_deps, _ in roi_engine.LINE_ITEM_GRAPH}
+    deps[TOTALS_NODE] = set(TOTAL_DEPS)
+    affected = {}
+    for name in roi_engine.INPUT_FIELDS + _ORDER:
+        reached = {name}
+        for node in _ORDER:
+            if deps[node] & reached:
+                reached.add(node)
+        affected[name] = tuple(node for node in _ORDER if node in reached and node != name)
+    return affected
+
+
+DOWNSTREAM = _downstream()
+
+
+class ScenarioGraph:
+    """Line items and totals for a few scenarios, recomputed only where inputs change."""
+
+    def __init__(self, scenarios, assumptions=roi_engine.DEFAULT_ASSUMPTIONS, include=None):
+        n = len(scenarios)
+        self.assumptions = assumptions
+        self.include = dict(include or {})
+        self.values = {
+            field: np.array([float(scenario.get(field, roi_engine.DEFAULT_INPUTS[field])) for scenario in scenarios])
+            for field in roi_engine.INPUT_FIELDS
+        }
+        for node in roi_engine.LINE_ITEM_GRAPH:
+            self.values[node[0]] = np.zeros(n)
+        for column in roi_engine.TOTAL_COLUMNS:
+            self.values[column] = np.zeros(n)
+        # Rows of each node that need re-evaluating
+        self._dirty = {node: np.ones(n, dtype=bool) for node in _ORDER}
+        self.evaluations = Counter()
+
+    def __len__(self):
+        return len(self.values["sub_cost"])
+
+    def _mark(self, name, rows=slice(None)):
+        for node in DOWNSTREAM[name]:
+            self._dirty[node][rows] = True
+
+    def set(self, row, field, value):
+        """Change one input of one scenario; returns False when it is unchanged."""
+        value = float(value)
+        if self.values[field][row] == value:
+            return False
+        self.values[field][row] = value
+        self._mark(field, row)
+        return True
+
+    def update(self, row, inputs):
+        """set() every field of ``inputs`` that the formulas read; returns the fields that changed."""
+        return [field for field in roi_engine.INPUT_FIELDS
+                if field in inputs and self.set(row, field, inputs[field])]
+
+    def set_assumptions(self, assumptions):
+        if assumptions != self.assumptions:
+            self.assumptions = assumptions
+            for node in _ORDER:
+                self._dirty[node][:] = True
+
+    def set_include(self, include):
+        include = dict(include or {})
+        if include != self.include:
+            self.include = include
+            self._dirty[TOTALS_NODE][:] = True
+
+    def _recompute(self):
+        values = self.values
+        for node, deps, formula in roi_engine.LINE_ITEM_GRAPH:
+            dirty = self._dirty[node]
+            if not dirty.any():
+                continue
+            rows = np.flatnonzero(dirty)
+            values[node][rows] = formula(self.assumptions, *[values[dep][rows] for dep in deps])
+            self.evaluations[node] += len(rows)
+            dirty[:] = False
+
+        dirty = self._dirty[TOTALS_NODE]
+        if dirty.any():
+            rows = np.flatnonzero(dirty)
+            items = {column: values[column][rows] for column in roi_engine.LINE_ITEM_COLUMNS}
+            for column, totals in roi_engine.calculate_totals(items, values["sub_cost"][rows], self.include).items():
+                values[column][rows] = totals
+            self.evaluations[TOTALS_NODE] += len(rows)
+            dirty[:] = False
+
+    def results(self):
+        """{column: array with a value per scenario} for RESULT_COLUMNS, brought up to date."""
+        self._recompute()
+        return {column: self.values[column] for column in roi_engine.RESULT_COLUMNS}
+
+    def scenario(self, row):
+        """Results of one scenario as plain floats."""
+        return {column: float(values[row]) for column, values in self.results().items()}
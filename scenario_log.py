@@ -0,0 +1,402 @@
+"""Append-only log of calculated scenarios and incremental rollups over it.
+
+Usage:
+    python scenario_log.py rollup                  # fold new segments into rollup.json
+    python scenario_log.py query --band 5k-20k --profile msp --metric roi_percentage
+
+record() queues one row per scenario shown on the results page (inputs,
+line items, totals, profile and included line items) for a background
+writer, the same write-behind queue the lead store uses, so the page never
+waits on disk. Rows go to Parquet segments in ROI_SCENARIO_LOG_DIR
+(default scenario_log/ next to this file). A segment is written as
+"<start>-<pid>.parquet.inprogress" and renamed to "<start>-<pid>.parquet"
+once it holds ROI_SCENARIO_LOG_SEGMENT_ROWS rows (default 100000), once it
+is older than ROI_SCENARIO_LOG_SEGMENT_SECONDS (default 300) and at
+shutdown. The age is checked on every write and by the writer thread
+while the queue is idle, so a quiet server still finishes its segment on
+time. Finished segments never change.
+
+The rollup keeps, per device band and profile, a count and a mergeable
+quantile sketch of each of ROLLUP_METRICS. The rollup job reads only the
+finished segments it has not seen, sketches each of them per
+(band, profile) and merges the result into every level it rolls up to
+(that band and profile, the band, the profile, everything), so queries
+are a lookup and never scan history. Run it from one place at a time
+(e.g. cron); the rollup is replaced atomically.
+
+Recording needs pyarrow; without it record() does nothing.
+"""
+import argparse
+import atexit
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+import lead_store
+import roi_engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenario_log")
+
+ROLLUP_FILE = "rollup.json"
+
+SEGMENT_SUFFIX = ".parquet"
+
+IN_PROGRESS_SUFFIX = ".inprogress"
+
+INCLUDE_KEYS = tuple(key for key, _, _, _ in roi_engine.LINE_ITEMS)
+
+NUMERIC_COLUMNS = (("num_employees",) + roi_engine.INPUT_FIELDS + roi_engine.LINE_ITEM_COLUMNS
+                   + roi_engine.TOTAL_COLUMNS)
+
+# Upper bounds of the device bands and their labels
+DEVICE_BANDS = (1_000, 5_000, 20_000, 100_000)
+BAND_LABELS = ("<1k", "1k-5k", "5k-20k", "20k-100k", "100k+")
+
+ROLLUP_METRICS = ("roi_percentage", "payback_months", "net_savings", "total_dollars", "hourly_rate")
+
+# Label of the rollup level that covers every band or every profile
+ALL = "*"
+
+# Rows buffered in memory before a Parquet row group is written
+ROW_GROUP_ROWS = 10_000
+
+# Quantiles from the sketch are within 1% of the true value
+RELATIVE_ACCURACY = 0.01
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+
+class QuantileSketch:
+    """Relative-error quantile sketch with logarithmic buckets (DDSketch).
+
+    A value x > 0 is counted in bucket ceil(log_gamma(x)); negative values in
+    a mirrored set of buckets. Merging adds bucket counts, so sketches of
+    separate segments combine into exactly the sketch of all their rows.
+    """
+
+    __slots__ = ("positive", "negative", "zero", "count")
+
+    def __init__(self, positive=None, negative=None, zero=0):
+        self.positive = Counter(positive or {})
+        self.negative = Counter(negative or {})
+        self.zero = zero
+        self.count = zero + sum(self.positive.values()) + sum(self.negative.values())
+
+    def add(self, values):
+        """Count an array of values; NaN is ignored."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self.zero += int(np.count_nonzero(values == 0))
+        for sign, buckets in ((1, self.positive), (-1, self.negative)):
+            side = values[values * sign > 0] * sign
+            if len(side):
+                keys, counts = np.unique(np.ceil(np.log(side) / _LOG_GAMMA).astype(np.int64), return_counts=True)
+                buckets.update(dict(zip(keys.tolist(), counts.tolist())))
+
+    def merge(self, other):
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zero += other.zero
+        self.count += other.count
+        return self
+
+    def quantile(self, q):
+        """Estimate of the ``q`` quantile (0..1), or NaN when empty."""
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        # Most negative first: the largest negative bucket holds the smallest values
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -2 * _GAMMA ** key / (_GAMMA + 1)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return 2 * _GAMMA ** key / (_GAMMA + 1)
+        return math.nan
+
+    def to_dict(self):
+        return {
+            "positive": {str(key): count for key, count in self.positive.items()},
+            "negative": {str(key): count for key, count in self.negative.items()},
+            "zero": self.zero,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({int(key): count for key, count in data["positive"].items()},
+                   {int(key): count for key, count in data["negative"].items()}, data["zero"])
+
+
+def device_band(num_devices):
+    """BAND_LABELS entry for each device count in an array."""
+    return np.asarray(BAND_LABELS, dtype=object)[np.searchsorted(DEVICE_BANDS, num_devices, side="right")]
+
+
+class Rollup:
+    """Counts and sketches per (device band, profile), with ALL levels pre-merged."""
+
+    def __init__(self, groups=None, segments=()):
+        # {(band, profile): {metric: QuantileSketch}}
+        self.groups = groups or {}
+        self.segments = set(segments)
+
+    def _group(self, key):
+        if key not in self.groups:
+            self.groups[key] = {metric: QuantileSketch() for metric in ROLLUP_METRICS}
+        return self.groups[key]
+
+    def add_rows(self, columns):
+        """Fold a dict of equal-length arrays (profile, num_devices and ROLLUP_METRICS) in."""
+        band_codes = np.searchsorted(DEVICE_BANDS, np.asarray(columns["num_devices"], dtype=np.float64), side="right")
+        profile_names, profile_codes = np.unique(np.asarray(columns["profile"]).astype(str), return_inverse=True)
+        codes = band_codes * len(profile_names) + profile_codes
+        for code in np.unique(codes).tolist():
+            rows = codes == code
+            band, profile = BAND_LABELS[code // len(profile_names)], str(profile_names[code % len(profile_names)])
+            # Sketch the rows once, then merge the small sketch into each level it rolls up to
+            delta = {metric: QuantileSketch() for metric in ROLLUP_METRICS}
+            for metric in ROLLUP_METRICS:
+                delta[metric].add(np.asarray(columns[metric], dtype=np.float64)[rows])
+            for level in ((band, profile), (band, ALL), (ALL, profile), (ALL, ALL)):
+                group = self._group(level)
+                for metric in ROLLUP_METRICS:
+                    group[metric].merge(delta[metric])
+
+    def count(self, band=ALL, profile=ALL):
+        group = self.groups.get((band, profile))
+        return group[ROLLUP_METRICS[0]].count if group else 0
+
+    def quantile(self, metric, q, band=ALL, profile=ALL):
+        """``q`` quantile of ``metric`` for a band and profile (ALL for any), NaN without data."""
+        group = self.groups.get((band, profile))
+        return group[metric].quantile(q) if group else math.nan
+
+    def bands(self):
+        return [band for band in BAND_LABELS if (band, ALL) in self.groups]
+
+    def profiles(self):
+        return sorted(profile for band, profile in self.groups if band == ALL and profile != ALL)
+
+    def to_dict(self):
+        return {
+            "segments": sorted(self.segments),
+            "groups": [
+                {"band": band, "profile": profile,
+                 "sketches": {metric: sketch.to_dict() for metric, sketch in sketches.items()}}
+                for (band, profile), sketches in self.groups.items()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        groups = {
+            (group["band"], group["profile"]): {
+                metric: QuantileSketch.from_dict(sketch) for metric, sketch in group["sketches"].items()
+            }
+            for group in data["groups"]
+        }
+        return cls(groups, data["segments"])
+
+
+def load_rollup(log_dir=None):
+    """The rollup saved in ``log_dir``, or an empty one."""
+    path = os.path.join(log_dir or _log_dir(), ROLLUP_FILE)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return Rollup.from_dict(json.load(f))
+    except FileNotFoundError:
+        return Rollup()
+
+
+def finished_segments(log_dir):
+    try:
+        names = os.listdir(log_dir)
+    except FileNotFoundError:
+        return []
+    return sorted(name for name in names if name.endswith(SEGMENT_SUFFIX))
+
+
+def update_rollup(log_dir=None):
+    """Fold the finished segments the rollup has not seen into it; returns (rollup, segments added)."""
+    import pyarrow.parquet as pq
+
+    log_dir = log_dir or _log_dir()
+    rollup = load_rollup(log_dir)
+    added = [name for name in finished_segments(log_dir) if name not in rollup.segments]
+    for name in added:
+        table = pq.read_table(os.path.join(log_dir, name), columns=["profile", "num_devices", *ROLLUP_METRICS])
+        rollup.add_rows({column: table.column(column).to_numpy() for column in table.column_names})
+        rollup.segments.add(name)
+    if added:
+        path = os.path.join(log_dir, ROLLUP_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(rollup.to_dict(), f, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+    return rollup, len(added)
+
+
+class ParquetSegmentStore:
+    """write_batch() target for the write-behind queue: rotating Parquet segments."""
+
+    def __init__(self, log_dir, segment_rows=100_000, segment_seconds=300.0):
+        import pyarrow as pa
+
+        self.pa = pa
+        self.log_dir = log_dir
+        self.segment_rows = segment_rows
+        self.segment_seconds = segment_seconds
+        self.schema = pa.schema(
+            [("created_at", pa.float64()), ("profile", pa.string()), ("include_mask", pa.uint8())]
+            + [(column, pa.float64()) for column in NUMERIC_COLUMNS]
+        )
+        os.makedirs(log_dir, exist_ok=True)
+        self.writer = None
+        self.path = None
+        self.started = 0.0
+        self.rows = 0
+        self.pending = []
+        self.segments = 0
+
+    def _open(self):
+        import pyarrow.parquet as pq
+
+        name = f"{time.time_ns()}-{os.getpid()}{SEGMENT_SUFFIX}"
+        self.path = os.path.join(self.log_dir, name)
+        self.writer = pq.ParquetWriter(self.path + IN_PROGRESS_SUFFIX, self.schema, compression="zstd")
+
+    def _flush(self):
+        if not self.pending:
+            return
+        if self.writer is None:
+            self._open()
+        self.writer.write_table(self.pa.Table.from_pylist(self.pending, schema=self.schema))
+        self.rows += len(self.pending)
+        self.pending = []
+
+    def _rotate(self):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.path + IN_PROGRESS_SUFFIX, self.path)
+            self.writer = None
+            self.segments += 1
+        self.rows = 0
+        self.started = 0.0
+
+    def _expired(self):
+        return bool(self.started) and time.time() - self.started >= self.segment_seconds
+
+    def write_batch(self, events):
+        # A segment's age counts from its first row, buffered or written
+        if not self.started:
+            self.started = time.time()
+        self.pending.extend(events)
+        if len(self.pending) >= ROW_GROUP_ROWS:
+            self._flush()
+        if self.rows + len(self.pending) >= self.segment_rows or self._expired():
+            self._rotate()
+
+    def tick(self):
+        """Finish the segment once it is old enough, even if no more rows arrive."""
+        if self._expired():
+            self._rotate()
+
+    def close(self):
+        self._rotate()
+
+
+def _log_dir():
+    return os.environ.get("ROI_SCENARIO_LOG_DIR", DEFAULT_DIR)
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+_unavailable = False
+
+
+def get_recorder():
+    """Process-wide queue onto the segment store, or None when pyarrow is missing."""
+    global _recorder, _unavailable
+    if _recorder is None and not _unavailable:
+        with _recorder_lock:
+            if _recorder is None and not _unavailable:
+                try:
+                    store = ParquetSegmentStore(
+                        _log_dir(),
+                        segment_rows=int(os.environ.get("ROI_SCENARIO_LOG_SEGMENT_ROWS", 100_000)),
+                        segment_seconds=float(os.environ.get("ROI_SCENARIO_LOG_SEGMENT_SECONDS", 300)),
+                    )
+                except ImportError:
+                    _unavailable = True
+                    logger.warning("pyarrow is not installed; calculated scenarios are not logged")
+                    return None
+                _recorder = lead_store.WriteBehindQueue(store, name="scenario-writer")
+                atexit.register(_recorder.close)
+    return _recorder
+
+
+def stats():
+    """Counters of the shared queue (all zero before the first scenario)."""
+    if _recorder is None:
+        return {"queued": 0, "written": 0, "dropped": 0, "failed": 0, "segments": 0}
+    return dict(_recorder.stats(), segments=_recorder.store.segments)
+
+
+def record(inputs, results, profile, include=None):
+    """Queue one calculated scenario.
+
+    ``results`` holds the line item columns and total_hours, total_dollars,
+    roi_percentage and payback_months; net savings follow from sub_cost.
+    """
+    recorder = get_recorder()
+    if recorder is None:
+        return False
+    include = include or {}
+    event = {"created_at": time.time(), "profile": profile,
+             "include_mask": sum(1 << bit for bit, key in enumerate(INCLUDE_KEYS) if include.get(key, True))}
+    for column in NUMERIC_COLUMNS:
+        if column == "net_savings":
+            event[column] = float(results["total_dollars"]) - float(inputs["sub_cost"])
+        else:
+            event[column] = float(inputs[column] if column in inputs else results[column])
+    return recorder.submit(event)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Roll up and query the calculated scenario log.")
+    parser.add_argument("--log-dir", default=None, help="log directory (default: ROI_SCENARIO_LOG_DIR or scenario_log/)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rollup", help="fold finished segments into the rollup")
+    query = commands.add_parser("query", help="print a quantile from the rollup")
+    query.add_argument("--metric", choices=ROLLUP_METRICS, default="roi_percentage")
+    query.add_argument("--quantile", type=float, default=0.5)
+    query.add_argument("--band", choices=BAND_LABELS, default=ALL)
+    query.add_argument("--profile", default=ALL)
+    args = parser.parse_args(argv)
+
+    if args.command == "rollup":
+        rollup, added = update_rollup(args.log_dir)
+        print(f"Added {added} segments; {rollup.count():,} scenarios in {len(rollup.segments)} segments")
+    else:
+        rollup = load_rollup(args.log_dir)
+        value = rollup.quantile(args.metric, args.quantile, args.band, args.profile)
+        print(f"{args.metric} P{args.quantile * 100:g} over {rollup.count(args.band, args.profile):,} scenarios: {value:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
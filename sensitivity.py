@@ -0,0 +1,201 @@
+"""Monte Carlo sensitivity analysis over the calculation assumptions.
+
+Each assumption in roi_engine.Assumptions can be given a distribution:
+
+    ("fixed", value)
+    ("uniform", low, high)
+    ("triangular", low, mode, high)
+    ("normal", mean, sd)        # clipped at 0
+
+Draws are evaluated in vectorized batches and folded into relative-error
+quantile sketches (scenario_log.QuantileSketch), so memory use does not
+depend on the number of draws and every percentile is within
+scenario_log.RELATIVE_ACCURACY of the exact value, however skewed or
+heavy-tailed the outputs are.
+"""
+from statistics import NormalDist
+
+import numpy as np
+
+import roi_engine
+from scenario_log import QuantileSketch
+
+PERCENTILES = (5, 50, 95)
+
+# Outputs summarised for every run
+METRICS = ("total_dollars", "net_savings", "roi_percentage", "payback_months")
+
+# +/- ranges the CFO deck uses unless a scenario overrides them
+DEFAULT_DISTRIBUTIONS = {
+    "saving_pct_license": ("triangular", 0.4, roi_engine.SAVING_PCT_LICENSE, 0.8),
+    "licence_spend_reduction_pct": ("triangular", 0.02, roi_engine.LICENCE_SPEND_REDUCTION_PCT, 0.10),
+    "min_per_device_discovery": ("triangular", 5, roi_engine.MIN_PER_DEVICE_DISCOVERY, 20),
+    "saving_pct_asset": ("triangular", 0.6, roi_engine.SAVING_PCT_ASSET, 0.9),
+    "critical_device_pct": ("triangular", 0.15, roi_engine.CRITICAL_DEVICE_PCT, 0.5),
+    "min_per_check_manual": ("triangular", 3, roi_engine.MIN_PER_CHECK_MANUAL, 10),
+    "min_per_check_automated": ("triangular", 0.5, roi_engine.MIN_PER_CHECK_AUTOMATED, 2),
+    "min_per_device_vuln_per_year": ("triangular", 5, roi_engine.MIN_PER_DEVICE_VULN_PER_YEAR, 20),
+}
+
+
+def sample(distribution, size, rng):
+    """Draw ``size`` values from a distribution spec."""
+    kind = distribution[0]
+    params = distribution[1:]
+    if kind == "fixed":
+        return np.full(size, float(params[0]))
+    if kind == "uniform":
+        return rng.uniform(params[0], params[1], size)
+    if kind == "triangular":
+        low, mode, high = params
+        if low == high:
+            return np.full(size, float(low))
+        return rng.triangular(low, mode, high, size)
+    if kind == "normal":
+        return np.maximum(rng.normal(params[0], params[1], size), 0.0)
+    raise ValueError(f"Unknown distribution: {kind!r}")
+
+
+def quantile(distribution, q):
+    """Inverse CDF of a distribution spec at ``q``."""
+    kind = distribution[0]
+    params = distribution[1:]
+    if kind == "fixed":
+        return float(params[0])
+    if kind == "uniform":
+        return params[0] + q * (params[1] - params[0])
+    if kind == "triangular":
+        low, mode, high = params
+        if low == high:
+            return float(low)
+        split = (mode - low) / (high - low)
+        if q < split:
+            return low + np.sqrt(q * (high - low) * (mode - low))
+        return high - np.sqrt((1 - q) * (high - low) * (high - mode))
+    if kind == "normal":
+        return max(NormalDist(params[0], params[1]).inv_cdf(q), 0.0)
+    raise ValueError(f"Unknown distribution: {kind!r}")
+
+
+class StreamingSummary:
+    """Percentiles and mean of a stream of batches in bounded memory."""
+
+    def __init__(self):
+        self.sketch = QuantileSketch()
+        self.total = 0.0
+
+    @property
+    def count(self):
+        return self.sketch.count
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        self.sketch.add(values)
+        self.total += values.sum()
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else float("nan")
+
+    def percentile(self, p):
+        return self.sketch.quantile(p / 100.0)
+
+
+def _assumptions_with(overrides, base=roi_engine.DEFAULT_ASSUMPTIONS):
+    return base._replace(**overrides)
+
+
+def centred_on(assumptions, distributions=DEFAULT_DISTRIBUTIONS):
+    """``distributions`` rescaled from the default assumptions to ``assumptions``.
+
+    Each range keeps its shape relative to its base value, so a profile that
+    doubles an assumption doubles its low, mode and high. Ranges of fractions
+    stay at or below 1.
+    """
+    centred = {}
+    for name, dist in distributions.items():
+        base = float(getattr(roi_engine.DEFAULT_ASSUMPTIONS, name))
+        value = float(getattr(assumptions, name))
+        if base == 0 or value == base:
+            centred[name] = dist
+            continue
+        params = [param * value / base for param in dist[1:]]
+        if max(dist[1:]) <= 1:
+            params = [min(param, 1.0) for param in params]
+        centred[name] = (dist[0], *params)
+    return centred
+
+
+def tornado(inputs, distributions=None, include=None, metric="roi_percentage",
+            low_q=0.05, high_q=0.95, assumptions=roi_engine.DEFAULT_ASSUMPTIONS):
+    """One-at-a-time swings of ``metric`` for each varied assumption.
+
+    Each assumption is moved to its ``low_q`` and ``high_q`` quantile while
+    the others stay at their base values in ``assumptions``. Rows are sorted
+    by swing size and ``share`` is each row's share of the summed squared
+    swings.
+    """
+    distributions = centred_on(assumptions) if distributions is None else distributions
+    varied = [name for name, dist in distributions.items() if dist[0] != "fixed"]
+    if not varied:
+        return []
+
+    # Evaluate base + low/high for every assumption in one vectorized call
+    n = 1 + 2 * len(varied)
+    columns = {}
+    for name in roi_engine.Assumptions._fields:
+        columns[name] = np.full(n, float(getattr(assumptions, name)))
+    for i, name in enumerate(varied):
+        columns[name][1 + 2 * i] = quantile(distributions[name], low_q)
+        columns[name][2 + 2 * i] = quantile(distributions[name], high_q)
+    values = roi_engine.calculate(inputs, roi_engine.Assumptions(**columns), include)[metric]
+
+    base = float(values[0])
+    rows = []
+    for i, name in enumerate(varied):
+        low = float(values[1 + 2 * i])
+        high = float(values[2 + 2 * i])
+        rows.append({"assumption": name, "low": low - base, "high": high - base, "swing": abs(high - low)})
+    total = sum(row["swing"] ** 2 for row in rows)
+    for row in rows:
+        row["share"] = row["swing"] ** 2 / total if total else 0.0
+    rows.sort(key=lambda row: row["swing"], reverse=True)
+    return rows
+
+
+def run(inputs, distributions=None, draws=1_000_000, batch_size=250_000, include=None, seed=None,
+        assumptions=roi_engine.DEFAULT_ASSUMPTIONS):
+    """Run ``draws`` Monte Carlo samples for a single scenario.
+
+    Assumptions without a distribution keep their value in ``assumptions``;
+    the default distributions are centred on it.
+
+    Returns ``{"percentiles": {metric: {5: .., 50: .., 95: ..}}, "mean": {...},
+    "draws": n, "tornado": [...]}``.
+    """
+    distributions = centred_on(assumptions) if distributions is None else distributions
+    unknown = set(distributions) - set(roi_engine.Assumptions._fields)
+    if unknown:
+        raise ValueError(f"Unknown assumptions: {', '.join(sorted(unknown))}")
+
+    rng = np.random.default_rng(seed)
+    summaries = {metric: StreamingSummary() for metric in METRICS}
+    done = 0
+    while done < draws:
+        size = min(batch_size, draws - done)
+        overrides = {name: sample(dist, size, rng) for name, dist in distributions.items()}
+        results = roi_engine.calculate(inputs, _assumptions_with(overrides, assumptions), include)
+        for metric in METRICS:
+            summaries[metric].update(results[metric])
+        done += size
+
+    return {
+        "draws": done,
+        "percentiles": {
+            metric: {p: summaries[metric].percentile(p) for p in PERCENTILES}
+            for metric in METRICS
+        },
+        "mean": {metric: summaries[metric].mean for metric in METRICS},
+        "tornado": tornado(inputs, distributions, include, assumptions=assumptions),
+    }
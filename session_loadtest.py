@@ -0,0 +1,429 @@
+"""Concurrent-session capacity test for the Streamlit app.
+
+Usage:
+    python session_loadtest.py --spawn --sessions 500
+    python session_loadtest.py --spawn --sessions 500 --lean
+    python session_loadtest.py --spawn --sessions 200 --upload-devices 20000 --lean
+    python session_loadtest.py --url http://127.0.0.1:8501 --sessions 200 --server-pid 1234
+
+Each simulated session opens the websocket a browser tab uses
+(/_stcore/stream) and walks the real flow: first load, a new device count,
+Calculate ROI, the email gate and two line item checkbox toggles (fragment
+reruns). With --upload-devices, each session also uploads an Open-AudIT
+device export of that many rows after the email gate, as a visitor
+importing their inventory does. A step's latency is the time from sending
+the rerun to the server reporting the script finished. At most
+--concurrency sessions are mid-flow at once, but every session stays
+connected until all have finished, as open tabs do.
+
+The server's resident memory is sampled after a warm-up session and again
+with every session connected and idle; the difference divided by the
+session count is what one session costs. The run fails (exit code 1) when
+a step raises in the app or that cost exceeds
+lean_sessions.SESSION_MEMORY_BUDGET. With --spawn the server is started
+for the test (with --lean in lean session mode, see lean_sessions.py),
+keeping its lead store and scenario log in a temporary directory. Memory
+is read from /proc, so it needs Linux; --server-pid names the process when
+testing a server this script did not start.
+
+Needs the websockets package (pip install websockets).
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import uuid
+from http.cookies import SimpleCookie
+from urllib.parse import urlparse
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.NumberInput_pb2 import NumberInput
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+import lean_sessions
+
+STEPS = ("load", "inputs", "calculate", "email_gate", "upload", "toggle_1", "toggle_2")
+
+WIDGET_KINDS = frozenset(("button", "checkbox", "number_input", "text_input", "selectbox", "form_submit_button",
+                          "file_uploader"))
+
+# Streamlit's double-submit cookie for uploads (when XSRF protection is on)
+XSRF_COOKIE = "_streamlit_xsrf"
+
+_DONE = (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY)
+
+
+def _import_websockets():
+    try:
+        import websockets
+    except ImportError:
+        sys.exit("The session load test needs websockets: pip install websockets")
+    return websockets
+
+
+class AppError(Exception):
+    """The app raised while running a step."""
+
+
+class SimulatedSession:
+    """One browser tab: a websocket to the app and the widget values it would send."""
+
+    def __init__(self, url):
+        self.url = url
+        self.ws = None
+        self.session_id = ""
+        self.page_script_hash = ""
+        # {widget id: (element kind, element proto, fragment id)} from the last runs
+        self.widgets = {}
+        # {widget id: WidgetState} for values this session has changed
+        self.values = {}
+        # Widget ids the last rerun sent
+        self.shown = set()
+
+    async def connect(self):
+        websockets = _import_websockets()
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None,
+                                           open_timeout=60, ping_interval=None)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    def find(self, kind, label=None, key=None):
+        for widget_id, (widget_kind, element, _) in self.widgets.items():
+            if widget_kind == kind and (label is None or element.label == label) and (
+                    key is None or widget_id.endswith(f"-{key}")):
+                return widget_id
+        raise LookupError(f"No {kind} {label or key!r} on the page")
+
+    async def upload(self, widget_id, name, data, xsrf=None):
+        """Upload a file to a file uploader as the browser does; the next rerun sends it."""
+        msg = BackMsg()
+        msg.file_urls_request.request_id = widget_id
+        msg.file_urls_request.file_names.append(name)
+        msg.file_urls_request.session_id = self.session_id
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            reply = ForwardMsg.FromString(await self.ws.recv())
+            if reply.WhichOneof("type") == "file_urls_response" and reply.file_urls_response.response_id == widget_id:
+                break
+        if reply.file_urls_response.error_msg:
+            raise AppError(reply.file_urls_response.error_msg)
+        file_urls = reply.file_urls_response.file_urls[0]
+        await asyncio.to_thread(_put_file, _app_url(self.url) + file_urls.upload_url, name, data, xsrf)
+        state = WidgetState(id=widget_id)
+        state.file_uploader_state_value.uploaded_file_info.add(
+            name=name, size=len(data), file_id=file_urls.file_id, file_urls=file_urls)
+        self.values[widget_id] = state
+
+    def set_value(self, widget_id, value):
+        kind, element, _ = self.widgets[widget_id]
+        state = WidgetState(id=widget_id)
+        if kind == "number_input":
+            if element.data_type == NumberInput.INT:
+                state.int_value = int(value)
+            else:
+                state.double_value = float(value)
+        elif kind == "checkbox":
+            state.bool_value = bool(value)
+        elif kind == "text_input":
+            state.string_value = str(value)
+        else:
+            raise ValueError(f"Cannot set a {kind}")
+        self.values[widget_id] = state
+
+    async def rerun(self, triggers=(), fragment_key=None):
+        """Send a rerun like the browser does and wait for it to finish; returns seconds."""
+        msg = BackMsg()
+        client_state = msg.rerun_script
+        client_state.page_script_hash = self.page_script_hash
+        client_state.widget_states.widgets.extend(self.values.values())
+        client_state.widget_states.widgets.extend(WidgetState(id=widget_id, trigger_value=True)
+                                                  for widget_id in triggers)
+        if fragment_key is not None:
+            client_state.fragment_id = self.widgets[fragment_key][2]
+        self.shown = set()
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            reply = ForwardMsg.FromString(await self.ws.recv())
+            kind = reply.WhichOneof("type")
+            if kind == "new_session":
+                self.session_id = reply.new_session.initialize.session_id
+                self.page_script_hash = reply.new_session.page_script_hash
+            elif kind == "delta" and reply.delta.WhichOneof("type") == "new_element":
+                element = reply.delta.new_element
+                element_kind = element.WhichOneof("type")
+                if element_kind == "exception":
+                    raise AppError(f"{element.exception.type}: {element.exception.message}")
+                if element_kind == "button" and element.button.is_form_submitter:
+                    element_kind = "form_submit_button"
+                if element_kind in WIDGET_KINDS:
+                    proto = getattr(element, element.WhichOneof("type"))
+                    self.widgets[proto.id] = (element_kind, proto, reply.delta.fragment_id)
+                    self.shown.add(proto.id)
+            elif kind == "script_finished":
+                if reply.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise AppError("The app failed to compile")
+                # st.rerun() ends a run early and starts the next one; wait for that
+                if reply.script_finished in _DONE:
+                    return time.perf_counter() - start
+
+    async def run_flow(self, number, device_export=None, xsrf=None):
+        """The steps of STEPS, uploading ``device_export`` if given; returns {step: seconds}."""
+        timings = {"load": await self.rerun()}
+        self.set_value(self.find("number_input", label="Number of IT Devices"), random.randint(500, 50_000))
+        timings["inputs"] = await self.rerun()
+        timings["calculate"] = await self.rerun([self.find("button", label="Calculate ROI")])
+        self.set_value(self.find("text_input", label="Work Email Address"), f"loadtest{number}@example.com")
+        timings["email_gate"] = await self.rerun([self.find("form_submit_button", label="Show My Results")])
+        if device_export is not None:
+            uploader = self.find("file_uploader", label="Device export (CSV or JSON)")
+            await self.upload(uploader, f"devices{number}.csv", device_export, xsrf)
+            timings["upload"] = await self.rerun()
+            # A browser stops sending a widget's value once the widget is gone
+            # (lean mode gives the uploader a new key after the import)
+            if uploader not in self.shown:
+                del self.values[uploader]
+        for step, key in (("toggle_1", "chk1"), ("toggle_2", "chk3")):
+            checkbox = self.find("checkbox", key=key)
+            self.set_value(checkbox, False)
+            timings[step] = await self.rerun(fragment_key=checkbox)
+        return timings
+
+
+def device_export(devices):
+    """CSV device export with ``devices`` rows, one in four of them a server."""
+    rows = ["type,class,status,criticality"]
+    rows.extend("server,server,production,high" if number % 4 == 0 else "computer,desktop,production,"
+                for number in range(devices))
+    return "\n".join(rows).encode()
+
+
+def _app_url(stream_url):
+    """http(s) address of the app behind its /_stcore/stream websocket."""
+    return stream_url.replace("ws", "http", 1)[:-len("/_stcore/stream")]
+
+
+def _put_file(url, name, data, xsrf=None):
+    """PUT one file to a Streamlit upload URL as multipart form data."""
+    boundary = uuid.uuid4().hex
+    body = b"".join((
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{name}"\r\n'
+        f"Content-Type: text/csv\r\n\r\n".encode(),
+        data,
+        f"\r\n--{boundary}--\r\n".encode(),
+    ))
+    headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    if xsrf:
+        headers.update({"X-Xsrftoken": xsrf, "Cookie": f"{XSRF_COOKIE}={xsrf}"})
+    request = urllib.request.Request(url, data=body, headers=headers, method="PUT")
+    with urllib.request.urlopen(request, timeout=60) as response:
+        response.read()
+
+
+def _xsrf_token(app_url):
+    """The XSRF cookie the server hands a browser, or None when XSRF protection is off."""
+    with urllib.request.urlopen(f"{app_url}/_stcore/health", timeout=60) as response:
+        cookies = SimpleCookie("; ".join(response.headers.get_all("Set-Cookie") or ()))
+    return cookies[XSRF_COOKIE].value if XSRF_COOKIE in cookies else None
+
+
+def server_rss(pid):
+    """Resident memory of ``pid`` in bytes, from /proc."""
+    with open(f"/proc/{pid}/status", encoding="ascii") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError(f"No VmRSS for process {pid}")
+
+
+def _percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] if samples else float("nan")
+
+
+async def run(url, sessions, concurrency, pid=None, settle=2.0, upload_devices=0):
+    export = device_export(upload_devices) if upload_devices else None
+    xsrf = await asyncio.to_thread(_xsrf_token, _app_url(url)) if export else None
+    # Imports, caches and the first render are per process, not per session
+    warm_up = SimulatedSession(url)
+    await warm_up.connect()
+    await warm_up.run_flow(0, export, xsrf)
+    await warm_up.close()
+    await asyncio.sleep(settle)
+    baseline = server_rss(pid) if pid else None
+
+    gate = asyncio.Semaphore(concurrency)
+    all_done = asyncio.Event()
+    finished = 0
+    timings = {step: [] for step in STEPS}
+    errors = []
+    clients = [SimulatedSession(url) for _ in range(sessions)]
+
+    async def drive(number, client):
+        nonlocal finished
+        try:
+            async with gate:
+                await client.connect()
+                for step, seconds in (await client.run_flow(number, export, xsrf)).items():
+                    timings[step].append(seconds)
+        except Exception as exc:  # reported with the results
+            errors.append(f"session {number}: {type(exc).__name__}: {exc}")
+        finished += 1
+        if finished == sessions:
+            all_done.set()
+        # Stay connected, like an open tab, until every session is done
+        await all_done.wait()
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(drive(number, client)) for number, client in enumerate(clients, start=1)]
+    await all_done.wait()
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(settle)
+    loaded = server_rss(pid) if pid else None
+    await asyncio.gather(*tasks)
+    await asyncio.gather(*[client.close() for client in clients], return_exceptions=True)
+
+    reruns = [seconds for samples in timings.values() for seconds in samples]
+    result = {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "upload_devices": upload_devices,
+        "errors": len(errors),
+        "first_errors": errors[:5],
+        "elapsed_s": elapsed,
+        "reruns_per_s": len(reruns) / elapsed,
+        "rerun_p50_ms": _percentile(reruns, 0.5) * 1000,
+        "rerun_p99_ms": _percentile(reruns, 0.99) * 1000,
+        "steps": {
+            step: {"p50_ms": _percentile(samples, 0.5) * 1000, "p99_ms": _percentile(samples, 0.99) * 1000}
+            for step, samples in timings.items() if samples
+        },
+    }
+    if pid:
+        result.update({
+            "rss_baseline_mb": baseline / 2**20,
+            "rss_loaded_mb": loaded / 2**20,
+            "rss_per_session_kb": (loaded - baseline) / sessions / 1024,
+        })
+    return result
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_for_server(host, port, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(f"GET /_stcore/health HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+            await writer.drain()
+            status = await reader.readline()
+            writer.close()
+            if b" 200 " in status:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError(f"Server did not start on {host}:{port}")
+
+
+@contextlib.contextmanager
+def spawned_server(lean=False, host="127.0.0.1", port=None):
+    """Run app.py for the duration of the block and yield (stream URL, server process).
+
+    The server keeps its lead store and scenario log in a temporary
+    directory; with ``lean`` it runs in lean session mode.
+    """
+    port = port or _free_port()
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ, ROI_LEADS_DB=os.path.join(scratch, "leads.db"),
+                   ROI_SCENARIO_LOG_DIR=os.path.join(scratch, "scenario_log"),
+                   ROI_LEAN_SESSIONS="1" if lean else "0")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", "app.py", "--server.headless", "true",
+             "--server.address", host, "--server.port", str(port), "--server.fileWatcherType", "none",
+             "--browser.gatherUsageStats", "false"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            asyncio.run(_wait_for_server(host, port))
+            yield f"ws://{host}:{port}/_stcore/stream", server
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test concurrent sessions of the Open-AudIT ROI app.")
+    parser.add_argument("--url", default=None, help="app address (default: a local server with --spawn)")
+    parser.add_argument("--spawn", action="store_true", help="start app.py for the duration of the test")
+    parser.add_argument("--lean", action="store_true", help="start the server in lean session mode")
+    parser.add_argument("--server-pid", type=int, default=None, help="server process for memory sampling")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20, help="sessions mid-flow at once")
+    parser.add_argument("--upload-devices", type=int, default=0,
+                        help="rows of a device export each session uploads (default: no upload)")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args(argv)
+
+    if not args.spawn and not args.url:
+        parser.error("give --url or --spawn")
+    url = urlparse(args.url or f"http://127.0.0.1:{_free_port()}")
+    host, port = url.hostname, url.port or 80
+    stream_url = f"ws://{host}:{port}{url.path.rstrip('/')}/_stcore/stream"
+
+    def load_test(stream_url, pid):
+        return asyncio.run(run(stream_url, args.sessions, args.concurrency,
+                               pid if sys.platform.startswith("linux") else None,
+                               upload_devices=args.upload_devices))
+
+    if args.spawn:
+        with spawned_server(args.lean, host, port) as (stream_url, server):
+            result = load_test(stream_url, server.pid)
+    else:
+        result = load_test(stream_url, args.server_pid)
+
+    budget_kb = lean_sessions.SESSION_MEMORY_BUDGET / 1024
+    result["lean"] = args.lean
+    result["budget_kb"] = budget_kb
+    result["passed"] = not result["errors"] and result.get("rss_per_session_kb", 0) <= budget_kb
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        mode = "lean" if args.lean else "default"
+        upload = f", {args.upload_devices:,}-device export each" if args.upload_devices else ""
+        print(f"{args.sessions:,} sessions ({mode} mode{upload}), {args.concurrency} mid-flow at once, "
+              f"{result['errors']} errors")
+        for error in result["first_errors"]:
+            print(f"  {error}")
+        print(f"  reruns       {result['reruns_per_s']:,.1f}/s, p50 {result['rerun_p50_ms']:,.1f} ms, "
+              f"p99 {result['rerun_p99_ms']:,.1f} ms")
+        for step, latency in result["steps"].items():
+            print(f"    {step:<12} p50 {latency['p50_ms']:8,.1f} ms   p99 {latency['p99_ms']:8,.1f} ms")
+        if "rss_per_session_kb" in result:
+            print(f"  memory       {result['rss_baseline_mb']:,.0f} MB after warm-up, "
+                  f"{result['rss_loaded_mb']:,.0f} MB with every session open")
+            print(f"  per session  {result['rss_per_session_kb']:,.0f} KB (budget {budget_kb:,.0f} KB)")
+        print("  PASS" if result["passed"] else "  FAIL")
+    sys.exit(0 if result["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
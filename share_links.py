@@ -0,0 +1,201 @@
+"""Compact shareable links for a set of results.
+
+A link carries the assumption profile, the sidebar inputs, the line item
+checkboxes and any assumptions a device or licence import replaced in one
+query-string token:
+
+    https://roi.example.com/?r=Az8HZGVmYXVsdKCNBsCEPYgnoI0GMoDKte4BsAmwCYCt4gQA
+
+The token is URL-safe base64 of a version byte, a bitmask of the included
+line items, the profile name (a length byte and ASCII) and one varint per
+input in SHARE_FIELDS (stored in hundredths, the sidebar's finest
+precision), then a varint bitmask of OVERRIDE_FIELDS followed by each set
+assumption as a big-endian float64. Version 2 tokens end before the
+overrides, and version 1 tokens also have no profile name and use the
+default profile. Tokens that fail to decode are ignored.
+
+Results shown on the page are kept in ``result_store`` under their link, so
+everyone who opens the same link is served the stored results instead of
+recomputing them. The store is bounded and can be sized through the
+environment:
+    ROI_SHARE_STORE_MAX_ENTRIES  (default 20000)
+    ROI_SHARE_STORE_MAX_BYTES    (default 128 MiB)
+    ROI_SHARE_STORE_TTL          seconds, 0 disables expiry (default 7 days)
+"""
+import base64
+import binascii
+import math
+import os
+import struct
+
+import profiles
+import result_cache
+import roi_engine
+
+TOKEN_VERSION = 3
+
+QUERY_PARAM = "r"
+
+# Field order of all token versions; never reorder, add a new version instead
+SHARE_FIELDS = ("num_employees",) + roi_engine.INPUT_FIELDS
+
+# Assumptions the imports replace, in override bit order; only ever append
+OVERRIDE_FIELDS = ("critical_device_pct", "licence_spend_reduction_pct")
+
+INCLUDE_KEYS = tuple(key for key, _, _, _ in roi_engine.LINE_ITEMS)
+
+# Sidebar inputs that are whole numbers (the rest are decoded as floats)
+INTEGER_FIELDS = frozenset(name for name, value in roi_engine.DEFAULT_INPUTS.items() if isinstance(value, int))
+
+result_store = result_cache.ResultCache(
+    max_entries=int(os.environ.get("ROI_SHARE_STORE_MAX_ENTRIES", 20_000)),
+    max_bytes=int(os.environ.get("ROI_SHARE_STORE_MAX_BYTES", 128 * 1024 * 1024)),
+    ttl=float(os.environ.get("ROI_SHARE_STORE_TTL", 7 * 24 * 3600)),
+)
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+        if shift > 63:
+            raise ValueError("varint too long")
+
+
+def hundredths(value):
+    """``value`` as a whole number of hundredths, as a token stores it.
+
+    Nearest hundredth with halves up, where round() would take 0.125 to
+    0.12; the sidebar does not allow negative inputs, so they become 0.
+    """
+    return max(0, math.floor(float(value) * 100 + 0.5))
+
+
+def _from_hundredths(name, count):
+    return count // 100 if name in INTEGER_FIELDS else count / 100
+
+
+def rounded(name, value):
+    """The value sidebar input ``name`` has after a share link round trip."""
+    return _from_hundredths(name, hundredths(value))
+
+
+def assumption_overrides(assumptions, base):
+    """The OVERRIDE_FIELDS whose value in ``assumptions`` differs from the profile's ``base``."""
+    return {name: float(getattr(assumptions, name)) for name in OVERRIDE_FIELDS
+            if getattr(assumptions, name) != getattr(base, name)}
+
+
+def encode(inputs, include=None, profile=profiles.DEFAULT_PROFILE, overrides=None):
+    """Token for ``inputs`` (sidebar values), ``include`` (line item flags), a profile name and assumption overrides.
+
+    ``overrides`` maps names in OVERRIDE_FIELDS to fractions between 0 and 1.
+    """
+    overrides = overrides or {}
+    unknown = set(overrides) - set(OVERRIDE_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot share assumptions: {', '.join(sorted(unknown))}")
+    include = include or {}
+    mask = 0
+    for bit, key in enumerate(INCLUDE_KEYS):
+        if include.get(key, True):
+            mask |= 1 << bit
+    name = profile.encode("ascii")
+    out = bytearray([TOKEN_VERSION, mask, len(name)]) + name
+    for name in SHARE_FIELDS:
+        _write_varint(out, hundredths(inputs.get(name, roi_engine.DEFAULT_INPUTS[name])))
+    _write_varint(out, sum(1 << bit for bit, name in enumerate(OVERRIDE_FIELDS) if name in overrides))
+    for name in OVERRIDE_FIELDS:
+        if name in overrides:
+            out += struct.pack(">d", overrides[name])
+    return base64.urlsafe_b64encode(bytes(out)).rstrip(b"=").decode("ascii")
+
+
+def decode(token):
+    """Return (inputs, include, profile name, overrides) for a token, or None if it is missing or invalid."""
+    if not token or len(token) > 200:
+        return None
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        if len(data) < 2 or data[0] not in (1, 2, TOKEN_VERSION):
+            return None
+        mask = data[1]
+        pos = 2
+        profile = profiles.DEFAULT_PROFILE
+        if data[0] >= 2:
+            end = pos + 1 + data[pos]
+            profile = data[pos + 1:end].decode("ascii")
+            if end > len(data) or not profiles.NAME_PATTERN.fullmatch(profile):
+                return None
+            pos = end
+        inputs = {}
+        for name in SHARE_FIELDS:
+            count, pos = _read_varint(data, pos)
+            inputs[name] = _from_hundredths(name, count)
+        overrides = {}
+        if data[0] >= 3:
+            override_mask, pos = _read_varint(data, pos)
+            if override_mask >> len(OVERRIDE_FIELDS):
+                return None
+            for bit, name in enumerate(OVERRIDE_FIELDS):
+                if override_mask >> bit & 1:
+                    (value,) = struct.unpack_from(">d", data, pos)
+                    pos += 8
+                    if not 0.0 <= value <= 1.0:
+                        return None
+                    overrides[name] = value
+        if pos != len(data):
+            return None
+    except (binascii.Error, ValueError, IndexError, struct.error):
+        return None
+    include = {key: bool(mask >> bit & 1) for bit, key in enumerate(INCLUDE_KEYS)}
+    return inputs, include, profile, overrides
+
+
+def link(token, base_url=None):
+    """Full link for ``token``; the base comes from ROI_PUBLIC_URL when set."""
+    base_url = os.environ.get("ROI_PUBLIC_URL") or base_url or ""
+    return f"{base_url}?{QUERY_PARAM}={token}"
+
+
+def store_key(url, assumptions=roi_engine.DEFAULT_ASSUMPTIONS):
+    """result_store key for a link's results."""
+    return (url, result_cache.assumptions_version(assumptions))
+
+
+def share_text(inputs, totals, profile_label, url):
+    """Plain-text summary of a set of results for pasting into email or chat.
+
+    ``totals`` needs total_dollars, roi_percentage and payback_months.
+    """
+    sub_cost = inputs["sub_cost"]
+    total_dollars = float(totals["total_dollars"])
+    return f"""Open-AudIT ROI Analysis Results:
+    
+📊 Total Annual Savings: ${total_dollars:,.0f}
+💰 Annual Investment: ${sub_cost:,.0f}
+📈 ROI: {float(totals["roi_percentage"]):.0f}%
+⚡ Payback Period: {float(totals["payback_months"]):.1f} months
+💼 Net Savings: ${total_dollars - sub_cost:,.0f}
+
+Based on:
+• {inputs["num_employees"]:,} Employees
+• {inputs["num_devices"]:,} IT Devices
+• ${inputs["hourly_rate"]:.2f}/hr IT Staff Rate
+• {profile_label} assumptions
+
+View these results or calculate your own ROI: {url}
+"""
@@ -0,0 +1,156 @@
+"""Cold-start profile of the Streamlit app.
+
+Usage:
+    python startup_profile.py            # text report
+    python startup_profile.py --json     # machine-readable
+
+Each measurement runs in a fresh interpreter so nothing is already imported:
+
+* import cost of every module the app can load (cumulative, from
+  ``python -X importtime``); the list is read from app.py's import
+  statements, so new modules are profiled without editing this file
+* first render of app.py through Streamlit's headless test harness, which is
+  the time to paint the sidebar on a fresh container, plus a warm rerun
+* which heavy modules were imported by that first render
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Heavy dependencies app.py only reaches through its own modules
+INDIRECT_MODULES = ("numpy", "reportlab.platypus")
+
+
+def app_imports(path=os.path.join(HERE, "app.py")):
+    """(eager, lazy) modules imported by app.py, each in source order.
+
+    Eager imports are the module-level ones; lazy ones sit inside a feature's
+    code and should not load until it is used. Submodules of a package that
+    is already listed (streamlit.runtime...) are left out.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    found = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        found.extend((node.lineno, node.col_offset == 0, name) for name in names)
+    eager, lazy, seen = [], [], set()
+    # Module-level imports first, so a module imported both ways counts as eager
+    for _, top_level, name in sorted(found, key=lambda item: (not item[1], item[0])):
+        if name.split(".")[0] in seen:
+            continue
+        seen.add(name.split(".")[0])
+        (eager if top_level else lazy).append(name)
+    return tuple(eager), tuple(lazy)
+
+
+_EAGER, _LAZY = app_imports()
+
+# Everything app.py may import: its own imports in source order, then INDIRECT_MODULES
+PROFILED_MODULES = _EAGER + _LAZY + tuple(name for name in INDIRECT_MODULES if name not in _EAGER + _LAZY)
+
+# Should not be imported until a feature needs them
+LAZY_MODULES = _LAZY + ("reportlab",)
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.*)$")
+
+_FIRST_RENDER_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+harness = time.perf_counter() - start
+at = AppTest.from_file("app.py", default_timeout=60)
+start = time.perf_counter()
+at.run()
+first = time.perf_counter() - start
+start = time.perf_counter()
+at.run()
+warm = time.perf_counter() - start
+print(json.dumps({
+    "harness_import_s": harness,
+    "first_render_s": first,
+    "warm_rerun_s": warm,
+    "loaded": {name: name in sys.modules for name in %r},
+    "errors": [str(e.value) for e in at.exception],
+}))
+"""
+
+
+def _run(args):
+    return subprocess.run([sys.executable] + args, cwd=HERE, capture_output=True, text=True)
+
+
+def import_time(module):
+    """Cumulative import time of ``module`` in seconds, in a fresh interpreter."""
+    proc = _run(["-X", "importtime", "-c", f"import {module}"])
+    if proc.returncode != 0:
+        return None
+    cumulative = None
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match and match.group(3).strip() == module:
+            cumulative = int(match.group(2))
+    return cumulative / 1e6 if cumulative is not None else None
+
+
+def first_render():
+    """Time the first and a warm run of app.py in a fresh interpreter."""
+    proc = _run(["-c", _FIRST_RENDER_SCRIPT % (LAZY_MODULES,)])
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def profile():
+    return {
+        "python": sys.version.split()[0],
+        "imports_s": {module: import_time(module) for module in PROFILED_MODULES},
+        "first_render": first_render(),
+    }
+
+
+def format_report(report):
+    lines = ["Open-AudIT ROI Calculator - startup profile", ""]
+    lines.append("Import cost (fresh interpreter, cumulative):")
+    for module, seconds in report["imports_s"].items():
+        value = "not installed" if seconds is None else f"{seconds * 1000:8.1f} ms"
+        lines.append(f"  {module:<22} {value}")
+    lines.append("")
+
+    render = report["first_render"]
+    if "error" in render:
+        lines.append(f"First render failed: {render['error']}")
+        return "\n".join(lines)
+    lines.append("First render of app.py (headless):")
+    lines.append(f"  streamlit + harness    {render['harness_import_s'] * 1000:8.1f} ms")
+    lines.append(f"  first render           {render['first_render_s'] * 1000:8.1f} ms")
+    lines.append(f"  warm rerun             {render['warm_rerun_s'] * 1000:8.1f} ms")
+    loaded = [name for name, present in render["loaded"].items() if present]
+    lines.append("  lazy modules loaded    " + (", ".join(loaded) if loaded else "none"))
+    if render["errors"]:
+        lines.append("  errors                 " + "; ".join(render["errors"]))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile import and first-render time of the Streamlit app.")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = profile()
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""Pre-render the results view for preset scenarios as static HTML.
+
+Usage:
+    python static_pages.py site/ --base-url https://roi.example.com/
+    python static_pages.py site/ --presets presets.json --base-url https://roi.example.com/ --workers 4
+
+Each preset in the presets file (default presets.json next to this file,
+or ROI_PRESETS_PATH) gets <name>.html, the results view as the page shows
+it (metrics, breakdown table, summary box and share text), and <name>.json
+with the same numbers unformatted. index.json lists the pages. The files
+depend only on the presets, the profiles and the formulas, so they can be
+served from a plain file server or CDN and rebuilt whenever one of those
+changes:
+
+    {
+      "healthcare-1k": {
+        "title": "Hospital with 1,000 devices",
+        "profile": "healthcare",
+        "inputs": {"num_employees": 400, "num_devices": 1000, "hourly_rate": 55},
+        "include": {"licence_spend": false}
+      }
+    }
+
+Inputs and line items not listed keep the sidebar defaults. Every page
+links to the live calculator through the preset's share link, which opens
+it with the same inputs, so a visitor only starts a session when they want
+to change something. The pages are served from elsewhere, so the build
+needs the calculator's absolute address (ROI_PUBLIC_URL, or --base-url)
+and stops without one.
+
+Pages are rendered on a process pool, one preset per task; files are
+written to a temporary name and renamed, so a server never sees a partial
+page.
+"""
+import argparse
+import html
+import json
+import math
+import os
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+import assets
+import profiles
+import results_table
+import roi_engine
+import share_links
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "presets.json")
+
+LOGO_FILE = "firstwave_logo.png"
+
+Preset = namedtuple("Preset", ["name", "title", "profile", "inputs", "include"])
+
+# Layout the page's Streamlit widgets provide, for the parts PAGE_CSS does not cover
+STATIC_CSS = """
+    <style>
+    body { font-family: "Source Sans Pro", sans-serif; max-width: 1100px; margin: 0 auto; padding: 0 1rem; color: #31333f; }
+    .metrics { display: flex; gap: 1rem; margin: 1.5rem 0; }
+    .metric { flex: 1; }
+    .metric .label { font-size: 0.9rem; color: #666; }
+    .metric .value { font-size: 2.2rem; }
+    .metric .delta { font-size: 0.9rem; color: #09ab3b; }
+    table.breakdown { width: 100%; border-collapse: collapse; margin: 1rem 0 2rem; }
+    table.breakdown th, table.breakdown td { text-align: left; padding: 0.5rem; border-bottom: 1px solid #ddd; }
+    table.breakdown td.number, table.breakdown th.number { text-align: right; }
+    pre.share-text { background: #f0f2f6; padding: 1rem; border-radius: 0.5rem; white-space: pre-wrap; }
+    a.edit { display: inline-block; background: #ff4b4b; color: white; padding: 0.6rem 1.2rem;
+             border-radius: 0.5rem; text-decoration: none; margin: 1rem 0; }
+    </style>
+"""
+
+
+def compile_preset(name, spec, profile_names):
+    """Validate one presets file entry and return a Preset."""
+    if not isinstance(name, str) or not profiles.NAME_PATTERN.fullmatch(name):
+        raise ValueError(f"Preset name {name!r} must be 1-32 of a-z, 0-9, '_' or '-'")
+    if not isinstance(spec, dict):
+        raise ValueError(f"Preset {name!r} must be an object")
+    unknown = set(spec) - {"title", "profile", "inputs", "include"}
+    if unknown:
+        raise ValueError(f"Preset {name!r} has unknown keys: {', '.join(sorted(unknown))}")
+    title = spec.get("title", name)
+    if not isinstance(title, str) or not title:
+        raise ValueError(f"Preset {name!r} needs a non-empty title")
+    profile = spec.get("profile", profiles.DEFAULT_PROFILE)
+    if profile not in profile_names:
+        raise ValueError(f"Preset {name!r} uses unknown profile {profile!r}")
+
+    overrides = spec.get("inputs", {})
+    if not isinstance(overrides, dict):
+        raise ValueError(f"Preset {name!r}: inputs must be an object")
+    unknown = set(overrides) - set(roi_engine.DEFAULT_INPUTS)
+    if unknown:
+        raise ValueError(f"Preset {name!r} has unknown inputs: {', '.join(sorted(unknown))}")
+    inputs = {}
+    for field, default in roi_engine.DEFAULT_INPUTS.items():
+        value = overrides.get(field, default)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value < 0:
+            raise ValueError(f"Preset {name!r}: {field} must be a non-negative number, got {value!r}")
+        # Rounded as the share link rounds them, so the page and the live app agree
+        inputs[field] = share_links.rounded(field, value)
+
+    include = spec.get("include", {})
+    if not isinstance(include, dict) or not all(isinstance(flag, bool) for flag in include.values()):
+        raise ValueError(f"Preset {name!r}: include must map line items to true or false")
+    unknown = set(include) - set(share_links.INCLUDE_KEYS)
+    if unknown:
+        raise ValueError(f"Preset {name!r} has unknown line items: {', '.join(sorted(unknown))}")
+    include = {key: include.get(key, True) for key in share_links.INCLUDE_KEYS}
+    return Preset(name, title, profile, inputs, include)
+
+
+def load(path, profile_names):
+    """Read and validate a presets file; returns Presets in file order."""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError("The presets file must hold an object of presets")
+    return [compile_preset(name, spec, profile_names) for name, spec in config.items()]
+
+
+def render(preset, profile, base_url=None, has_logo=False):
+    """(HTML page, sidecar dict) for one preset scored under ``profile``."""
+    inputs = preset.inputs
+    results = roi_engine.calculate_scenario(inputs, profile.assumptions, preset.include)
+    table = results_table.ResultsTable.from_line_items(results, preset.include)
+    app_url = share_links.link(share_links.encode(inputs, preset.include, profile.name), base_url)
+    share_text = share_links.share_text(inputs, results, profile.label, app_url)
+
+    sub_cost = inputs["sub_cost"]
+    total_hours = results["total_hours"]
+    total_dollars = results["total_dollars"]
+    roi_percentage = results["roi_percentage"]
+    payback_months = results["payback_months"]
+
+    sidecar = {
+        "name": preset.name,
+        "title": preset.title,
+        "profile": profile.name,
+        "profile_label": profile.label,
+        "assumptions_version": profile.version,
+        "inputs": inputs,
+        "include": preset.include,
+        "totals": {column: results[column] for column in roi_engine.TOTAL_COLUMNS},
+        "line_items": [
+            dict(zip(results_table.EXPORT_COLUMNS, (key, label, None if math.isnan(hours) else hours, dollars)))
+            for key, label, hours, dollars in zip(results_table.ITEM_KEYS, results_table.ITEM_LABELS,
+                                                  table.hours.tolist(), table.dollars.tolist())
+        ],
+        "share_text": share_text,
+        "app_url": app_url,
+    }
+
+    escape = html.escape
+    payback = f"{payback_months:.1f} months" if payback_months > 0 else "N/A"
+    metrics = [
+        ("Total Annual Savings", f"${total_dollars:,.0f}", "vs current state"),
+        ("Annual Investment", f"${sub_cost:,.0f}", ""),
+        ("ROI", f"{roi_percentage:.0f}%", f"${total_dollars - sub_cost:,.0f} net savings"),
+        ("⚡ Payback Period", payback, "Break-even time" if payback_months > 0 else ""),
+    ]
+    metric_html = "".join(
+        f'<div class="metric"><div class="label">{label}</div><div class="value">{value}</div>'
+        f'<div class="delta">{delta}</div></div>'
+        for label, value, delta in metrics
+    )
+    heading = "".join(
+        f'<th class="number">{column}</th>' if i else f"<th>{column}</th>"
+        for i, column in enumerate(results_table.DISPLAY_COLUMNS)
+    )
+    rows = "".join(
+        f'<tr><td>{escape(label)}</td><td class="number">{hours}</td><td class="number">{dollars}</td></tr>'
+        for label, hours, dollars in table.display_rows()
+    )
+    if has_logo:
+        logo = f'<img src="{LOGO_FILE}" width="300" alt="FirstWave">'
+    else:
+        logo = '<h1 style="font-size: 3rem; color: #1f4788;">FirstWave</h1>'
+
+    page = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{escape(preset.title)} | Open-AudIT ROI Calculator</title>
+{assets.PAGE_CSS}
+{STATIC_CSS}
+</head>
+<body>
+<div class="hero-section">
+    {logo}
+    <p class="main-header">Open-AudIT ROI Calculator</p>
+    <p class="sub-header">{escape(preset.title)} · {escape(profile.label)} assumptions</p>
+</div>
+<h2>💡 Your ROI Results</h2>
+<div class="metrics">{metric_html}</div>
+<h3>📋 Detailed Savings Breakdown</h3>
+<table class="breakdown"><thead><tr>{heading}</tr></thead><tbody>{rows}</tbody></table>
+<div class="savings-total">
+    <h3>Total Annual Savings: ${total_dollars:,.0f}</h3>
+    <p><strong>Total Hours Saved:</strong> {total_hours:,.0f} hours/year</p>
+    <p><strong>Annual Investment:</strong> ${sub_cost:,}</p>
+    <p><strong>Net Savings:</strong> ${total_dollars - sub_cost:,.0f}</p>
+    <p><strong>Return on Investment:</strong> {roi_percentage:.0f}%</p>
+    <p><strong>⚡ Payback Period:</strong> {payback_months:.1f} months</p>
+</div>
+<a class="edit" href="{escape(app_url)}">✏️ Change These Numbers</a>
+<h3>📤 Share These Results</h3>
+<pre class="share-text">{escape(share_text)}</pre>
+<div style='text-align: center; color: #666; padding: 20px;'>
+    <p>Questions about Open-AudIT? Contact us at sales@firstwave.com</p>
+    <p style='font-size: 0.8rem;'>© 2025 FirstWave. All calculations are estimates based on industry averages.</p>
+</div>
+</body>
+</html>
+"""
+    return page, sidecar
+
+
+def _write(path, data):
+    # Renamed into place, so the file server never serves half a page
+    temp = f"{path}.tmp{os.getpid()}"
+    with open(temp, "wb") as f:
+        f.write(data)
+    os.replace(temp, path)
+
+
+def build_page(preset, profile, output_dir, base_url=None, has_logo=False):
+    """Render one preset into ``output_dir``; returns its index.json entry."""
+    page, sidecar = render(preset, profile, base_url, has_logo)
+    _write(os.path.join(output_dir, f"{preset.name}.html"), page.encode("utf-8"))
+    _write(os.path.join(output_dir, f"{preset.name}.json"),
+           json.dumps(sidecar, indent=2, ensure_ascii=False).encode("utf-8"))
+    return {
+        "name": preset.name,
+        "title": preset.title,
+        "profile": profile.name,
+        "page": f"{preset.name}.html",
+        "data": f"{preset.name}.json",
+        "roi_percentage": sidecar["totals"]["roi_percentage"],
+    }
+
+
+def public_url(base_url=None):
+    """The calculator's absolute address for the page links; ROI_PUBLIC_URL wins, as in share_links.link."""
+    url = os.environ.get("ROI_PUBLIC_URL") or base_url or ""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        raise ValueError(f"The pages need the calculator's absolute address (got {url!r}); "
+                         "pass --base-url https://... or set ROI_PUBLIC_URL")
+    return url
+
+
+def build(presets, output_dir, base_url=None, workers=None):
+    """Render every preset into ``output_dir`` and write index.json; returns the index entries.
+
+    Raises ValueError when no absolute calculator address is configured.
+    """
+    base_url = public_url(base_url)
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+    logo = assets.logo_bytes()
+    if logo:
+        _write(os.path.join(output_dir, LOGO_FILE), logo)
+    # Resolved once here, so every page of a build uses the same profile file
+    by_name = profiles.registry.profiles()
+    jobs = [(preset, by_name[preset.profile], output_dir, base_url, logo is not None) for preset in presets]
+
+    if workers == 1 or len(jobs) < 2:
+        entries = [build_page(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            entries = list(pool.map(build_page, *zip(*jobs)))
+    _write(os.path.join(output_dir, "index.json"), json.dumps(entries, indent=2, ensure_ascii=False).encode("utf-8"))
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-render result pages for preset scenarios.")
+    parser.add_argument("output_dir", help="directory to write the pages to")
+    parser.add_argument("--presets", default=os.environ.get("ROI_PRESETS_PATH", DEFAULT_PATH),
+                        help="presets JSON file (default: presets.json)")
+    parser.add_argument("--base-url", help="absolute address of the live calculator for the edit links "
+                                           "(required unless ROI_PUBLIC_URL is set)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    try:
+        public_url(args.base_url)
+    except ValueError as exc:
+        parser.error(str(exc))
+    try:
+        presets = load(args.presets, profiles.registry.profiles())
+    except (OSError, ValueError) as exc:
+        sys.exit(f"Could not load {args.presets}: {exc}")
+    entries = build(presets, args.output_dir, args.base_url, args.workers)
+    print(f"Wrote {len(entries)} pages to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
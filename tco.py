@@ -0,0 +1,238 @@
+"""Multi-year TCO projection: NPV, IRR and discounted payback.
+
+The single-year figures in roi_engine are projected over ``years`` with
+
+* subscription escalation (sub_escalation, per year)
+* staff-rate inflation (rate_inflation, per year)
+* device growth (device_growth, per year)
+* a ramp-up curve per line item: ramp maps a line item key to the share of
+  its full savings realised in year 1, 2, ... (the last value carries on),
+  e.g. {"asset": (0.5, 1.0)}; items without a curve save in full from year 1
+* a discount rate for NPV and discounted payback
+
+Each year's subscription is paid at the start of the year and its savings
+arrive through the year, so the cash flows are
+
+    t = 0:      -subscription[1]
+    t = 1..N-1:  savings[t] - subscription[t + 1]
+    t = N:       savings[N]
+
+Like roi_engine, every function accepts scalars or equal-length arrays and
+evaluates all rows at once; IRR is solved for every row together with a
+bracketed Newton iteration. Results that do not exist (no IRR because the
+cash flows never change sign, no payback within the horizon) are NaN.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+import roi_engine
+
+Projection = namedtuple("Projection", [
+    "years",
+    "sub_escalation",
+    "rate_inflation",
+    "device_growth",
+    "discount_rate",
+    "ramp",
+])
+
+DEFAULT_PROJECTION = Projection(
+    years=3,
+    sub_escalation=0.0,
+    rate_inflation=0.0,
+    device_growth=0.0,
+    discount_rate=0.08,
+    ramp=None,
+)
+
+TCO_COLUMNS = (
+    "tco_savings",
+    "tco_subscription",
+    "tco_net_savings",
+    "tco_roi_percentage",
+    "npv",
+    "irr",
+    "discounted_payback_months",
+)
+
+
+def _ramp_share(ramp, key, year):
+    curve = (ramp or {}).get(key)
+    if not curve:
+        return 1.0
+    return curve[min(year, len(curve)) - 1]
+
+
+def yearly_amounts(inputs, projection=DEFAULT_PROJECTION, assumptions=roi_engine.DEFAULT_ASSUMPTIONS,
+                   include=None):
+    """Return (savings, subscription) arrays of shape (rows, years), or (years,) for scalars."""
+    p = projection
+    num_devices = np.asarray(inputs["num_devices"], dtype=np.float64)
+    hourly_rate = np.asarray(inputs["hourly_rate"], dtype=np.float64)
+    sub_cost = np.asarray(inputs["sub_cost"], dtype=np.float64)
+
+    savings = []
+    subscription = []
+    for year in range(1, p.years + 1):
+        items = roi_engine.calculate_line_items(
+            num_devices * (1 + p.device_growth) ** (year - 1),
+            hourly_rate * (1 + p.rate_inflation) ** (year - 1),
+            inputs["licence_requests"],
+            inputs["licence_hours"],
+            inputs["licence_spend"],
+            inputs["reports_per_year"],
+            inputs["checks_per_year"],
+            assumptions=assumptions,
+        )
+        for key, _, hours_col, dollars_col in roi_engine.LINE_ITEMS:
+            share = _ramp_share(p.ramp, key, year)
+            if share != 1.0:
+                if hours_col is not None:
+                    items[hours_col] = items[hours_col] * share
+                items[dollars_col] = items[dollars_col] * share
+        year_sub = sub_cost * (1 + p.sub_escalation) ** (year - 1)
+        savings.append(roi_engine.calculate_totals(items, year_sub, include)["total_dollars"])
+        subscription.append(np.broadcast_to(year_sub, np.shape(savings[-1])))
+    return np.stack(savings, axis=-1), np.stack(subscription, axis=-1)
+
+
+def cash_flows(savings, subscription):
+    """Cash flows at t = 0..N (last axis) for yearly savings and subscriptions."""
+    savings = np.asarray(savings, dtype=np.float64)
+    subscription = np.asarray(subscription, dtype=np.float64)
+    zero = np.zeros(savings.shape[:-1] + (1,))
+    return np.concatenate([zero, savings], axis=-1) - np.concatenate([subscription, zero], axis=-1)
+
+
+def npv(flows, rate):
+    """Net present value of ``flows`` (t = 0..N on the last axis) at ``rate``."""
+    flows = np.asarray(flows, dtype=np.float64)
+    t = np.arange(flows.shape[-1])
+    factors = (1 + np.asarray(rate, dtype=np.float64)[..., None]) ** -t
+    return (flows * factors).sum(axis=-1)
+
+
+def _polyval(flows, x):
+    # f(x) = sum(flows[t] * x**t) and its derivative, by Horner's rule on each row
+    value = np.zeros(x.shape)
+    slope = np.zeros(x.shape)
+    for t in range(flows.shape[-1] - 1, -1, -1):
+        slope = slope * x + value
+        value = value * x + flows[..., t]
+    return value, slope
+
+
+def irr(flows, tol=1e-10, max_iter=100, min_rate=-0.99, max_rate=1e6):
+    """Internal rate of return of every row of ``flows``, NaN where there is none.
+
+    Solves sum(flows[t] * x**t) = 0 for x = 1 / (1 + rate) on the bracket
+    [1 / (1 + max_rate), 1 / (1 + min_rate)]. Newton steps that leave the
+    bracket fall back to bisection, so every row converges; rows whose flows
+    have the same sign at both ends of the bracket have no IRR there. Rows
+    drop out of the iteration as they converge.
+    """
+    flows = np.asarray(flows, dtype=np.float64)
+    shape = flows.shape[:-1]
+    flows = flows.reshape(-1, flows.shape[-1])
+    n = flows.shape[0]
+    lo = np.full(n, 1 / (1 + max_rate))
+    hi = np.full(n, 1 / (1 + min_rate))
+    f_lo, _ = _polyval(flows, lo)
+    f_hi, _ = _polyval(flows, hi)
+    # All-zero flows are zero at every rate, which is no IRR either
+    valid = (np.sign(f_lo) * np.sign(f_hi) <= 0) & flows.any(axis=-1)
+    lo_negative = f_lo < 0
+
+    # Start where one outlay would be repaid by the undiscounted inflows. For
+    # the usual shape (outlay, then inflows) that is left of the root and the
+    # first Newton step lands close to it, even for very large rates.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = -flows[:, 0] / flows[:, 1:].sum(axis=-1)
+    x = np.where(np.isfinite(x) & (x > lo) & (x < hi), x, 1.0)
+
+    active = np.flatnonzero(valid)
+    xa, loa, hia, fa, nega = x[active], lo[active], hi[active], flows[active], lo_negative[active]
+    for _ in range(max_iter):
+        if not active.size:
+            break
+        value, slope = _polyval(fa, xa)
+        # Keep the root between lo and hi
+        below = (value < 0) == nega
+        loa = np.where(below, xa, loa)
+        hia = np.where(below, hia, xa)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = xa - value / slope
+        inside = np.isfinite(step) & (step >= loa) & (step <= hia)
+        new_x = np.where(inside, step, (loa + hia) / 2)
+        converged = np.abs(new_x - xa) <= tol * np.abs(xa)
+        x[active] = new_x
+        keep = ~converged
+        active, xa, loa, hia, fa, nega = (
+            active[keep], new_x[keep], loa[keep], hia[keep], fa[keep], nega[keep])
+
+    with np.errstate(divide="ignore"):
+        rate = 1 / x - 1
+    return np.where(valid, rate, np.nan).reshape(shape)
+
+
+def discounted_payback_months(savings, subscription, rate):
+    """Months until discounted savings cover the discounted subscriptions.
+
+    Savings are spread evenly through each year; NaN when the horizon is too
+    short.
+    """
+    savings = np.asarray(savings, dtype=np.float64)
+    subscription = np.asarray(subscription, dtype=np.float64)
+    years = savings.shape[-1]
+    rate = np.asarray(rate, dtype=np.float64)[..., None]
+    t = np.arange(1, years + 1)
+    paid = subscription * (1 + rate) ** -(t - 1)
+    earned = savings * (1 + rate) ** -t
+
+    # Position just after paying each year's subscription, before its savings
+    paid_so_far = np.cumsum(paid, axis=-1)
+    position = np.cumsum(earned, axis=-1) - earned - paid_so_far
+    # Discounting rounds; a payback on a year boundary must not slip a year
+    recovered = position + earned >= -1e-9 * paid_so_far
+    first = np.argmax(recovered, axis=-1)
+    found = recovered.any(axis=-1)
+
+    start = np.take_along_axis(position, first[..., None], axis=-1)[..., 0]
+    year_savings = np.take_along_axis(earned, first[..., None], axis=-1)[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        within_year = np.where(start < 0, np.minimum(-start / year_savings, 1.0), 0.0)
+    return np.where(found, (first + within_year) * 12, np.nan)
+
+
+def project(inputs, projection=DEFAULT_PROJECTION, assumptions=roi_engine.DEFAULT_ASSUMPTIONS, include=None):
+    """Project columnar ``inputs`` over ``projection.years``.
+
+    Returns the TCO_COLUMNS plus "savings_by_year" and "subscription_by_year"
+    (years on the last axis).
+    """
+    savings, subscription = yearly_amounts(inputs, projection, assumptions, include)
+    flows = cash_flows(savings, subscription)
+    total_savings = savings.sum(axis=-1)
+    total_subscription = subscription.sum(axis=-1)
+    net = total_savings - total_subscription
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi_percentage = np.where(total_subscription > 0, net / total_subscription * 100, 0.0)
+    return {
+        "tco_savings": total_savings,
+        "tco_subscription": total_subscription,
+        "tco_net_savings": net,
+        "tco_roi_percentage": roi_percentage,
+        "npv": npv(flows, projection.discount_rate),
+        "irr": irr(flows),
+        "discounted_payback_months": discounted_payback_months(savings, subscription, projection.discount_rate),
+        "savings_by_year": savings,
+        "subscription_by_year": subscription,
+    }
+
+
+def project_scenario(inputs, projection=DEFAULT_PROJECTION, assumptions=roi_engine.DEFAULT_ASSUMPTIONS,
+                     include=None):
+    """Project a single scenario; totals are floats and the yearly amounts lists."""
+    results = project(inputs, projection, assumptions, include)
+    return {key: value.tolist() if np.ndim(value) else float(value) for key, value in results.items()}
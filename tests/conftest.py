@@ -0,0 +1,9 @@
+"""Test setup: the modules live at the top of the repository.
+
+Usage:
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
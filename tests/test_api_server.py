@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+import api_server
+import roi_engine
+
+
+async def _exchange(request_bytes, read_to_close=True):
+    server = await asyncio.start_server(api_server.handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request_bytes)
+        await writer.drain()
+        try:
+            data = await reader.read() if read_to_close else None
+        except ConnectionResetError:
+            data = b"<reset>"
+        writer.close()
+        return data
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def _post(path, payload, version="HTTP/1.1"):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    request = (f"POST {path} {version}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode() + body
+    return asyncio.run(_exchange(request))
+
+
+def _split(response):
+    head, _, body = response.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    headers = dict(line.split(": ", 1) for line in lines[1:])
+    return int(lines[0].split()[1]), {k.lower(): v for k, v in headers.items()}, body
+
+
+def _unchunk(body):
+    out = b""
+    while True:
+        size, _, body = body.partition(b"\r\n")
+        size = int(size, 16)
+        if size == 0:
+            return out
+        out += body[:size]
+        body = body[size + 2:]
+
+
+BATCH = {"columns": {"num_devices": [100, 2_000, 50_000], "hourly_rate": [20.5, 30, 80]}}
+
+
+def _expected_rows():
+    columns = {name: np.asarray(values, dtype=float) for name, values in BATCH["columns"].items()}
+    for name in roi_engine.INPUT_FIELDS:
+        columns.setdefault(name, np.full(3, float(roi_engine.DEFAULT_INPUTS[name])))
+    results = roi_engine.calculate(columns)
+    return np.column_stack([results[name] for name in roi_engine.RESULT_COLUMNS]).tolist()
+
+
+def test_batch_is_chunked_for_http_1_1():
+    status, headers, body = _split(_post("/v1/roi/batch", BATCH))
+    assert status == 200
+    assert headers["transfer-encoding"] == "chunked"
+    result = json.loads(_unchunk(body))
+    assert result["count"] == 3
+    np.testing.assert_allclose(result["rows"], _expected_rows(), rtol=1e-12)
+
+
+def test_batch_is_not_chunked_for_http_1_0():
+    status, headers, body = _split(_post("/v1/roi/batch", BATCH, version="HTTP/1.0"))
+    assert status == 200
+    assert "transfer-encoding" not in headers
+    assert headers["connection"] == "close"
+    np.testing.assert_allclose(json.loads(body)["rows"], _expected_rows(), rtol=1e-12)
+
+
+@pytest.mark.parametrize("payload", [
+    b'{"columns": {"num_devices": [1, NaN]}}',
+    b'{"columns": {"num_devices": [1, Infinity]}}',
+    b'{"columns": {"hourly_rate": [-1, 2]}}',
+    b'{"scenarios": [{"num_devices": 10}, {"sub_cost": -5}]}',
+    b'{"scenarios": [{"num_devices": "nan"}]}',
+])
+def test_batch_rejects_non_finite_and_negative_inputs(payload):
+    status, headers, body = _split(_post("/v1/roi/batch", payload))
+    assert status == 400
+    assert "transfer-encoding" not in headers
+    assert json.loads(body) == {"error": "Inputs must be finite, non-negative numbers"}
+
+
+@pytest.mark.parametrize("payload", [b'{"num_devices": NaN}', b'{"sub_cost": -1}', b'{"hourly_rate": "inf"}'])
+def test_single_rejects_non_finite_and_negative_inputs(payload):
+    status, _, _ = _split(_post("/v1/roi", payload))
+    assert status == 400
+
+
+def test_failure_after_the_status_line_aborts_the_connection(monkeypatch):
+    def failing_body(columns, n, include=None):
+        yield b'{"count": 1, "rows": ['
+        raise RuntimeError("scoring failed")
+
+    monkeypatch.setattr(api_server, "iter_batch_body", failing_body)
+    response = _post("/v1/roi/batch", BATCH)
+    # Either the reset is seen, or the body stops without the final chunk
+    assert b"500" not in response
+    assert not response.endswith(b"0\r\n\r\n")
+
+
+def test_keep_alive_serves_several_batches():
+    body = json.dumps(BATCH).encode()
+    request = f"POST /v1/roi/batch HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+    last = f"POST /v1/roi/batch HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+    response = asyncio.run(_exchange(request * 2 + last))
+    assert response.count(b"HTTP/1.1 200 OK") == 3
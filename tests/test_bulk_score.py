@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import bulk_score
+import roi_engine
+import tco
+
+
+def prospects(rows=50):
+    rng = np.random.default_rng(7)
+    return pd.DataFrame({
+        "company": [f"Prospect {i}" for i in range(rows)],
+        "num_devices": rng.integers(100, 50_000, rows),
+        "hourly_rate": rng.uniform(20, 150, rows).round(2),
+        "licence_requests": rng.integers(0, 5_000, rows),
+        "licence_hours": rng.uniform(0, 2, rows).round(2),
+        "licence_spend": rng.integers(0, 10_000_000, rows),
+        "reports_per_year": rng.integers(0, 52, rows),
+        "checks_per_year": rng.integers(0, 52, rows),
+        "sub_cost": rng.integers(10_000, 500_000, rows),
+    })
+
+
+def expected(df):
+    results = roi_engine.calculate({field: df[field].to_numpy(dtype=np.float64)
+                                    for field in roi_engine.INPUT_FIELDS})
+    return pd.DataFrame({column: np.broadcast_to(results[column], len(df))
+                         for column in roi_engine.RESULT_COLUMNS})
+
+
+def write(df, path):
+    if str(path).endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def read(path):
+    return pd.read_parquet(path) if str(path).endswith(".parquet") else pd.read_csv(path)
+
+
+@pytest.mark.parametrize("source,target", [
+    ("in.csv", "out.csv"),
+    ("in.csv", "out.parquet"),
+    ("in.parquet", "out.csv"),
+    ("in.parquet", "out.parquet"),
+])
+def test_scores_csv_and_parquet(tmp_path, source, target):
+    df = prospects()
+    write(df, tmp_path / source)
+    rows = bulk_score.score_file(str(tmp_path / source), str(tmp_path / target), chunk_size=16, workers=1)
+    scored = read(tmp_path / target)
+    assert rows == len(scored) == len(df)
+    assert list(scored.columns) == list(df.columns) + list(roi_engine.RESULT_COLUMNS)
+    pd.testing.assert_frame_equal(scored[df.columns.tolist()], df, check_dtype=False)
+    pd.testing.assert_frame_equal(scored[list(roi_engine.RESULT_COLUMNS)], expected(df),
+                                  check_dtype=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize("target", ["out.csv", "out.parquet"])
+def test_worker_pool_matches_single_process(tmp_path, target):
+    df = prospects(200)
+    write(df, tmp_path / "in.csv")
+    projections = [tco.DEFAULT_PROJECTION._replace(years=3)]
+    single, pooled = tmp_path / f"single_{target}", tmp_path / f"pooled_{target}"
+    bulk_score.score_file(str(tmp_path / "in.csv"), str(single), chunk_size=30, workers=1,
+                          projections=projections)
+    # max_pending=1 forces backpressure on every chunk
+    bulk_score.score_file(str(tmp_path / "in.csv"), str(pooled), chunk_size=30, workers=2,
+                          max_pending=1, projections=projections)
+    pd.testing.assert_frame_equal(read(single), read(pooled))
+    assert list(read(pooled)["company"]) == list(df["company"])
+    assert "npv_3y" in read(pooled)
+
+
+@pytest.mark.parametrize("source", ["in.csv", "in.parquet"])
+def test_missing_column_fails_before_writing(tmp_path, source):
+    df = prospects().rename(columns={"hourly_rate": "hourlyrate"})
+    write(df, tmp_path / source)
+    with pytest.raises(ValueError, match="missing hourly_rate; .*--defaults"):
+        bulk_score.score_file(str(tmp_path / source), str(tmp_path / "out.csv"), workers=1)
+    assert not (tmp_path / "out.csv").exists()
+
+
+def test_defaults_fill_missing_columns(tmp_path):
+    df = prospects().drop(columns=["hourly_rate", "sub_cost"])
+    write(df, tmp_path / "in.csv")
+    bulk_score.score_file(str(tmp_path / "in.csv"), str(tmp_path / "out.csv"), workers=1, defaults=True)
+    filled = df.assign(hourly_rate=roi_engine.DEFAULT_INPUTS["hourly_rate"],
+                       sub_cost=roi_engine.DEFAULT_INPUTS["sub_cost"])
+    pd.testing.assert_frame_equal(read(tmp_path / "out.csv")[list(roi_engine.RESULT_COLUMNS)],
+                                  expected(filled), check_dtype=False, rtol=1e-9)
+
+
+def test_score_chunk_rejects_missing_columns():
+    with pytest.raises(ValueError, match="missing sub_cost"):
+        bulk_score.score_chunk(prospects(3).drop(columns=["sub_cost"]))
+
+
+def test_cli_reports_missing_columns(tmp_path):
+    prospects().drop(columns=["sub_cost"]).to_csv(tmp_path / "in.csv", index=False)
+    with pytest.raises(SystemExit, match="missing sub_cost"):
+        bulk_score.main([str(tmp_path / "in.csv"), str(tmp_path / "out.csv"), "--workers", "1"])
+    bulk_score.main([str(tmp_path / "in.csv"), str(tmp_path / "out.csv"), "--workers", "1", "--defaults"])
+    assert len(pd.read_csv(tmp_path / "out.csv")) == 50
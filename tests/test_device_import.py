@@ -0,0 +1,106 @@
+import io
+import json
+
+import pytest
+
+import device_import
+
+
+def _record(i):
+    return {
+        "type": "router" if i % 3 == 0 else "computer",
+        "class": "desktop",
+        "status": "retired" if i % 10 == 0 else "production",
+        "name": f"host-{i}",
+        # Nested arrays of objects and strings both hold "},{" inside a record
+        "tags": [{"k": "a"}, {"k": "b"}],
+        "notes": 'x},{"y": [1, 2]} \\"',
+    }
+
+
+RECORDS = [_record(i) for i in range(2000)]
+
+
+def _expected(records):
+    active = [r for r in records if r["status"] != "retired"]
+    return device_import.DeviceSummary(
+        devices=len(active),
+        critical_devices=sum(r["type"] == "router" for r in active),
+        by_type=dict(sorted({t: sum(r["type"] == t for r in active) for t in ("router", "computer")}.items(),
+                            key=lambda item: -item[1])),
+        skipped=len(records) - len(active),
+    )
+
+
+@pytest.mark.parametrize("chunk_chars", [60, 100, 1000, 1537, 4096, 1 << 22])
+def test_nested_arrays_across_read_boundaries(chunk_chars):
+    text = json.dumps(RECORDS)
+    records = [r for batch in device_import._iter_json_batches(io.StringIO(text), chunk_chars=chunk_chars)
+               for r in batch]
+    assert records == RECORDS
+
+
+@pytest.mark.parametrize("chunk_chars", [100, 1537, 1 << 22])
+def test_api_response_across_read_boundaries(chunk_chars):
+    text = json.dumps({"meta": {"total": len(RECORDS)}, "data": [{"type": "devices", "attributes": r} for r in RECORDS]})
+    records = [r for batch in device_import._iter_json_batches(io.StringIO(text), chunk_chars=chunk_chars)
+               for r in batch]
+    assert records == RECORDS
+
+
+def test_summarise_json_with_nested_arrays():
+    raw = json.dumps({"data": [{"attributes": r} for r in RECORDS]}, indent=1).encode()
+    assert len(raw) > 150_000
+    assert device_import.summarise(io.BytesIO(raw), "devices.json") == _expected(RECORDS)
+
+
+def test_summarise_json_lines():
+    raw = "\n".join(json.dumps(r) for r in RECORDS).encode()
+    assert device_import.summarise(io.BytesIO(raw), "devices.jsonl") == _expected(RECORDS)
+
+
+def test_summarise_csv_matches_json():
+    csv = "devices.type,devices.class,devices.status\n" + "".join(
+        f"{r['type']},{r['class']},{r['status']}\n" for r in RECORDS)
+    assert device_import.summarise(io.BytesIO(csv.encode()), "devices.csv", chunk_size=333) == _expected(RECORDS)
+
+
+def test_criticality_overrides_type():
+    raw = json.dumps([
+        {"type": "router", "criticality": "low"},
+        {"type": "computer", "criticality": "High"},
+        {"type": "computer", "class": "Virtual Server"},
+    ]).encode()
+    summary = device_import.summarise(io.BytesIO(raw), "devices.json")
+    assert (summary.devices, summary.critical_devices) == (3, 2)
+
+
+def test_record_longer_than_four_reads_is_rejected():
+    text = json.dumps([{"type": "router", "notes": "x" * 500}])
+    with pytest.raises(ValueError, match="does not end"):
+        list(device_import._iter_json_batches(io.StringIO(text), chunk_chars=100))
+
+
+@pytest.mark.parametrize("raw", [
+    b'[{"type": "router"}, {"type": ',
+    b'[{"type": "router"}, {"type": "switch}]',
+    b'{"meta": {}, "items": []}',
+])
+def test_invalid_json_is_rejected(raw):
+    with pytest.raises(ValueError):
+        device_import.summarise(io.BytesIO(raw), "devices.json")
+
+
+@pytest.mark.parametrize("raw", [b"name,ip\nhost-1,10.0.0.1\n", b"name,ip\n"])
+def test_csv_without_device_columns_is_rejected(raw):
+    export = io.BytesIO(raw)
+    with pytest.raises(ValueError, match="none of the columns"):
+        device_import.summarise(export, "devices.csv")
+    assert not export.closed
+
+
+@pytest.mark.parametrize("record", [{"type": ["router"]}, {"type": "router", "status": {"name": "production"}}])
+def test_json_list_or_object_values_are_rejected(record):
+    raw = json.dumps([{"type": "computer"}, record]).encode()
+    with pytest.raises(ValueError, match="must be text or numbers"):
+        device_import.summarise(io.BytesIO(raw), "devices.json")
@@ -0,0 +1,136 @@
+import math
+
+import numpy as np
+import pytest
+
+import goal_seek
+import roi_engine
+
+# Defaults give 622% ROI, $622,440 net savings and 1.66 months payback; these
+# all need more savings, so every input has to rise to reach them
+TARGETS = [("roi_percentage", 1000.0), ("net_savings", 1_500_000.0), ("payback_months", 1.0)]
+
+GROWING_FIELDS = [field for field in roi_engine.INPUT_FIELDS if field != "sub_cost"]
+
+
+def _score(field, x, include=None):
+    inputs = {**roi_engine.DEFAULT_INPUTS, field: x}
+    return roi_engine.calculate_scenario(inputs, include=include)
+
+
+@pytest.mark.parametrize("target, value", TARGETS)
+@pytest.mark.parametrize("field", GROWING_FIELDS)
+def test_closed_form_reproduces_target(field, target, value):
+    x = goal_seek.solve_scenario(field, target, value)
+    assert x > roi_engine.DEFAULT_INPUTS[field]
+    assert _score(field, x)[target] == pytest.approx(value, rel=1e-9)
+
+
+@pytest.mark.parametrize("target, value", [
+    ("roi_percentage", 1000.0), ("roi_percentage", 50.0), ("roi_percentage", -50.0),
+    ("net_savings", 500_000.0), ("net_savings", -10_000.0),
+    ("payback_months", 1.0), ("payback_months", 24.0),
+])
+def test_subscription_reproduces_target(target, value):
+    x = goal_seek.solve_scenario("sub_cost", target, value)
+    assert _score("sub_cost", x)[target] == pytest.approx(value, rel=1e-9)
+
+
+def test_respects_include_flags():
+    include = {"licence_spend": False, "report": False}
+    x = goal_seek.solve_scenario("num_devices", "roi_percentage", 300, include=include)
+    assert _score("num_devices", x, include)["roi_percentage"] == pytest.approx(300, rel=1e-9)
+
+
+def test_array_targets_broadcast():
+    values = np.array([700.0, 1000.0, 5000.0])
+    xs = goal_seek.solve("num_devices", "roi_percentage", values)
+    assert xs.shape == values.shape
+    for x, value in zip(xs, values):
+        assert _score("num_devices", x)["roi_percentage"] == pytest.approx(value, rel=1e-9)
+
+
+@pytest.mark.parametrize("target, value, sub_cost", [
+    ("roi_percentage", 300, 100_000),
+    ("net_savings", 0, 722_440),
+    ("payback_months", 6, 100_000),
+])
+def test_required_savings(target, value, sub_cost):
+    needed = float(goal_seek.required_savings(target, value, sub_cost))
+    # A scenario whose only saving is the licence spend line, sized to ``needed``
+    inputs = {field: 0 for field in roi_engine.INPUT_FIELDS}
+    inputs.update(licence_spend=needed / roi_engine.LICENCE_SPEND_REDUCTION_PCT, sub_cost=sub_cost)
+    assert roi_engine.calculate_scenario(inputs)[target] == pytest.approx(value, abs=1e-9)
+
+
+@pytest.mark.parametrize("field, target, value, inputs", [
+    # Savings at zero devices already beat this, so it needs negative devices
+    ("num_devices", "roi_percentage", 10, None),
+    # No payback in zero or negative months
+    ("num_devices", "payback_months", 0, None),
+    ("sub_cost", "payback_months", -3, None),
+    # Hours per request do nothing without requests
+    ("licence_hours", "net_savings", 1_000_000, {"licence_requests": 0}),
+    # A subscription cannot lose more than all of itself
+    ("sub_cost", "roi_percentage", -100, None),
+])
+def test_unreachable_targets_are_nan(field, target, value, inputs):
+    assert math.isnan(goal_seek.solve_scenario(field, target, value, inputs))
+
+
+def test_unknown_field_or_target():
+    with pytest.raises(ValueError):
+        goal_seek.solve("num_employees", "roi_percentage", 300)
+    with pytest.raises(ValueError):
+        goal_seek.solve("num_devices", "irr", 0.2)
+    with pytest.raises(ValueError):
+        goal_seek.required_savings("irr", 0.2, 100_000)
+
+
+@pytest.fixture
+def nonlinear_engine(monkeypatch):
+    """Add savings that grow with the square of the device count, so the closed form does not hold."""
+    calculate = roi_engine.calculate
+
+    def calculate_with_square(inputs, assumptions=roi_engine.DEFAULT_ASSUMPTIONS, include=None):
+        results = calculate(inputs, assumptions, include)
+        extra = 0.05 * np.asarray(inputs["num_devices"], dtype=np.float64) ** 2
+        items = {column: results[column] for column in roi_engine.LINE_ITEM_COLUMNS}
+        items["report_dollars"] = items["report_dollars"] + extra
+        results.update(roi_engine.calculate_totals(items, inputs["sub_cost"], include))
+        return results
+
+    calls = []
+    bisect = goal_seek._bisect
+
+    def counting_bisect(*args, **kwargs):
+        calls.append(args)
+        return bisect(*args, **kwargs)
+
+    monkeypatch.setattr(roi_engine, "calculate", calculate_with_square)
+    monkeypatch.setattr(goal_seek, "_bisect", counting_bisect)
+    return calculate_with_square, calls
+
+
+@pytest.mark.parametrize("target, value", TARGETS)
+def test_bisection_fallback_converges(nonlinear_engine, target, value):
+    calculate, calls = nonlinear_engine
+    x = goal_seek.solve_scenario("num_devices", target, value)
+    assert calls, "the linearity check should have sent the row to bisection"
+    result = calculate({**roi_engine.DEFAULT_INPUTS, "num_devices": x})
+    assert float(result[target]) == pytest.approx(value, rel=1e-9)
+
+
+def test_bisection_fallback_solves_rows_together(nonlinear_engine):
+    calculate, calls = nonlinear_engine
+    values = np.array([1000.0, 2000.0])
+    xs = goal_seek.solve("num_devices", "roi_percentage", values)
+    assert len(calls) == 1
+    for x, value in zip(xs, values):
+        result = calculate({**roi_engine.DEFAULT_INPUTS, "num_devices": x})
+        assert float(result["roi_percentage"]) == pytest.approx(value, rel=1e-9)
+
+
+def test_bisection_fallback_unreachable_is_nan(nonlinear_engine):
+    # Zero devices already give more than this net saving
+    assert math.isnan(goal_seek.solve_scenario("num_devices", "net_savings", 1_000))
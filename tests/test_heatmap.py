@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+import heatmap
+import result_cache
+import roi_engine
+
+INPUTS = {**roi_engine.DEFAULT_INPUTS, "num_devices": 4000, "sub_cost": 250_000}
+
+
+def direct(view, x_field, y_field, inputs=INPUTS, include=None):
+    columns = {name: inputs[name] for name in roi_engine.INPUT_FIELDS}
+    columns[x_field] = view["x"][None, :]
+    columns[y_field] = view["y"][:, None]
+    return roi_engine.calculate(columns, include=include)
+
+
+@pytest.mark.parametrize("x_range,y_range,cells,include", [
+    ((0, 50_000), (10, 200), (300, 200), None),
+    ((12_345, 31_000), (37, 151), (400, 150), None),
+    ((12_345, 31_000), (37, 151), (200, 260), {"asset": False, "vuln": False}),
+])
+def test_tiled_grid_matches_direct_calculation(x_range, y_range, cells, include):
+    cache = result_cache.ResultCache(ttl=0)
+    view = heatmap.grid("num_devices", x_range, "hourly_rate", y_range, INPUTS, include, cells=cells,
+                        cache=cache)
+    # The view spans several tiles, including ones cut off at both ends
+    assert cache.stats()["entries"] > 2
+    assert view["x"][0] >= x_range[0] and view["x"][-1] <= x_range[1]
+    assert view["y"][0] >= y_range[0] and view["y"][-1] <= y_range[1]
+    expected = direct(view, "num_devices", "hourly_rate", include=include)
+    for metric in heatmap.METRICS:
+        assert view[metric].shape == (len(view["y"]), len(view["x"]))
+        np.testing.assert_allclose(view[metric], np.broadcast_to(expected[metric], view[metric].shape),
+                                   rtol=1e-12, equal_nan=True)
+
+
+def test_panning_reuses_tiles():
+    cache = result_cache.ResultCache(ttl=0)
+    first = heatmap.grid("num_devices", (0, 20_000), "sub_cost", (0, 500_000), INPUTS, cells=(200, 200),
+                         cache=cache)
+    tiles = cache.stats()["entries"]
+    assert cache.stats()["misses"] == tiles
+
+    # Same view again: served entirely from the cache
+    heatmap.grid("num_devices", (0, 20_000), "sub_cost", (0, 500_000), INPUTS, cells=(200, 200), cache=cache)
+    assert cache.stats()["misses"] == tiles and cache.stats()["hits"] == tiles
+
+    # Pan right by half a view on the same lattice: only the new column of tiles is computed
+    step = first["x"][1] - first["x"][0]
+    shift = 100 * step
+    panned = heatmap.grid("num_devices", (shift, 20_000 + shift), "sub_cost", (0, 500_000), INPUTS,
+                          cells=(200, 200), cache=cache)
+    assert panned["x"][1] - panned["x"][0] == step
+    stats = cache.stats()
+    new_tiles = stats["entries"] - tiles
+    assert 0 < new_tiles < tiles
+    assert stats["misses"] == tiles + new_tiles
+    np.testing.assert_array_equal(panned["roi_percentage"][:, :-100], first["roi_percentage"][:, 100:])
+
+
+def test_other_inputs_key_the_tiles():
+    cache = result_cache.ResultCache(ttl=0)
+    heatmap.grid("num_devices", (0, 1000), "hourly_rate", (0, 100), INPUTS, cells=(50, 50), cache=cache)
+    other = heatmap.grid("num_devices", (0, 1000), "hourly_rate", (0, 100), {**INPUTS, "sub_cost": 1},
+                         cells=(50, 50), cache=cache)
+    assert cache.stats()["hits"] == 0
+    assert (other["roi_percentage"] > 0).any()
+
+
+@pytest.mark.parametrize("step,snapped", [(0.7, 0.6), (1, 1), (13, 12), (99, 80), (250, 250), (0, 1.0)])
+def test_nice_step(step, snapped):
+    assert heatmap.nice_step(step) == pytest.approx(snapped)
+
+
+def test_grid_rejects_bad_fields():
+    with pytest.raises(ValueError, match="Unknown input"):
+        heatmap.grid("num_employees", (0, 1), "hourly_rate", (0, 1))
+    with pytest.raises(ValueError, match="two different"):
+        heatmap.grid("hourly_rate", (0, 1), "hourly_rate", (0, 1))
+
+
+def test_colorize_marks_break_even():
+    roi = np.array([[-10.0, 10.0], [-10.0, 10.0]])
+    image = heatmap.colorize(roi, "roi_percentage")
+    assert image.shape == (2, 2, 3) and image.dtype == np.uint8
+    # The cell on the far side of the sign change is drawn black
+    assert (image[:, 1] == 0).all() and (image[:, 0] == (198, 40, 40)).all()
+    # roi_engine reports 0 months when the savings never pay back
+    payback = heatmap.colorize(np.array([[0.0, 6.0]]), "payback_months")
+    assert tuple(payback[0, 0]) == (189, 189, 189)
@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+import time
+
+import lead_store
+
+
+class MemoryStore:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.events = []
+        self.threads = set()
+        self.closed = False
+        self.release = threading.Event()
+        self.release.set()
+
+    def write_batch(self, events):
+        self.threads.add(threading.current_thread().name)
+        self.release.wait()
+        time.sleep(self.delay)
+        self.events.extend(events)
+
+    def close(self):
+        self.threads.add(threading.current_thread().name)
+        self.closed = True
+
+
+def test_close_flushes_everything_queued():
+    store = MemoryStore()
+    writer = lead_store.WriteBehindQueue(store, batch_size=7, name="test-writer")
+    for i in range(100):
+        assert writer.submit(i)
+    writer.close()
+    assert store.events == list(range(100))
+    assert store.closed
+    assert store.threads == {"test-writer"}
+    assert writer.stats() == {"queued": 0, "written": 100, "dropped": 0, "failed": 0}
+
+
+def test_sqlite_connects_on_the_writer_thread(tmp_path, monkeypatch):
+    connected_on = []
+    connect = sqlite3.connect
+
+    def recording_connect(*args, **kwargs):
+        connected_on.append(threading.current_thread().name)
+        return connect(*args, **kwargs)
+
+    monkeypatch.setattr(lead_store.sqlite3, "connect", recording_connect)
+    path = str(tmp_path / "leads.db")
+    writer = lead_store.WriteBehindQueue(lead_store.SQLiteLeadStore(path), name="test-writer")
+    assert connected_on == []
+    assert writer.record("lead", "a@example.com", {"num_devices": 5})
+    assert writer.record("demo_request", "b@example.com")
+    writer.close()
+    assert connected_on == ["test-writer"]
+    with connect(path) as conn:
+        rows = conn.execute("SELECT kind, email, payload FROM events ORDER BY id").fetchall()
+    assert rows == [("lead", "a@example.com", '{"num_devices": 5}'), ("demo_request", "b@example.com", "null")]
+
+
+def test_submits_racing_close_are_written_or_counted():
+    store = MemoryStore()
+    writer = lead_store.WriteBehindQueue(store, max_queue=50, batch_size=10, name="test-writer")
+    accepted = []
+    start = threading.Barrier(9)
+
+    def submit_many(worker):
+        start.wait()
+        accepted.append(sum(writer.submit((worker, i)) for i in range(2_000)))
+
+    threads = [threading.Thread(target=submit_many, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    time.sleep(0.01)
+    writer.close()
+    for thread in threads:
+        thread.join()
+    stats = writer.stats()
+    assert len(store.events) == stats["written"] == sum(accepted)
+    assert stats["written"] + stats["dropped"] == 16_000
+    # Nothing was accepted that the closed writer then lost
+    assert stats["queued"] == 0
+    assert not writer.submit("late")
+    writer.close()
+
+
+def test_full_queue_drops_without_waiting():
+    store = MemoryStore()
+    store.release.clear()
+    writer = lead_store.WriteBehindQueue(store, max_queue=2, batch_size=1, name="test-writer")
+    assert writer.submit(0)
+    # The writer is stuck on event 0, so two more fill the queue
+    time.sleep(0.05)
+    assert writer.submit(1) and writer.submit(2)
+    started = time.monotonic()
+    assert not writer.submit(3)
+    assert time.monotonic() - started < 0.01
+    assert writer.stats()["dropped"] == 1
+    store.release.set()
+    writer.close()
+    assert store.events == [0, 1, 2]
+
+
+def test_put_timeout_waits_for_room():
+    store = MemoryStore()
+    store.release.clear()
+    writer = lead_store.WriteBehindQueue(store, max_queue=2, batch_size=1, put_timeout=0.05, name="test-writer")
+    assert writer.submit(0)
+    time.sleep(0.05)
+    assert writer.submit(1) and writer.submit(2)
+    started = time.monotonic()
+    assert not writer.submit(3)
+    assert time.monotonic() - started >= 0.04
+    assert writer.stats()["dropped"] == 1
+
+    # Room that frees up within put_timeout is waited for
+    threading.Timer(0.02, store.release.set).start()
+    writer.put_timeout = 1.0
+    assert writer.submit(4)
+    writer.close()
+    assert store.events == [0, 1, 2, 4]
+    assert writer.stats()["dropped"] == 1
@@ -0,0 +1,137 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import licence_audit
+import roi_engine
+
+ENTITLEMENTS = """product,licences,unit_price
+Adobe Acrobat Pro DC,10,200
+Microsoft Office 365,3,100
+Microsoft Office 365,2,100
+AutoCAD LT,1,500
+Unused Tool,4,50
+"""
+
+
+def _installs(rows, header="software.name,software.device_id"):
+    return io.StringIO(header + "\n" + "".join(f"{name},{device}\n" for name, device in rows))
+
+
+@pytest.mark.parametrize("name, key", [
+    ("Adobe Acrobat Pro DC (64-bit) 2023.001", "adobe acrobat pro dc"),
+    ("adobe acrobat pro dc", "adobe acrobat pro dc"),
+    ("Adobe® Reader(TM) v2.1", "adobe reader"),
+    ("Microsoft Office 365", "microsoft office 365"),
+    ("Windows 11 Pro", "windows 11 pro"),
+    ("Notepad++ 8.6.2 (x64)", "notepad++"),
+    ("Microsoft Visual C++ 2015-2022 Redistributable (x64) - 14.38.33130", "microsoft visual c++ redistributable"),
+    ("AutoCAD LT 2024 [Network]", "autocad lt"),
+    ("C# Dev Kit x86", "c# dev kit"),
+    ("   ", ""),
+])
+def test_normalise(name, key):
+    assert licence_audit.normalise(name) == key
+
+
+def test_entitlement_lines_add_up_per_product():
+    table, index = licence_audit.read_entitlements(io.StringIO(ENTITLEMENTS))
+    assert list(index) == ["adobe acrobat pro dc", "microsoft office 365", "autocad lt", "unused tool"]
+    assert table.loc["microsoft office 365", "licences"] == 5
+    assert table.loc["microsoft office 365", "spend"] == 500
+
+
+def test_entitlements_need_columns():
+    with pytest.raises(ValueError, match="unit_price"):
+        licence_audit.read_entitlements(io.StringIO("product,licences\nA,1\n"))
+
+
+@pytest.mark.parametrize("line,column", [
+    ("Visio,-1,10", "licences"),
+    ("Visio,5,-0.01", "unit_price"),
+])
+def test_entitlements_reject_negative_numbers(line, column):
+    source = io.StringIO(f"product,licences,unit_price\nProject,1,1\n{line}\n")
+    with pytest.raises(ValueError, match=f"negative {column} for Visio"):
+        licence_audit.read_entitlements(source)
+
+
+def test_software_export_needs_device_column():
+    _, index = licence_audit.read_entitlements(io.StringIO(ENTITLEMENTS))
+    with pytest.raises(ValueError, match="device_id"):
+        licence_audit.pair_chunk(pd.DataFrame({"name": ["Adobe Acrobat Pro DC"], "host": ["a"]}), index)
+
+
+@pytest.mark.parametrize("workers, chunk_size", [(1, 1_000_000), (1, 2), (2, 3)])
+def test_audit_joins_on_normalised_names(workers, chunk_size):
+    installs = [
+        ("Adobe Acrobat Pro DC (64-bit) 2023.001", "d1"),
+        ("Adobe Acrobat Pro DC 2024", "d1"),  # same device again
+        ("adobe acrobat pro dc", "d2"),
+        ("Microsoft Office 365", "d1"),
+        ("Microsoft Office 365 (x64)", "d2"),
+        ("Microsoft Office 365", "d3"),
+        ("Microsoft Office 365", "d4"),
+        ("Microsoft Office 365", "d5"),
+        ("Microsoft Office 365", "d6"),
+        ("AutoCAD LT 2024", "d7"),
+        ("AutoCAD LT 2023", "d8"),
+        ("Google Chrome", "d1"),
+    ]
+    result = licence_audit.audit(_installs(installs), io.StringIO(ENTITLEMENTS), chunk_size=chunk_size,
+                                 workers=workers)
+    products = result.products.set_index("product")
+    assert products["deployed"].to_dict() == {
+        "Adobe Acrobat Pro DC": 2, "Microsoft Office 365": 6, "AutoCAD LT": 2, "Unused Tool": 0}
+    assert products["shelfware"].to_dict() == {
+        "Adobe Acrobat Pro DC": 8, "Microsoft Office 365": 0, "AutoCAD LT": 0, "Unused Tool": 4}
+    assert products["over_deployed"].to_dict() == {
+        "Adobe Acrobat Pro DC": 0, "Microsoft Office 365": 1, "AutoCAD LT": 1, "Unused Tool": 0}
+    assert result.licence_spend == 2000 + 500 + 500 + 200
+    assert result.shelfware_savings == 8 * 200 + 4 * 50
+    assert result.over_deployment_cost == 100 + 500
+    assert (result.installs, result.matched_installs) == (12, 11)
+    assert list(result.products["shelfware_savings"]) == sorted(result.products["shelfware_savings"], reverse=True)
+
+
+def test_system_id_column():
+    result = licence_audit.audit(_installs([("AutoCAD LT", 1), ("AutoCAD LT", 2)], header="name,system_id"),
+                                 io.StringIO(ENTITLEMENTS), workers=1)
+    assert result.products.set_index("product").loc["AutoCAD LT", "deployed"] == 2
+
+
+def test_distinct_devices_counted_exactly_at_scale():
+    # 300k devices on one product: n**2 / 2**45 ~ 0.003 expected collisions, and none for these ids
+    devices = np.arange(300_000).astype(str)
+    chunk = pd.DataFrame({"name": "AutoCAD LT", "device_id": devices})
+    _, index = licence_audit.read_entitlements(io.StringIO(ENTITLEMENTS))
+    pairs, installs, matched = licence_audit.pair_chunk(chunk, index)
+    assert (installs, matched) == (300_000, 300_000)
+    assert len(pairs) == 300_000
+    assert set((pairs >> licence_audit.DEVICE_BITS).tolist()) == {index["autocad lt"]}
+
+
+def test_collisions_only_undercount_within_a_product(monkeypatch):
+    # With 6-bit device hashes 500 devices must collide
+    monkeypatch.setattr(licence_audit, "DEVICE_BITS", 6)
+    _, index = licence_audit.read_entitlements(io.StringIO(ENTITLEMENTS))
+    devices = [f"host-{i}" for i in range(500)]
+    chunk = pd.DataFrame({"name": ["AutoCAD LT"] * 500 + ["Unused Tool"] * 500, "device_id": devices * 2})
+    pairs, _, _ = licence_audit.pair_chunk(chunk, index)
+    products = pairs >> 6
+    per_product = np.bincount(products, minlength=len(index))
+    hashes = pd.util.hash_array(np.array(devices, dtype=object)) & np.uint64(63)
+    distinct_hashes = len(np.unique(hashes))
+    # Collided devices are lost, never added, and product codes survive intact
+    assert per_product[index["autocad lt"]] == per_product[index["unused tool"]] == distinct_hashes <= 64
+    assert set(products.tolist()) == {index["autocad lt"], index["unused tool"]}
+
+
+def test_apply_turns_shelfware_into_the_licence_line():
+    result = licence_audit.audit(_installs([("Adobe Acrobat Pro DC", "d1")]), io.StringIO(ENTITLEMENTS), workers=1)
+    inputs, assumptions = licence_audit.apply(result, roi_engine.DEFAULT_INPUTS, roi_engine.DEFAULT_ASSUMPTIONS)
+    assert inputs["licence_spend"] == 3200
+    results = roi_engine.calculate_scenario({field: inputs[field] for field in roi_engine.INPUT_FIELDS}, assumptions)
+    assert results["licence_spend_savings"] == pytest.approx(result.shelfware_savings)
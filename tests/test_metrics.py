@@ -0,0 +1,96 @@
+import json
+import urllib.request
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def registry():
+    return metrics.Registry(max_sessions=2)
+
+
+def test_histogram_exposition_is_cumulative(registry):
+    registry.observe("sidebar", 0.00003)
+    registry.observe("sidebar", 0.002)
+    registry.observe("sidebar", 20.0)
+    lines = registry.prometheus_text().splitlines()
+    assert lines[:2] == [
+        "# HELP roi_app_section_seconds Time spent in each section of an app rerun.",
+        "# TYPE roi_app_section_seconds histogram",
+    ]
+    assert 'roi_app_section_seconds_bucket{section="sidebar",le="5e-05"} 1' in lines
+    assert 'roi_app_section_seconds_bucket{section="sidebar",le="0.001"} 1' in lines
+    assert 'roi_app_section_seconds_bucket{section="sidebar",le="0.0025"} 2' in lines
+    assert 'roi_app_section_seconds_bucket{section="sidebar",le="10.0"} 2' in lines
+    assert 'roi_app_section_seconds_bucket{section="sidebar",le="+Inf"} 3' in lines
+    assert 'roi_app_section_seconds_count{section="sidebar"} 3' in lines
+    total = next(line for line in lines if line.startswith("roi_app_section_seconds_sum"))
+    assert float(total.split()[-1]) == pytest.approx(20.00203)
+
+
+def test_collectors_export_counters_and_gauges(registry):
+    registry.observe("rerun", 0.1, session="a")
+    registry.register_collector("cache", lambda: {"hits": 3, "entries": 2, "label": "x"},
+                                counters=("hits",))
+    text = registry.prometheus_text()
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    assert lines[lines.index("# TYPE roi_app_sessions_tracked gauge") + 1] == "roi_app_sessions_tracked 1"
+    assert lines[lines.index("# TYPE roi_cache_hits_total counter") + 1] == "roi_cache_hits_total 3.0"
+    assert lines[lines.index("# TYPE roi_cache_entries gauge") + 1] == "roi_cache_entries 2.0"
+    assert "label" not in text
+    # Every sample has exactly one TYPE line
+    types = [line.split()[2] for line in lines if line.startswith("# TYPE")]
+    assert len(types) == len(set(types))
+
+
+def test_failing_collector_is_skipped(registry):
+    registry.register_collector("broken", lambda: 1 / 0)
+    assert "roi_broken" not in registry.prometheus_text()
+    assert registry.snapshot()["collectors"]["broken"] == {}
+
+
+def test_snapshot_lists_slowest_sessions(registry):
+    registry.observe("rerun", 0.5, session="a")
+    registry.observe("rerun", 0.2, session="b")
+    registry.observe("rerun", 0.2, session="b")
+    registry.observe("rerun", 0.1, session="c")  # drops "a", the least recently seen
+    snapshot = registry.snapshot(top_sessions=1)
+    assert snapshot["sessions_tracked"] == 2
+    assert snapshot["slowest_sessions"] == [
+        {"session": "b", "reruns": 2, "total_s": pytest.approx(0.4), "max_s": 0.2}]
+    section = snapshot["sections"]["rerun"]
+    assert (section["count"], section["max_s"], section["p50_s"]) == (4, 0.5, 0.25)
+    json.dumps(snapshot)
+
+
+def test_disabled_spans_record_nothing(monkeypatch):
+    monkeypatch.setattr(metrics, "registry", metrics.Registry())
+    monkeypatch.setattr(metrics, "_enabled", False)
+    with metrics.span("css"):
+        pass
+    metrics.span("css").start().stop()
+    assert metrics.snapshot()["sections"] == {}
+    monkeypatch.setattr(metrics, "_enabled", True)
+    with metrics.span("css"):
+        pass
+    assert metrics.snapshot()["sections"]["css"]["count"] == 1
+
+
+def test_exporter_listens_on_localhost(monkeypatch):
+    monkeypatch.setattr(metrics, "_server", None)
+    monkeypatch.setattr(metrics, "_server_failed", False)
+    server = metrics.serve(port=0)
+    try:
+        host, port = server.server_address
+        assert host == "127.0.0.1"
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert b"# TYPE roi_app_section_seconds histogram" in response.read()
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics.json") as response:
+            assert "sections" in json.load(response)
+    finally:
+        server.shutdown()
+        server.server_close()
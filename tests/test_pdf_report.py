@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("reportlab")
+
+import pdf_report
+import results_table
+import roi_engine
+from reportlab import rl_config
+
+
+@pytest.fixture
+def invariant(monkeypatch):
+    # Fixed dates and document ids, so equal reports give equal bytes
+    monkeypatch.setattr(rl_config, "invariant", 1)
+
+
+def _report(num_devices):
+    inputs = dict(roi_engine.DEFAULT_INPUTS, num_devices=num_devices)
+    results = roi_engine.calculate_scenario(inputs)
+    results["sub_cost"] = float(inputs["sub_cost"])
+    return pdf_report.build_pdf(results_table.from_scenario(results), results, email=f"{num_devices}@example.com",
+                                inputs=inputs)
+
+
+def test_build_pdf(invariant):
+    pdf = _report(5_000)
+    assert pdf.startswith(b"%PDF")
+    assert pdf == _report(5_000)
+
+
+def test_concurrent_builds_match_serial_builds(invariant):
+    sizes = [100 * (i + 1) for i in range(24)]
+    serial = [_report(n) for n in sizes]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(_report, sizes)) == serial
+
+
+def test_reports_share_no_flowables(monkeypatch):
+    stories = []
+    build = pdf_report.SimpleDocTemplate.build
+
+    def capture(self, story, *args, **kwargs):
+        stories.append(list(story))
+        return build(self, story, *args, **kwargs)
+
+    monkeypatch.setattr(pdf_report.SimpleDocTemplate, "build", capture)
+    _report(100)
+    _report(200)
+    first, second = ({id(flowable) for flowable in story} for story in stories)
+    assert not first & second
@@ -0,0 +1,101 @@
+import json
+import os
+
+import pytest
+
+import profiles
+import roi_engine
+
+
+@pytest.mark.parametrize("name", ["", "Healthcare", "has space", "x" * 33, "msp\n", "msp/2"])
+def test_bad_names_are_rejected(name):
+    with pytest.raises(ValueError, match="must be 1-32"):
+        profiles.compile_profile(name, {})
+
+
+@pytest.mark.parametrize("spec, message", [
+    ([], "must be an object"),
+    ({"label": "X", "colour": "red"}, "unknown keys: colour"),
+    ({"label": ""}, "non-empty label"),
+    ({"label": 3}, "non-empty label"),
+    ({"assumptions": []}, "assumptions must be an object"),
+    ({"assumptions": {"no_such_assumption": 1}}, "unknown assumptions: no_such_assumption"),
+    ({"assumptions": {"hours_per_report": -1}}, "non-negative number"),
+    ({"assumptions": {"hours_per_report": True}}, "non-negative number"),
+    ({"assumptions": {"hours_per_report": "200"}}, "non-negative number"),
+    ({"assumptions": {"hours_per_report": float("inf")}}, "non-negative number"),
+    ({"assumptions": {"critical_device_pct": 1.5}}, "at most 1"),
+])
+def test_bad_specs_are_rejected(spec, message):
+    with pytest.raises(ValueError, match=message):
+        profiles.compile_profile("custom", spec)
+
+
+def test_unlisted_assumptions_keep_the_defaults():
+    profile = profiles.compile_profile("custom", {"label": "Custom", "assumptions": {"hours_per_report": 200}})
+    assert profile.assumptions == roi_engine.DEFAULT_ASSUMPTIONS._replace(hours_per_report=200.0)
+    assert all(isinstance(value, float) for value in profile.assumptions)
+    assert profile.version != profiles.compile_profile("default", {}).version
+
+
+def test_default_profile_is_always_first(tmp_path):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps({"retail": {"label": "Retail"}}))
+    assert list(profiles.load(str(path))) == ["default", "retail"]
+    assert list(profiles.load(str(tmp_path / "missing.json"))) == ["default"]
+
+
+def test_shipped_profiles_are_valid():
+    compiled = profiles.load(profiles.DEFAULT_PATH)
+    assert compiled["default"].assumptions == roi_engine.DEFAULT_ASSUMPTIONS
+
+
+def _write(path, config):
+    path.write_text(json.dumps(config))
+    # Some filesystems keep mtimes to the second; the size may not change either
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_registry_reloads_a_changed_file(tmp_path):
+    path = tmp_path / "profiles.json"
+    _write(path, {"retail": {"label": "Retail"}})
+    registry = profiles.ProfileRegistry(str(path), check_interval=0)
+    assert registry.get("retail").label == "Retail"
+
+    _write(path, {"retail": {"label": "Retail", "assumptions": {"hours_per_report": 50}}, "energy": {}})
+    assert list(registry.profiles()) == ["default", "retail", "energy"]
+    assert registry.get("retail").assumptions.hours_per_report == 50.0
+    # A profile that was removed falls back to the default
+    _write(path, {})
+    assert registry.get("retail").name == "default"
+    assert registry.stats() == {"profiles": 1, "reloads": 2, "reload_errors": 0}
+
+
+def test_registry_keeps_the_previous_profiles_when_a_reload_fails(tmp_path):
+    path = tmp_path / "profiles.json"
+    _write(path, {"retail": {"label": "Retail"}})
+    registry = profiles.ProfileRegistry(str(path), check_interval=0)
+    before = registry.profiles()
+
+    _write(path, {"retail": {"assumptions": {"critical_device_pct": 2}}})
+    assert registry.profiles() is before
+    path.write_text("{not json")
+    assert registry.profiles() is before
+    assert registry.stats() == {"profiles": 2, "reloads": 0, "reload_errors": 2}
+
+
+def test_registry_checks_the_file_at_most_once_per_interval(tmp_path):
+    path = tmp_path / "profiles.json"
+    _write(path, {})
+    registry = profiles.ProfileRegistry(str(path), check_interval=3600)
+    _write(path, {"retail": {"label": "Retail"}})
+    assert list(registry.profiles()) == ["default"]
+    assert registry.stats()["reloads"] == 0
+
+
+def test_a_broken_file_at_startup_raises(tmp_path):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps({"Bad Name": {}}))
+    with pytest.raises(ValueError):
+        profiles.ProfileRegistry(str(path))
@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+import result_cache
+import roi_engine
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache.time, "monotonic", clock)
+    return clock
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = result_cache.ResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = result_cache.ResultCache(ttl=60)
+    cache.put("a", 1)
+    clock.now += 60
+    assert cache.get("a") == 1
+    clock.now += 1
+    assert cache.get("a", "gone") == "gone"
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["expirations"]) == (0, 0, 1)
+
+
+def test_zero_ttl_never_expires(clock):
+    cache = result_cache.ResultCache(ttl=0)
+    cache.put("a", 1)
+    clock.now += 10**9
+    assert cache.get("a") == 1
+
+
+def test_byte_cap_evicts_oldest_and_skips_oversized_values():
+    cache = result_cache.ResultCache(max_bytes=100)
+    cache.put("a", "x", size=40)
+    cache.put("b", "y", size=40)
+    cache.put("c", "z", size=40)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 80
+    cache.put("huge", "w", size=101)
+    assert cache.get("huge") is None
+    assert cache.stats()["entries"] == 2
+    # Replacing an entry does not count its old size twice
+    cache.put("b", "y2", size=10)
+    assert cache.stats()["bytes"] == 50
+
+
+def test_hit_and_miss_counters():
+    cache = result_cache.ResultCache()
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute("k", lambda: calls.append(1) or 42) == 42
+    assert cache.get("other") is None
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 2, 0.5)
+    cache.clear()
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
+
+
+def test_cached_arrays_are_read_only():
+    cache = result_cache.ResultCache()
+    cache.put("scalar", np.asarray(5.0))
+    with pytest.raises(ValueError, match="read-only"):
+        cache.get("scalar")[...] = 6
+    assert float(cache.get("scalar")) == 5.0
+
+    items = cache.get_or_compute("items", lambda: roi_engine.calculate_line_items(
+        np.array([1000.0, 2000.0]), 50, 500, 1, 1_000_000, 12, 12))
+    with pytest.raises(ValueError, match="read-only"):
+        items["asset_dollars"] += 1
+    assert cache.get("items") is items
+    # Reading them still works
+    assert (roi_engine.calculate_totals(items, 1000)["total_dollars"] > 0).all()
+
+
+def test_arrays_in_lists_and_slotted_objects_are_read_only():
+    class Table:
+        __slots__ = ("hours", "dollars")
+
+        def __init__(self):
+            self.hours = np.zeros(3)
+            self.dollars = np.zeros(3)
+
+    table = Table()
+    rows = [np.ones(2), (np.ones(2),)]
+    result_cache.freeze({"table": table, "rows": rows})
+    assert not table.hours.flags.writeable and not table.dollars.flags.writeable
+    assert not rows[0].flags.writeable and not rows[1][0].flags.writeable
+
+
+def test_keys_ignore_number_types_and_order():
+    a = result_cache.make_key("k", {"num_devices": 1000, "hourly_rate": 50})
+    b = result_cache.make_key("k", {"hourly_rate": 50.0, "num_devices": 1000.0})
+    assert a == b
+    assert a != result_cache.make_key("k", {"num_devices": 1000, "hourly_rate": 50}, include={"asset": False})
+    assert a != result_cache.make_key(
+        "k", {"num_devices": 1000, "hourly_rate": 50},
+        assumptions=roi_engine.DEFAULT_ASSUMPTIONS._replace(hours_per_report=1.0))
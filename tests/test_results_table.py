@@ -0,0 +1,109 @@
+import io
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import results_table
+import roi_engine
+
+SCENARIOS = [
+    ({}, None),
+    ({"num_devices": 123_457, "hourly_rate": 87.35, "licence_hours": 0.25}, None),
+    ({}, {"warranty": False, "licence_spend": False}),
+    ({"num_devices": 0, "licence_requests": 0}, {"report": False}),
+]
+
+
+def table_for(overrides, include):
+    inputs = {**roi_engine.DEFAULT_INPUTS, **overrides}
+    line_items = roi_engine.calculate_line_items(*[inputs[field] for field in roi_engine.INPUT_FIELDS[:-1]])
+    return results_table.ResultsTable.from_line_items(line_items, include), line_items
+
+
+def baseline_csv(line_items, include):
+    # The export the app built before ResultsTable: pre-formatted strings per row
+    include = include or {}
+    rows = {"Automation Item": [], "Hours Saved": [], "$ Saved": []}
+    for key, label, hours_col, dollars_col in roi_engine.LINE_ITEMS:
+        included = include.get(key, True)
+        hours = float(line_items[hours_col]) if hours_col and included else 0.0
+        dollars = float(line_items[dollars_col]) if included else 0.0
+        rows["Automation Item"].append(label)
+        rows["Hours Saved"].append("-" if hours_col is None else f"{hours:,.1f}")
+        rows["$ Saved"].append(f"${dollars:,.0f}")
+    return pd.DataFrame(rows).to_csv(index=False)
+
+
+def formatted(frame):
+    # Format an export back the way the baseline CSV did
+    return pd.DataFrame({
+        "Automation Item": frame["automation_item"],
+        "Hours Saved": ["-" if pd.isna(hours) else f"{hours:,.1f}" for hours in frame["hours_saved"]],
+        "$ Saved": [f"${dollars:,.0f}" for dollars in frame["dollars_saved"]],
+    }).to_csv(index=False)
+
+
+@pytest.mark.parametrize("overrides,include", SCENARIOS)
+def test_display_rows_match_baseline_csv(overrides, include):
+    table, line_items = table_for(overrides, include)
+    displayed = pd.DataFrame(table.display_rows(), columns=list(results_table.DISPLAY_COLUMNS))
+    assert displayed.to_csv(index=False) == baseline_csv(line_items, include)
+
+
+@pytest.mark.parametrize("overrides,include", SCENARIOS)
+def test_csv_round_trips_to_baseline(overrides, include):
+    table, line_items = table_for(overrides, include)
+    exported = pd.read_csv(io.BytesIO(table.to_csv()), float_precision="round_trip")
+    assert list(exported.columns) == list(results_table.EXPORT_COLUMNS)
+    assert tuple(exported["item"]) == results_table.ITEM_KEYS
+    assert formatted(exported) == baseline_csv(line_items, include)
+    # Numbers are written at full precision, not as formatted text
+    np.testing.assert_array_equal(exported["dollars_saved"], table.dollars)
+    np.testing.assert_array_equal(exported["hours_saved"], table.hours)
+
+
+def test_csv_without_pyarrow_matches(monkeypatch):
+    table, _ = table_for(*SCENARIOS[1])
+    with_arrow = pd.read_csv(io.BytesIO(table.to_csv()))
+    monkeypatch.setitem(sys.modules, "pyarrow.csv", None)
+    without_arrow = pd.read_csv(io.BytesIO(table.to_csv()))
+    pd.testing.assert_frame_equal(with_arrow, without_arrow)
+
+
+@pytest.mark.parametrize("overrides,include", SCENARIOS)
+def test_parquet_round_trips(overrides, include):
+    table, line_items = table_for(overrides, include)
+    frame = pd.read_parquet(io.BytesIO(table.to_parquet()))
+    pd.testing.assert_frame_equal(frame, table.to_frame())
+    assert formatted(frame) == baseline_csv(line_items, include)
+
+
+def test_arrow_shares_memory_and_nulls_missing_hours():
+    table, _ = table_for({}, None)
+    arrow = table.to_arrow()
+    assert arrow.column_names == list(results_table.EXPORT_COLUMNS)
+    assert arrow.schema.field("hours_saved").type == pa.float64()
+    hours, dollars = arrow.column("hours_saved").chunk(0), arrow.column("dollars_saved").chunk(0)
+    assert hours.buffers()[1].address == table.hours.ctypes.data
+    assert dollars.buffers()[1].address == table.dollars.ctypes.data
+    # Licence spend has no hours
+    assert hours.null_count == 1 and not hours.is_valid()[results_table.ITEM_KEYS.index("licence_spend")].as_py()
+    assert dollars.null_count == 0
+
+
+def test_excluded_items_are_zero():
+    table, _ = table_for({}, {"asset": False})
+    row = results_table.ITEM_KEYS.index("asset")
+    assert (table.hours[row], table.dollars[row]) == (0.0, 0.0)
+    assert table.display_rows()[row][1:] == ["0.0", "$0"]
+    assert len(table) == len(roi_engine.LINE_ITEMS)
+
+
+def test_from_scenario_includes_everything():
+    inputs = dict(roi_engine.DEFAULT_INPUTS)
+    results = roi_engine.calculate_scenario(inputs)
+    table = results_table.from_scenario(results)
+    assert table.dollars.sum() == pytest.approx(float(results["total_dollars"]))
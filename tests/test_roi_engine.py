@@ -0,0 +1,158 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import roi_engine
+
+INCLUDE_KEYS = [key for key, _, _, _ in roi_engine.LINE_ITEMS]
+
+
+def baseline(num_devices, hourly_rate, licence_requests, licence_hours, licence_spend,
+             reports_per_year, checks_per_year, sub_cost, include=None):
+    """The formulas as the page computed them before the engine existed."""
+    include = dict.fromkeys(INCLUDE_KEYS, True) | (include or {})
+
+    warranty_hours_calc = licence_requests * licence_hours * 0.6
+    warranty_dollars_calc = warranty_hours_calc * hourly_rate
+    licence_spend_savings_calc = licence_spend * 0.05
+    asset_hours_calc = ((num_devices * 10 / 60.0) + (reports_per_year * 0.5)) * 0.8
+    asset_dollars_calc = asset_hours_calc * hourly_rate
+    critical_devices = num_devices * 0.3
+    change_hours_calc = max(0, critical_devices * checks_per_year * ((5 - 1) / 60.0))
+    change_dollars_calc = change_hours_calc * hourly_rate
+    vuln_hours_calc = num_devices * 10 / 60.0
+    vuln_dollars_calc = vuln_hours_calc * hourly_rate
+    report_hours_calc = reports_per_year * 312
+    report_dollars_calc = report_hours_calc * hourly_rate
+
+    items = {
+        "warranty_hours": warranty_hours_calc,
+        "warranty_dollars": warranty_dollars_calc,
+        "licence_spend_savings": licence_spend_savings_calc,
+        "asset_hours": asset_hours_calc,
+        "asset_dollars": asset_dollars_calc,
+        "change_hours": change_hours_calc,
+        "change_dollars": change_dollars_calc,
+        "vuln_hours": vuln_hours_calc,
+        "vuln_dollars": vuln_dollars_calc,
+        "report_hours": report_hours_calc,
+        "report_dollars": report_dollars_calc,
+    }
+
+    warranty_hours = warranty_hours_calc if include["warranty"] else 0
+    warranty_dollars = warranty_dollars_calc if include["warranty"] else 0
+    licence_spend_savings = licence_spend_savings_calc if include["licence_spend"] else 0
+    asset_hours = asset_hours_calc if include["asset"] else 0
+    asset_dollars = asset_dollars_calc if include["asset"] else 0
+    change_hours = change_hours_calc if include["change"] else 0
+    change_dollars = change_dollars_calc if include["change"] else 0
+    vuln_hours = vuln_hours_calc if include["vuln"] else 0
+    vuln_dollars = vuln_dollars_calc if include["vuln"] else 0
+    report_hours = report_hours_calc if include["report"] else 0
+    report_dollars = report_dollars_calc if include["report"] else 0
+
+    total_hours = warranty_hours + asset_hours + change_hours + vuln_hours + report_hours
+    total_dollars = (warranty_dollars + licence_spend_savings + asset_dollars + change_dollars + vuln_dollars +
+                     report_dollars)
+    roi_percentage = ((total_dollars - sub_cost) / sub_cost * 100) if sub_cost > 0 else 0
+    monthly_savings = total_dollars / 12 if total_dollars > 0 else 0
+    payback_months = (sub_cost / monthly_savings) if monthly_savings > 0 else 0
+
+    return dict(items, total_hours=total_hours, total_dollars=total_dollars, net_savings=total_dollars - sub_cost,
+                roi_percentage=roi_percentage, payback_months=payback_months)
+
+
+def _inputs(**overrides):
+    inputs = {field: roi_engine.DEFAULT_INPUTS[field] for field in roi_engine.INPUT_FIELDS}
+    inputs.update(overrides)
+    return inputs
+
+
+def _assert_matches(results, expected):
+    assert list(results) == list(roi_engine.RESULT_COLUMNS)
+    for column in roi_engine.RESULT_COLUMNS:
+        assert results[column] == pytest.approx(expected[column], rel=1e-12, abs=1e-9), column
+
+
+SCENARIOS = [
+    {},
+    {field: 0 for field in roi_engine.INPUT_FIELDS},
+    {"sub_cost": 0},
+    {"hourly_rate": 0.0},
+    {"hourly_rate": 0.0, "licence_spend": 0},
+    {"num_devices": 1, "hourly_rate": 0.01, "licence_requests": 1, "licence_hours": 0.01, "licence_spend": 1,
+     "reports_per_year": 1, "checks_per_year": 1, "sub_cost": 1},
+    {"num_devices": 10_000_000, "hourly_rate": 500.0, "licence_spend": 10 ** 10, "sub_cost": 10 ** 9},
+    {"num_devices": 250, "sub_cost": 10 ** 9},
+    {"checks_per_year": 365, "reports_per_year": 52},
+]
+
+
+@pytest.mark.parametrize("overrides", SCENARIOS)
+def test_scenario_matches_baseline(overrides):
+    inputs = _inputs(**overrides)
+    _assert_matches(roi_engine.calculate_scenario(inputs), baseline(**inputs))
+
+
+def test_default_scenario_values():
+    # 300 h warranty, $250k licence spend, 1,338.13 h asset, 2,400 h change, 1,666.67 h vuln, 3,744 h reports
+    results = roi_engine.calculate_scenario(_inputs())
+    assert results["total_hours"] == pytest.approx(9_448.8)
+    assert results["total_dollars"] == pytest.approx(722_440.0)
+    assert results["net_savings"] == pytest.approx(622_440.0)
+    assert results["roi_percentage"] == pytest.approx(622.44)
+    assert results["payback_months"] == pytest.approx(100_000 / (722_440.0 / 12))
+
+
+@pytest.mark.parametrize("included", list(itertools.product([True, False], repeat=len(INCLUDE_KEYS))))
+def test_include_masks_match_baseline(included):
+    include = dict(zip(INCLUDE_KEYS, included))
+    inputs = _inputs(num_devices=1234, hourly_rate=72.5, sub_cost=250_000)
+    _assert_matches(roi_engine.calculate_scenario(inputs, include=include), baseline(**inputs, include=include))
+
+
+def test_missing_include_keys_count_as_included():
+    inputs = _inputs()
+    assert roi_engine.calculate_scenario(inputs, include={"asset": False}) == \
+        roi_engine.calculate_scenario(inputs, include=dict.fromkeys(INCLUDE_KEYS, True) | {"asset": False})
+
+
+def test_columns_match_row_by_row():
+    rng = np.random.default_rng(7)
+    rows = 500
+    columns = {
+        "num_devices": rng.integers(0, 200_000, rows),
+        "hourly_rate": rng.uniform(0, 200, rows).round(2),
+        "licence_requests": rng.integers(0, 5_000, rows),
+        "licence_hours": rng.uniform(0, 4, rows).round(2),
+        "licence_spend": rng.integers(0, 50_000_000, rows),
+        "reports_per_year": rng.integers(0, 60, rows),
+        "checks_per_year": rng.integers(0, 400, rows),
+        "sub_cost": rng.choice([0, 1, 50_000, 10 ** 9], rows),
+    }
+    include = {key: rng.random(rows) < 0.7 for key in INCLUDE_KEYS}
+    results = roi_engine.calculate(columns, include=include)
+    for row in range(rows):
+        inputs = {field: columns[field][row].item() for field in roi_engine.INPUT_FIELDS}
+        _assert_matches({column: results[column][row] for column in roi_engine.RESULT_COLUMNS},
+                        baseline(**inputs, include={key: bool(mask[row]) for key, mask in include.items()}))
+
+
+def test_default_assumptions_are_the_baseline_constants():
+    assert roi_engine.DEFAULT_ASSUMPTIONS == roi_engine.Assumptions(0.6, 0.05, 10, 0.5, 0.8, 0.3, 5, 1, 10, 312)
+
+
+def test_change_hours_never_negative():
+    assumptions = roi_engine.DEFAULT_ASSUMPTIONS._replace(min_per_check_manual=1, min_per_check_automated=5)
+    results = roi_engine.calculate_scenario(_inputs(), assumptions)
+    assert results["change_hours"] == 0.0
+    assert results["change_dollars"] == 0.0
+
+
+def test_line_items_read_only_line_item_inputs():
+    assert roi_engine.LINE_ITEM_INPUTS == tuple(field for field in roi_engine.INPUT_FIELDS if field != "sub_cost")
+    items = roi_engine.calculate_line_items(*[roi_engine.DEFAULT_INPUTS[field] for field in roi_engine.LINE_ITEM_INPUTS])
+    for field in ("sub_cost", "num_employees"):
+        changed = roi_engine.calculate_scenario(dict(_inputs(), **{field: 1}))
+        assert {column: changed[column] for column in roi_engine.LINE_ITEM_COLUMNS} == items
@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+import roi_engine
+import scenario_graph
+
+RANGES = {
+    "num_devices": (0, 100_000),
+    "hourly_rate": (0, 250),
+    "licence_requests": (0, 10_000),
+    "licence_hours": (0, 4),
+    "licence_spend": (0, 20_000_000),
+    "reports_per_year": (0, 52),
+    "checks_per_year": (0, 365),
+    "sub_cost": (0, 1_000_000),
+}
+
+LINE_ITEM_KEYS = [key for key, _, _, _ in roi_engine.LINE_ITEMS]
+
+
+def assert_matches_full_recalculation(graph, scenarios, assumptions, include):
+    for row, inputs in enumerate(scenarios):
+        expected = roi_engine.calculate_scenario(inputs, assumptions, include)
+        assert graph.scenario(row) == pytest.approx(expected, rel=1e-12, abs=1e-9), (row, inputs)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_edits_match_full_recalculation(seed):
+    rng = random.Random(seed)
+    scenarios = [dict(roi_engine.DEFAULT_INPUTS) for _ in range(4)]
+    assumptions, include = roi_engine.DEFAULT_ASSUMPTIONS, {}
+    graph = scenario_graph.ScenarioGraph(scenarios)
+    for _ in range(300):
+        action = rng.random()
+        row = rng.randrange(len(scenarios))
+        if action < 0.6:
+            field = rng.choice(roi_engine.INPUT_FIELDS)
+            # Whole numbers repeat often enough to exercise unchanged values
+            value = rng.choice([rng.randint(*RANGES[field]), rng.uniform(*RANGES[field])])
+            changed = graph.set(row, field, value)
+            assert changed == (scenarios[row][field] != value)
+            scenarios[row][field] = value
+        elif action < 0.8:
+            edits = {field: rng.randint(*RANGES[field]) for field in rng.sample(roi_engine.INPUT_FIELDS, 3)}
+            edits["num_employees"] = 5  # display-only, ignored by the graph
+            changed = graph.update(row, edits)
+            assert set(changed) <= set(edits) - {"num_employees"}
+            scenarios[row].update(edits)
+        elif action < 0.9:
+            include = {key: rng.random() < 0.7 for key in LINE_ITEM_KEYS}
+            graph.set_include(include)
+        else:
+            assumptions = roi_engine.DEFAULT_ASSUMPTIONS._replace(
+                critical_device_pct=rng.choice([0.05, 0.1, 0.25]),
+                hours_per_report=rng.choice([1.0, 4.0, 8.0]))
+            graph.set_assumptions(assumptions)
+        # Read back only some of the time so edits pile up between reads
+        if rng.random() < 0.5:
+            assert_matches_full_recalculation(graph, scenarios, assumptions, include)
+    assert_matches_full_recalculation(graph, scenarios, assumptions, include)
+
+
+def test_only_downstream_nodes_are_reevaluated():
+    graph = scenario_graph.ScenarioGraph([roi_engine.DEFAULT_INPUTS, roi_engine.DEFAULT_INPUTS])
+    graph.results()
+    graph.evaluations.clear()
+
+    assert graph.set(1, "hourly_rate", 80)
+    graph.results()
+    assert graph.evaluations[scenario_graph.TOTALS_NODE] == 1
+    assert set(graph.evaluations) == set(scenario_graph.DOWNSTREAM["hourly_rate"])
+    assert all(node.endswith("_dollars") or node == scenario_graph.TOTALS_NODE for node in graph.evaluations)
+
+    graph.evaluations.clear()
+    assert not graph.set(1, "hourly_rate", 80.0)
+    graph.results()
+    assert not graph.evaluations
+
+
+def test_include_only_reruns_totals():
+    graph = scenario_graph.ScenarioGraph([roi_engine.DEFAULT_INPUTS])
+    graph.results()
+    graph.evaluations.clear()
+    graph.set_include({"asset": False})
+    graph.set_include({"asset": False})
+    graph.results()
+    assert dict(graph.evaluations) == {scenario_graph.TOTALS_NODE: 1}
@@ -0,0 +1,200 @@
+import json
+import math
+import time
+
+import numpy as np
+import pytest
+
+import lead_store
+import scenario_log
+from scenario_log import ALL, QuantileSketch, Rollup
+
+QUANTILES = (0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 1.0)
+
+rng = np.random.default_rng(2024)
+
+DISTRIBUTIONS = {
+    "uniform": rng.uniform(1, 1000, 20_000),
+    "lognormal": rng.lognormal(10, 2, 20_000),
+    "exponential": rng.exponential(5, 20_000),
+    "normal with negatives": rng.normal(0, 100, 20_000),
+    "payback months": np.concatenate([rng.gamma(2, 3, 15_000), np.zeros(5_000)]),
+    "tiny and huge": np.concatenate([rng.uniform(1e-6, 1e-3, 10_000), rng.uniform(1e6, 1e9, 10_000)]),
+}
+
+
+def _exact(values, q):
+    # The value the sketch aims at: rank q * (n - 1), rounded down
+    return np.sort(values)[math.floor(q * (len(values) - 1))]
+
+
+@pytest.mark.parametrize("name", list(DISTRIBUTIONS))
+def test_quantiles_within_relative_error(name):
+    values = DISTRIBUTIONS[name]
+    sketch = QuantileSketch()
+    sketch.add(values)
+    assert sketch.count == len(values)
+    for q in QUANTILES:
+        exact = _exact(values, q)
+        assert abs(sketch.quantile(q) - exact) <= scenario_log.RELATIVE_ACCURACY * abs(exact) * (1 + 1e-12), q
+
+
+def test_sketch_stays_small():
+    sketch = QuantileSketch()
+    sketch.add(DISTRIBUTIONS["tiny and huge"])
+    # Fifteen decades at 1% accuracy is well under two thousand buckets
+    assert len(sketch.positive) < 2_000
+
+
+def test_empty_and_nan():
+    sketch = QuantileSketch()
+    assert math.isnan(sketch.quantile(0.5))
+    sketch.add([math.nan, math.nan])
+    assert sketch.count == 0
+    sketch.add([math.nan, 0.0, 0.0, 5.0])
+    assert sketch.count == 3
+    assert sketch.quantile(0.5) == 0.0
+
+
+@pytest.mark.parametrize("name", list(DISTRIBUTIONS))
+def test_merge_equals_sketch_of_all_rows(name):
+    values = DISTRIBUTIONS[name]
+    whole = QuantileSketch()
+    whole.add(values)
+    merged = QuantileSketch()
+    for part in np.array_split(values, 7):
+        piece = QuantileSketch()
+        piece.add(part)
+        merged.merge(piece)
+    assert merged.to_dict() == whole.to_dict()
+    assert merged.count == whole.count
+    assert [merged.quantile(q) for q in QUANTILES] == [whole.quantile(q) for q in QUANTILES]
+
+
+def test_sketch_serialisation_round_trip():
+    sketch = QuantileSketch()
+    sketch.add(DISTRIBUTIONS["normal with negatives"])
+    copy = QuantileSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    assert copy.count == sketch.count
+    assert [copy.quantile(q) for q in QUANTILES] == [sketch.quantile(q) for q in QUANTILES]
+
+
+def test_device_band():
+    bands = scenario_log.device_band([0, 999, 1_000, 4_999, 5_000, 20_000, 99_999, 100_000, 10 ** 7])
+    assert bands.tolist() == ["<1k", "<1k", "1k-5k", "1k-5k", "5k-20k", "20k-100k", "20k-100k", "100k+", "100k+"]
+
+
+def _rows(n, seed):
+    gen = np.random.default_rng(seed)
+    return {
+        "profile": gen.choice(["default", "msp", "healthcare"], n),
+        "num_devices": gen.integers(10, 300_000, n).astype(float),
+        "roi_percentage": gen.normal(400, 300, n),
+        "payback_months": gen.gamma(2, 2, n),
+        "net_savings": gen.normal(5e5, 1e6, n),
+        "total_dollars": gen.lognormal(13, 1, n),
+        "hourly_rate": gen.uniform(20, 150, n).round(2),
+    }
+
+
+def _groups(rollup):
+    return {key: {metric: sketch.to_dict() for metric, sketch in sketches.items()}
+            for key, sketches in rollup.groups.items()}
+
+
+def test_rollup_in_parts_equals_rollup_of_all_rows():
+    rows = _rows(12_000, 1)
+    whole = Rollup()
+    whole.add_rows(rows)
+    parts = Rollup()
+    for start in range(0, 12_000, 2_500):
+        parts.add_rows({column: values[start:start + 2_500] for column, values in rows.items()})
+    assert _groups(parts) == _groups(whole)
+
+
+def test_rollup_levels():
+    rows = _rows(5_000, 2)
+    rollup = Rollup()
+    rollup.add_rows(rows)
+    bands = scenario_log.device_band(rows["num_devices"])
+    assert rollup.count() == 5_000
+    assert sum(rollup.count(band) for band in rollup.bands()) == 5_000
+    assert sum(rollup.count(ALL, profile) for profile in rollup.profiles()) == 5_000
+    for band in rollup.bands():
+        for profile in rollup.profiles():
+            selected = (bands == band) & (rows["profile"] == profile)
+            assert rollup.count(band, profile) == selected.sum()
+            if selected.sum():
+                exact = _exact(rows["roi_percentage"][selected], 0.5)
+                assert abs(rollup.quantile("roi_percentage", 0.5, band, profile) - exact) <= 0.01 * abs(exact) + 1e-9
+    assert rollup.count("<1k", "nobody") == 0
+    assert math.isnan(rollup.quantile("roi_percentage", 0.5, "<1k", "nobody"))
+
+
+def test_rollup_serialisation_round_trip():
+    rollup = Rollup(segments=["a.parquet"])
+    rollup.add_rows(_rows(1_000, 3))
+    copy = Rollup.from_dict(json.loads(json.dumps(rollup.to_dict())))
+    assert _groups(copy) == _groups(rollup)
+    assert copy.segments == {"a.parquet"}
+
+
+def test_update_rollup_folds_each_segment_once(tmp_path):
+    pytest.importorskip("pyarrow")
+    store = scenario_log.ParquetSegmentStore(str(tmp_path), segment_rows=700, segment_seconds=3600)
+    rows = _rows(2_000, 4)
+    events = []
+    for i in range(2_000):
+        event = {column: 0.0 for column in scenario_log.NUMERIC_COLUMNS}
+        event.update({column: values[i].item() for column, values in rows.items()})
+        event.update(created_at=0.0, include_mask=63)
+        events.append(event)
+    for start in range(0, 2_000, 300):
+        store.write_batch(events[start:start + 300])
+    store.close()
+    assert len(scenario_log.finished_segments(str(tmp_path))) == 3
+
+    rollup, added = scenario_log.update_rollup(str(tmp_path))
+    assert added == 3
+    whole = Rollup()
+    whole.add_rows(rows)
+    assert _groups(rollup) == _groups(whole)
+
+    _, added = scenario_log.update_rollup(str(tmp_path))
+    assert added == 0
+    assert _groups(scenario_log.load_rollup(str(tmp_path))) == _groups(whole)
+
+
+def _event(i):
+    event = {column: float(i) for column in scenario_log.NUMERIC_COLUMNS}
+    event.update(created_at=0.0, profile="default", include_mask=63)
+    return event
+
+
+def test_idle_segment_rotates_on_the_writer_timer(tmp_path):
+    pytest.importorskip("pyarrow")
+    store = scenario_log.ParquetSegmentStore(str(tmp_path), segment_rows=1_000, segment_seconds=0.2)
+    writer = lead_store.WriteBehindQueue(store, flush_interval=0.05, name="test-scenario-writer")
+    for i in range(3):
+        assert writer.submit(_event(i))
+    # No further rows arrive, so only the timer can finish the segment
+    deadline = time.monotonic() + 5
+    while not scenario_log.finished_segments(str(tmp_path)) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert len(scenario_log.finished_segments(str(tmp_path))) == 1
+    assert store.segments == 1
+    writer.close()
+    assert store.segments == 1
+
+
+def test_close_finishes_the_open_segment(tmp_path):
+    pytest.importorskip("pyarrow")
+    store = scenario_log.ParquetSegmentStore(str(tmp_path), segment_rows=1_000, segment_seconds=3600)
+    writer = lead_store.WriteBehindQueue(store, name="test-scenario-writer")
+    for i in range(5):
+        assert writer.submit(_event(i))
+    writer.close()
+    assert len(scenario_log.finished_segments(str(tmp_path))) == 1
+    assert not list(tmp_path.glob("*" + scenario_log.IN_PROGRESS_SUFFIX))
+    rollup, added = scenario_log.update_rollup(str(tmp_path))
+    assert (added, rollup.count()) == (1, 5)
@@ -0,0 +1,82 @@
+import math
+
+import numpy as np
+import pytest
+
+import roi_engine
+import scenario_log
+import sensitivity
+
+rng = np.random.default_rng(11)
+
+
+def _exact(values, p):
+    # The sketch reports the value at rank p/100 * (n - 1), rounded down
+    return np.percentile(values, p, method="lower")
+
+
+@pytest.mark.parametrize("values", [
+    rng.normal(500, 100, 50_000),
+    rng.lognormal(0, 3, 50_000),
+    rng.pareto(1.1, 50_000),
+    np.concatenate([np.zeros(10_000), rng.exponential(10, 40_000)]),
+    rng.normal(0, 1e6, 50_000),
+], ids=["normal", "lognormal", "pareto", "zeros and exponential", "wide with negatives"])
+def test_summary_percentiles_match_numpy(values):
+    summary = sensitivity.StreamingSummary()
+    for batch in np.array_split(values, 9):
+        summary.update(batch)
+    assert summary.count == len(values)
+    assert summary.mean == pytest.approx(values.mean())
+    for p in (1, 5, 25, 50, 75, 95, 99):
+        exact = _exact(values, p)
+        assert abs(summary.percentile(p) - exact) <= scenario_log.RELATIVE_ACCURACY * abs(exact) * (1 + 1e-12), p
+
+
+def test_a_late_outlier_does_not_move_the_median():
+    summary = sensitivity.StreamingSummary()
+    summary.update([0, 0, 0])
+    summary.update([1e9])
+    assert summary.percentile(50) == 0.0
+    assert summary.percentile(100) == pytest.approx(1e9, rel=scenario_log.RELATIVE_ACCURACY)
+
+
+def test_non_finite_values_are_ignored():
+    summary = sensitivity.StreamingSummary()
+    assert math.isnan(summary.percentile(50))
+    assert math.isnan(summary.mean)
+    summary.update([np.nan, np.inf, 2.0, 4.0])
+    assert summary.count == 2
+    assert summary.mean == 3.0
+
+
+def test_heavy_tailed_payback_matches_exact_percentiles():
+    # Only the licence line saves anything, and its reduction can fall to zero
+    inputs = {field: roi_engine.DEFAULT_INPUTS[field] for field in roi_engine.INPUT_FIELDS}
+    inputs.update(hourly_rate=0, reports_per_year=0, licence_requests=0)
+    distributions = {"licence_spend_reduction_pct": ("normal", 0.05, 0.03)}
+    results = sensitivity.run(inputs, distributions, draws=200_000, batch_size=30_000, seed=3)
+
+    draws = sensitivity.sample(distributions["licence_spend_reduction_pct"], 200_000, np.random.default_rng(3))
+    exact = roi_engine.calculate(
+        inputs, roi_engine.DEFAULT_ASSUMPTIONS._replace(licence_spend_reduction_pct=draws))["payback_months"]
+    for p in sensitivity.PERCENTILES:
+        assert results["percentiles"]["payback_months"][p] == pytest.approx(
+            np.percentile(exact, p), rel=2 * scenario_log.RELATIVE_ACCURACY), p
+
+
+def test_fixed_distributions_give_the_point_estimate():
+    inputs = {field: roi_engine.DEFAULT_INPUTS[field] for field in roi_engine.INPUT_FIELDS}
+    fixed = {name: ("fixed", getattr(roi_engine.DEFAULT_ASSUMPTIONS, name)) for name in sensitivity.DEFAULT_DISTRIBUTIONS}
+    results = sensitivity.run(inputs, fixed, draws=1_000, seed=1)
+    point = roi_engine.calculate_scenario(inputs)
+    for metric in sensitivity.METRICS:
+        assert results["mean"][metric] == pytest.approx(point[metric])
+        for p in sensitivity.PERCENTILES:
+            assert results["percentiles"][metric][p] == pytest.approx(point[metric], rel=scenario_log.RELATIVE_ACCURACY)
+    assert results["tornado"] == []
+
+
+def test_unknown_assumption_is_rejected():
+    with pytest.raises(ValueError, match="warp_factor"):
+        sensitivity.run(roi_engine.DEFAULT_INPUTS, {"warp_factor": ("fixed", 1)}, draws=10)
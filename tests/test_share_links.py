@@ -0,0 +1,195 @@
+import base64
+import itertools
+import struct
+
+import pytest
+
+import profiles
+import roi_engine
+import share_links
+
+
+def _raw(token):
+    return base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+
+
+def _token(data):
+    return base64.urlsafe_b64encode(bytes(data)).rstrip(b"=").decode("ascii")
+
+
+def _varints(values):
+    out = bytearray()
+    for value in values:
+        share_links._write_varint(out, value)
+    return out
+
+
+def test_round_trip_defaults():
+    token = share_links.encode(roi_engine.DEFAULT_INPUTS)
+    assert share_links.decode(token) == (roi_engine.DEFAULT_INPUTS, dict.fromkeys(share_links.INCLUDE_KEYS, True),
+                                         profiles.DEFAULT_PROFILE, {})
+    assert _raw(token)[0] == share_links.TOKEN_VERSION
+    # Short enough for chat and email
+    assert len(token) < 60
+
+
+def test_decoded_types_match_the_sidebar():
+    inputs, _, _, _ = share_links.decode(share_links.encode(roi_engine.DEFAULT_INPUTS))
+    for name, value in inputs.items():
+        assert type(value) is type(roi_engine.DEFAULT_INPUTS[name]), name
+
+
+@pytest.mark.parametrize("included", list(itertools.product([True, False], repeat=len(share_links.INCLUDE_KEYS))))
+def test_include_mask_round_trip(included):
+    include = dict(zip(share_links.INCLUDE_KEYS, included))
+    _, decoded, _, _ = share_links.decode(share_links.encode(roi_engine.DEFAULT_INPUTS, include))
+    assert decoded == include
+
+
+def test_missing_include_keys_count_as_included():
+    _, decoded, _, _ = share_links.decode(share_links.encode(roi_engine.DEFAULT_INPUTS, {"asset": False}))
+    assert decoded == dict.fromkeys(share_links.INCLUDE_KEYS, True) | {"asset": False}
+
+
+@pytest.mark.parametrize("profile", ["default", "healthcare", "a", "x" * 32, "msp_2024-v2"])
+def test_profile_round_trip(profile):
+    assert share_links.decode(share_links.encode(roi_engine.DEFAULT_INPUTS, profile=profile))[2] == profile
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 16_383, 16_384, 2 ** 31, 10 ** 15])
+def test_large_varints_round_trip(value):
+    inputs = dict(roi_engine.DEFAULT_INPUTS, licence_spend=value, num_devices=value)
+    decoded, _, _, _ = share_links.decode(share_links.encode(inputs))
+    assert decoded["licence_spend"] == value
+    assert decoded["num_devices"] == value
+
+
+def test_varint_encoding():
+    assert bytes(_varints([0, 1, 127, 128, 300])) == b"\x00\x01\x7f\x80\x01\xac\x02"
+    data = _varints([2 ** 63 - 1])
+    assert share_links._read_varint(data, 0) == (2 ** 63 - 1, len(data))
+
+
+@pytest.mark.parametrize("hourly_rate, expected", [
+    (72.5, 72.5),
+    (72.554, 72.55),
+    (72.556, 72.56),
+    (0.004, 0.0),
+    (0.005, 0.01),
+    (1234567.89, 1234567.89),
+])
+def test_floats_round_to_hundredths(hourly_rate, expected):
+    decoded, _, _, _ = share_links.decode(share_links.encode(dict(roi_engine.DEFAULT_INPUTS, hourly_rate=hourly_rate)))
+    assert decoded["hourly_rate"] == pytest.approx(expected, abs=1e-12)
+
+
+def test_negative_inputs_encode_as_zero():
+    decoded, _, _, _ = share_links.decode(share_links.encode(dict(roi_engine.DEFAULT_INPUTS, sub_cost=-5)))
+    assert decoded["sub_cost"] == 0
+
+
+def test_version_1_tokens_use_the_default_profile():
+    values = [round(roi_engine.DEFAULT_INPUTS[name] * 100) for name in share_links.SHARE_FIELDS]
+    token = _token(bytearray([1, 0b111101]) + _varints(values))
+    inputs, include, profile, overrides = share_links.decode(token)
+    assert inputs == roi_engine.DEFAULT_INPUTS
+    assert include == dict.fromkeys(share_links.INCLUDE_KEYS, True) | {"licence_spend": False}
+    assert profile == profiles.DEFAULT_PROFILE
+    assert overrides == {}
+
+
+def test_version_2_tokens_have_no_overrides():
+    values = [round(roi_engine.DEFAULT_INPUTS[name] * 100) for name in share_links.SHARE_FIELDS]
+    token = _token(bytearray([2, 0x3F, 10]) + b"healthcare" + _varints(values))
+    assert share_links.decode(token) == (roi_engine.DEFAULT_INPUTS, dict.fromkeys(share_links.INCLUDE_KEYS, True),
+                                         "healthcare", {})
+
+
+@pytest.mark.parametrize("overrides", [
+    {},
+    {"critical_device_pct": 0.123456789},
+    {"licence_spend_reduction_pct": 0.0},
+    {"critical_device_pct": 1.0, "licence_spend_reduction_pct": 1 / 3},
+])
+def test_overrides_round_trip_exactly(overrides):
+    token = share_links.encode(roi_engine.DEFAULT_INPUTS, profile="msp", overrides=overrides)
+    assert share_links.decode(token)[2:] == ("msp", overrides)
+
+
+def test_unknown_override_is_refused():
+    with pytest.raises(ValueError, match="hourly_rate"):
+        share_links.encode(roi_engine.DEFAULT_INPUTS, overrides={"hourly_rate": 0.5})
+
+
+def test_assumption_overrides_are_the_changed_import_fields():
+    base = roi_engine.DEFAULT_ASSUMPTIONS
+    changed = base._replace(critical_device_pct=0.42, hours_per_report=1.0)
+    assert share_links.assumption_overrides(base, base) == {}
+    assert share_links.assumption_overrides(changed, base) == {"critical_device_pct": 0.42}
+
+
+def test_every_truncation_is_rejected():
+    token = share_links.encode(roi_engine.DEFAULT_INPUTS, profile="healthcare")
+    data = _raw(token)
+    for end in range(len(data)):
+        assert share_links.decode(_token(data[:end])) is None, end
+    for end in range(len(token)):
+        assert share_links.decode(token[:end]) is None, end
+
+
+def _v2(profile=b"default", values=None, version=2, mask=0x3F):
+    values = values if values is not None else [100] * len(share_links.SHARE_FIELDS)
+    return bytearray([version, mask, len(profile)]) + profile + _varints(values)
+
+
+def _v3(override_mask, *values):
+    return _v2(version=3) + _varints([override_mask]) + b"".join(struct.pack(">d", value) for value in values)
+
+
+@pytest.mark.parametrize("token", [
+    None,
+    "",
+    "!!!!",
+    "A",
+    "A" * 201,
+    _token(_v2(version=3)),
+    _token(_v2(version=4) + b"\x00"),
+    _token(_v2(version=0)),
+    _token(_v2() + b"\x00"),
+    _token(_v2(profile=b"Default")),
+    _token(_v2(profile=b"default\n")),
+    _token(_v2(profile=b"../etc")),
+    _token(_v2(profile=b"")),
+    _token(_v2(profile=b"caf\xc3\xa9")),
+    _token(bytearray([2, 0x3F, 200]) + b"default"),
+    # A varint that never ends
+    _token(_v2(values=[]) + b"\xff" * 12),
+    # Overrides: unknown bits, missing or extra bytes, values outside 0..1
+    _token(_v3(4, 0.5)),
+    _token(_v3(1)),
+    _token(_v3(1, 0.5)[:-1]),
+    _token(_v3(1, 0.5) + b"\x00"),
+    _token(_v3(1, -0.1)),
+    _token(_v3(2, 1.5)),
+    _token(_v3(1, float("nan"))),
+    _token(_v3(3, 0.5, float("inf"))),
+])
+def test_malformed_tokens_are_rejected(token):
+    assert share_links.decode(token) is None
+
+
+def test_link_prefers_public_url(monkeypatch):
+    monkeypatch.delenv("ROI_PUBLIC_URL", raising=False)
+    assert share_links.link("abc", "https://a.example/") == "https://a.example/?r=abc"
+    monkeypatch.setenv("ROI_PUBLIC_URL", "https://roi.example.com/")
+    assert share_links.link("abc", "https://a.example/") == "https://roi.example.com/?r=abc"
+
+
+@pytest.mark.parametrize("name, value", [
+    ("hourly_rate", 0.125), ("hourly_rate", 72.554), ("hourly_rate", -3.0),
+    ("num_devices", 2.999), ("num_devices", 2.994), ("num_devices", 1_000_000),
+])
+def test_rounded_matches_a_round_trip(name, value):
+    decoded, _, _, _ = share_links.decode(share_links.encode(dict(roi_engine.DEFAULT_INPUTS, **{name: value})))
+    assert share_links.rounded(name, value) == decoded[name]
+    assert type(share_links.rounded(name, value)) is type(decoded[name])
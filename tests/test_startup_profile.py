@@ -0,0 +1,27 @@
+import startup_profile
+
+
+def test_profiled_modules_follow_app_imports(tmp_path):
+    app = tmp_path / "app.py"
+    app.write_text(
+        "import streamlit as st\n"
+        "from streamlit.runtime import get_instance\n"
+        "import roi_engine, share_links\n"
+        "if st.button('Go'):\n"
+        "    import pandas as pd\n"
+        "    import roi_engine\n"
+        "    import pdf_report\n",
+        encoding="utf-8",
+    )
+    eager, lazy = startup_profile.app_imports(str(app))
+    assert eager == ("streamlit", "roi_engine", "share_links")
+    assert lazy == ("pandas", "pdf_report")
+
+
+def test_every_app_module_is_profiled():
+    for module in ("share_links", "profiles", "lead_store", "results_table", "scenario_log", "lean_sessions",
+                   "numpy", "reportlab.platypus"):
+        assert module in startup_profile.PROFILED_MODULES
+    assert "pdf_report" in startup_profile.LAZY_MODULES
+    assert "roi_engine" not in startup_profile.LAZY_MODULES
+    assert len(set(startup_profile.PROFILED_MODULES)) == len(startup_profile.PROFILED_MODULES)
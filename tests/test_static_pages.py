@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+import profiles
+import share_links
+import static_pages
+
+
+@pytest.fixture
+def presets():
+    return static_pages.load(static_pages.DEFAULT_PATH, profiles.registry.profiles())
+
+
+@pytest.mark.parametrize("base_url", [None, "", "/roi/", "roi.example.com", "ftp://roi.example.com/"])
+def test_build_needs_an_absolute_address(tmp_path, monkeypatch, presets, base_url):
+    monkeypatch.delenv("ROI_PUBLIC_URL", raising=False)
+    with pytest.raises(ValueError, match="absolute address"):
+        static_pages.build(presets, str(tmp_path), base_url, workers=1)
+    assert not list(tmp_path.iterdir())
+
+
+def test_pages_link_to_the_public_address(tmp_path, monkeypatch, presets):
+    monkeypatch.delenv("ROI_PUBLIC_URL", raising=False)
+    entries = static_pages.build(presets, str(tmp_path), "https://roi.example.com/", workers=1)
+    assert len(entries) == len(presets)
+    for preset in presets:
+        page = (tmp_path / f"{preset.name}.html").read_text(encoding="utf-8")
+        sidecar = json.loads((tmp_path / f"{preset.name}.json").read_text(encoding="utf-8"))
+        assert 'href="https://roi.example.com/?r=' in page
+        assert 'href="?r=' not in page
+        assert sidecar["app_url"].startswith("https://roi.example.com/?r=")
+        assert sidecar["share_text"].rstrip().endswith(sidecar["app_url"])
+
+
+def test_environment_address_wins(tmp_path, monkeypatch, presets):
+    monkeypatch.setenv("ROI_PUBLIC_URL", "https://public.example.com/")
+    static_pages.build(presets[:1], str(tmp_path), None, workers=1)
+    assert 'href="https://public.example.com/?r=' in (tmp_path / f"{presets[0].name}.html").read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("name", ["", "Retail", "retail\n", "x" * 33])
+def test_bad_preset_names_are_rejected(name):
+    with pytest.raises(ValueError, match="must be 1-32"):
+        static_pages.compile_preset(name, {}, {profiles.DEFAULT_PROFILE})
+
+
+def test_preset_inputs_are_rounded_like_share_links():
+    preset = static_pages.compile_preset("retail", {"inputs": {"hourly_rate": 0.125, "num_devices": 2.999}},
+                                         {profiles.DEFAULT_PROFILE})
+    token = share_links.encode(preset.inputs, preset.include, preset.profile)
+    assert preset.inputs == share_links.decode(token)[0]
+    assert (preset.inputs["hourly_rate"], preset.inputs["num_devices"]) == (0.13, 3)
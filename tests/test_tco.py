@@ -0,0 +1,108 @@
+import math
+
+import numpy as np
+import pytest
+
+import roi_engine
+import tco
+
+
+@pytest.mark.parametrize("flows, rate, expected", [
+    ([-100, 110], 0.10, 0.0),
+    ([-1000, 300, 400, 500], 0.10, -1000 + 300 / 1.1 + 400 / 1.1 ** 2 + 500 / 1.1 ** 3),
+    ([-1000, 300, 400, 500], 0.0, 200.0),
+    ([50, 50], 1.0, 75.0),
+])
+def test_npv_known_flows(flows, rate, expected):
+    assert float(tco.npv(flows, rate)) == pytest.approx(expected, abs=1e-9)
+
+
+@pytest.mark.parametrize("flows, expected", [
+    ([-100, 110], 0.10),
+    ([-100, 50, 50], 0.0),
+    ([-100, 121], 0.21),
+    # The numpy-financial documentation example
+    ([-100, 39, 59, 55, 20], 0.28094842115996066),
+    # Outlay repaid a thousandfold within a year
+    ([-100, 100_000], 999.0),
+    # Loses money: a negative rate, from -100 + 40x + 40x^2 = 0 with x = 1 / (1 + rate)
+    ([-100, 40, 40], 80 / (math.sqrt(17_600) - 40) - 1),
+    # Inflow first, outlay later (a loan)
+    ([100, -110], 0.10),
+])
+def test_irr_known_flows(flows, expected):
+    rate = float(tco.irr(flows))
+    assert rate == pytest.approx(expected, rel=1e-8, abs=1e-10)
+    assert float(tco.npv(flows, rate)) == pytest.approx(0.0, abs=1e-6)
+
+
+@pytest.mark.parametrize("flows", [
+    [100, 50, 50],
+    [-100, -50, -10],
+    [0, 0, 0],
+])
+def test_irr_without_sign_change_is_nan(flows):
+    assert math.isnan(float(tco.irr(flows)))
+
+
+def test_irr_rows_solve_independently():
+    flows = np.array([[-100, 110, 0], [100, 50, 50], [-100, 39, 59], [-100, 50, 50]], dtype=float)
+    rates = tco.irr(flows)
+    assert rates.shape == (4,)
+    for row, rate in zip(flows, rates):
+        single = float(tco.irr(row))
+        assert (math.isnan(rate) and math.isnan(single)) or rate == pytest.approx(single, rel=1e-9)
+
+
+def test_cash_flows_pay_subscription_at_start_of_year():
+    flows = tco.cash_flows([300, 400, 500], [100, 110, 121])
+    assert flows.tolist() == [-100, 300 - 110, 400 - 121, 500]
+
+
+@pytest.mark.parametrize("savings, subscription, rate, expected", [
+    # Repaid exactly at the end of year 1
+    ([100, 100, 100], [100, 0, 0], 0.0, 12.0),
+    ([100, 100, 100], [100, 100, 100], 0.0, 12.0),
+    # Repaid exactly at the end of year 2
+    ([100, 100, 100], [200, 0, 0], 0.0, 24.0),
+    # Half way through year 1
+    ([200, 200], [100, 100], 0.0, 6.0),
+    # Year 2 savings recover the rest a quarter of the way through
+    ([100, 400], [200, 0], 0.0, 15.0),
+    # Discounting: 100 paid now, 110 earned through a year at 10%
+    ([110, 110], [100, 100], 0.10, 12.0),
+])
+def test_discounted_payback(savings, subscription, rate, expected):
+    assert float(tco.discounted_payback_months(savings, subscription, rate)) == pytest.approx(expected, abs=1e-9)
+
+
+def test_discounted_payback_beyond_horizon_is_nan():
+    assert math.isnan(float(tco.discounted_payback_months([50, 50, 50], [200, 0, 0], 0.0)))
+    # Undiscounted it pays back in the third year, discounted at 20% it does not
+    assert float(tco.discounted_payback_months([100, 100, 100], [250, 0, 0], 0.0)) == pytest.approx(30.0)
+    assert math.isnan(float(tco.discounted_payback_months([100, 100, 100], [250, 0, 0], 0.20)))
+
+
+def test_one_year_projection_matches_engine():
+    inputs = dict(roi_engine.DEFAULT_INPUTS)
+    single = roi_engine.calculate_scenario(inputs)
+    projected = tco.project_scenario(inputs, tco.DEFAULT_PROJECTION._replace(years=1, discount_rate=0.0))
+    assert projected["tco_savings"] == pytest.approx(single["total_dollars"])
+    assert projected["tco_net_savings"] == pytest.approx(single["net_savings"])
+    assert projected["tco_roi_percentage"] == pytest.approx(single["roi_percentage"])
+    assert projected["npv"] == pytest.approx(single["net_savings"])
+    assert projected["irr"] == pytest.approx(single["total_dollars"] / inputs["sub_cost"] - 1)
+
+
+def test_projection_growth_and_ramp():
+    inputs = dict(roi_engine.DEFAULT_INPUTS)
+    projection = tco.Projection(years=3, sub_escalation=0.1, rate_inflation=0.0, device_growth=0.0,
+                                discount_rate=0.08, ramp={"licence_spend": (0.5, 1.0)})
+    results = tco.project_scenario(inputs, projection)
+    full = roi_engine.calculate_scenario(inputs)["total_dollars"]
+    licence = roi_engine.calculate_scenario(inputs)["licence_spend_savings"]
+    assert results["savings_by_year"] == pytest.approx([full - licence / 2, full, full])
+    assert results["subscription_by_year"] == pytest.approx([100_000, 110_000, 121_000])
+    flows = tco.cash_flows(results["savings_by_year"], results["subscription_by_year"])
+    assert results["npv"] == pytest.approx(float(tco.npv(flows, 0.08)))
+    assert results["irr"] == pytest.approx(float(tco.irr(flows)))